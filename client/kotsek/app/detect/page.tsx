@@ -529,7 +529,18 @@ const SurveillanceInterface = () => {
         try {
           const data = JSON.parse(event.data);
           if (data.success) {
-            setUnassignedVehicles(data.data);
+            if (data.type === "delta") {
+              // Only changes are sent after the initial snapshot
+              setUnassignedVehicles((prev) => {
+                const replaced = new Set<string>([
+                  ...data.removed,
+                  ...data.added.map((v: UnassignedVehicle) => v.id),
+                ]);
+                return [...prev.filter((v) => !replaced.has(v.id)), ...data.added];
+              });
+            } else {
+              setUnassignedVehicles(data.data);
+            }
           } else {
             console.error("Error in SSE data:", data.error);
             toast.error("Failed to load unassigned vehicles");
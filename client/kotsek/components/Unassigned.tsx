@@ -104,7 +104,18 @@ export default function UnassignedVehiclesTable() {
       eventSource.onmessage = (event) => {
         const result = JSON.parse(event.data);
         if (result.success) {
-          setVehicles(result.data);
+          if (result.type === "delta") {
+            // Only changes are sent after the initial snapshot
+            setVehicles((prev) => {
+              const replaced = new Set<string>([
+                ...result.removed,
+                ...result.added.map((v: Vehicle) => v.id),
+              ]);
+              return [...prev.filter((v) => !replaced.has(v.id)), ...result.added];
+            });
+          } else {
+            setVehicles(result.data);
+          }
           setError(null);
         } else {
           setError(result.message || "Failed to fetch vehicles");
@@ -0,0 +1,68 @@
+import click
+from datetime import datetime, timedelta
+from db.db import db
+
+
+def _parse_date(value, default):
+    return datetime.strptime(value, '%Y-%m-%d') if value else default
+
+
+def register_commands(app):
+    """Maintenance commands, run with `flask --app manage <command>`"""
+
+    @app.cli.command('backfill-rollups')
+    @click.option('--start', help='First day to rebuild (YYYY-MM-DD), defaults to 90 days ago')
+    @click.option('--end', help='Day after the last day to rebuild (YYYY-MM-DD), defaults to the next hour')
+    def backfill_rollups(start, end):
+        """Rebuild traffic_rollups from vehicle_entries, vehicle_exits and parking_sessions"""
+        from services.traffic_rollup import backfill
+        from services.report_cache import report_cache
+
+        now = datetime.utcnow()
+        start_dt = _parse_date(start, now - timedelta(days=90))
+        end_dt = _parse_date(end, now + timedelta(hours=1))
+        rows = backfill(db.session, start_dt, end_dt)
+        # Cached reports over the rebuilt hours may be wrong now
+        report_cache.clear()
+        click.echo(f"✅ Rebuilt {rows} rollup rows for {start_dt:%Y-%m-%d %H:00} to {end_dt:%Y-%m-%d %H:00}")
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """EXPLAIN the hot analytics/detection queries and fail if one stops using its index"""
+        from services.query_plans import check_plans
+
+        failures = 0
+        for name, ok, used in check_plans(db.session):
+            click.echo(f"{'✅' if ok else '❌'} {name}: {', '.join(used) or 'no index'}")
+            failures += not ok
+        if failures:
+            raise click.ClickException(f"{failures} queries are not using their indexes")
+
+    @app.cli.command('ensure-partitions')
+    @click.option('--months-ahead', type=int, help='Months of partitions to keep ready (default PARTITION_MONTHS_AHEAD)')
+    def ensure_partitions_command(months_ahead):
+        """Create the monthly partitions entries/exits/sessions/logs will need next"""
+        from services.partitions import ensure_partitions, PARTITION_MONTHS_AHEAD
+
+        created = ensure_partitions(db.session, PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead)
+        click.echo(f"✅ {len(created)} partitions created")
+
+    @app.cli.command('archive-partitions')
+    @click.option('--older-than', type=int, help='Archive months that ended more than this many months ago')
+    @click.option('--directory', help='Where to write the Parquet files (default PARTITION_ARCHIVE_DIR)')
+    @click.option('--keep-tables', is_flag=True, help='Detach archived partitions but do not drop them')
+    @click.option('--dry-run', is_flag=True, help='Only list what would be archived')
+    def archive_partitions_command(older_than, directory, keep_tables, dry_run):
+        """Write old monthly partitions to Parquet and detach them from the hot tables"""
+        from services.partitions import archive_partitions, PARTITION_ARCHIVE_AFTER_MONTHS, PARTITION_ARCHIVE_DIR
+
+        archived = archive_partitions(
+            db.session,
+            PARTITION_ARCHIVE_AFTER_MONTHS if older_than is None else older_than,
+            directory or PARTITION_ARCHIVE_DIR,
+            keep_tables=keep_tables,
+            dry_run=dry_run
+        )
+        for name, rows, path in archived:
+            click.echo(f"{'would archive' if dry_run else 'archived'} {name}: {rows} rows -> {path or '(empty)'}")
+        click.echo(f"✅ {len(archived)} partitions {'to archive' if dry_run else 'archived'}")
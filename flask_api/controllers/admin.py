@@ -2,31 +2,33 @@ from flask import Blueprint, request, jsonify
 from models.users import User
 from db.db import db
 from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 from models.system_logs import SystemLog
+from services.authz import authz
+from services.audit_log import audit_log
+from services.log_search import filter_logs
+from utils.pagination import keyset_page, page_size, estimate_count
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 def log_admin_action(action, details=None, user_id=None):
-    """Helper function to log admin actions"""
-    log = SystemLog(
-        log_type='admin_action',
-        action=action,
-        details=details,
-        user_id=user_id,
-        ip_address=request.remote_addr
-    )
-    db.session.add(log)
-    db.session.commit()
+    """Helper function to log admin actions (queued, written in batches by services/audit_log.py)"""
+    audit_log.log('admin_action', action, details=details, user_id=user_id, ip_address=request.remote_addr)
+
+def current_identity():
+    """Role and blocked status of the JWT's user from its claims (see services/authz.py)"""
+    return authz.identity(get_jwt_identity(), get_jwt())
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user = User.query.filter_by(id=get_jwt_identity()).first()
-        if not current_user or current_user.role != 'Admin':
+        identity = current_identity()
+        if not identity or identity.role != 'Admin':
             return jsonify({'error': 'Admin privileges required'}), 403
+        if identity.is_blocked:
+            return jsonify({'error': 'Account is blocked'}), 403
         return f(*args, **kwargs)
     return decorated_function
 
@@ -34,11 +36,13 @@ def role_required(allowed_roles):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            current_user = User.query.filter_by(id=get_jwt_identity()).first()
-            if not current_user:
+            identity = current_identity()
+            if not identity:
                 return jsonify({'error': 'User not found'}), 404
+            if identity.is_blocked:
+                return jsonify({'error': 'Account is blocked'}), 403
             
-            if current_user.role not in allowed_roles:
+            if identity.role not in allowed_roles:
                 return jsonify({'error': 'Insufficient permissions'}), 403
             return f(*args, **kwargs)
         return decorated_function
@@ -47,8 +51,7 @@ def role_required(allowed_roles):
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    current_user = User.query.filter_by(id=get_jwt_identity()).first()
-    if not current_user:
+    if not current_identity():
         return jsonify({'error': 'User not found'}), 404
     
     users = User.query.all()
@@ -215,37 +218,41 @@ def unblock_user(user_id):
 @jwt_required()
 @admin_required
 def get_system_logs():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
-    log_type = request.args.get('type')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = SystemLog.query
-    
-    if log_type:
-        query = query.filter_by(log_type=log_type)
-    if start_date:
-        query = query.filter(SystemLog.timestamp >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(SystemLog.timestamp <= datetime.fromisoformat(end_date))
-    
-    logs = query.order_by(SystemLog.timestamp.desc()).paginate(page=page, per_page=per_page)
+    """
+    Newest-first log page. Keyset paging on (timestamp, id) via ?cursor=, filters
+    ?type=, ?action=, ?start_date=, ?end_date= and full-text ?q= over action/details.
+    'total' is the planner's row estimate, not an exact count.
+    """
+    limit = page_size(request.args.get('limit') or request.args.get('per_page'), default=50)
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        query = filter_logs(
+            db.session,
+            log_type=request.args.get('type'),
+            action=request.args.get('action'),
+            start=datetime.fromisoformat(start_date) if start_date else None,
+            end=datetime.fromisoformat(end_date) if end_date else None,
+            search=(request.args.get('q') or '').strip() or None
+        )
+        total = estimate_count(db.session, query)
+        logs, next_cursor = keyset_page(query, SystemLog.timestamp, SystemLog.id, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'logs': [log.to_dict() for log in logs.items],
-        'total': logs.total,
-        'pages': logs.pages,
-        'current_page': logs.page
+        'logs': [log.to_dict() for log in logs],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'total': total,
+        'total_is_estimate': db.session.get_bind().dialect.name == 'postgresql',
+        'per_page': limit
     }), 200
 
 @admin_bp.route('/logs/export', methods=['GET'])
 @jwt_required()
 @admin_required
 def export_logs():
-    # Similar filtering as above
-    logs = SystemLog.query.order_by(SystemLog.timestamp.desc()).all()
-    
-    # Generate CSV or other format
-    # Return as downloadable file
-    return jsonify({'message': 'Logs exported successfully'}), 200
+    # Same filters as /logs, streamed as CSV (or ?format=parquet|arrow)
+    from controllers.export import streamed_export
+    return streamed_export('logs', {'log_type': request.args.get('type')})
@@ -3,7 +3,7 @@ from models.vehicle_entry import VehicleEntry
 from models.vehicle_exit import VehicleExit
 from models.parking_lot import ParkingLot
 from sqlalchemy import func
-from datetime import datetime, timedelta
+from datetime import datetime
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
@@ -13,6 +13,11 @@ import traceback
 from models.parking_session import ParkingSession
 from db.db import db  # Import the db instance from db.py instead of creating a new one
 from models.parking_slot import ParkingSlot
+from services.lot_counters import lot_counters
+from services.report_cache import cached_report
+from services.forecasting import forecaster
+from services import turnover
+from services.traffic_grid import hourly_grid, heatmap_payload, prediction_payload
 
 regression_bp = Blueprint('regression', __name__)
 
@@ -21,30 +26,15 @@ regression_bp = Blueprint('regression', __name__)
 @regression_bp.route('/heatmap', methods=['GET'])
 @jwt_required()
 @role_required(['Admin'])
+@cached_report('heatmap')
 def get_heatmap_data():
+    """Entries per (day, hour) this month; ?format=columnar returns arrays for the chart"""
     try:
         start_date = datetime.now().replace(day=1, hour=0, minute=0, second=0)
         end_date = datetime.now()
 
-        entries_query = db.session.query(
-            func.date_trunc('hour', VehicleEntry.entry_time).label('timestamp'),
-            func.count().label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        ).group_by('timestamp').all()
-
-        df = pd.DataFrame(entries_query, columns=['timestamp', 'count'])
-        df['day'] = df['timestamp'].dt.strftime('%Y-%m-%d')
-        df['hour'] = df['timestamp'].dt.hour
-
-        heatmap_data = {}
-        for _, row in df.iterrows():
-            day = row['day']
-            hour = str(row['hour'])
-            if day not in heatmap_data:
-                heatmap_data[day] = {}
-            heatmap_data[day][hour] = int(row['count'])
+        days, entries, _ = hourly_grid(db.session, start_date, end_date)
+        heatmap_data = heatmap_payload(days, entries, columnar=request.args.get('format') == 'columnar')
 
         return jsonify(heatmap_data), 200
     except Exception as e:
@@ -58,38 +48,10 @@ def get_heatmap_data():
 def turnover_trend():
     try:
         end_date = datetime.now()
-        start_date = end_date.replace(day=1)
-        days = pd.date_range(start=start_date, end=end_date)
-
-        results = []
-        for day in days:
-            next_day = day + timedelta(days=1)
-            sessions = db.session.query(
-                VehicleEntry.entry_time,
-                VehicleExit.exit_time
-            ).join(
-                ParkingSession,
-                VehicleEntry.entry_id == ParkingSession.entry_id
-            ).join(
-                VehicleExit,
-                VehicleExit.exit_id == ParkingSession.exit_id
-            ).filter(
-                VehicleEntry.entry_time >= day,
-                VehicleEntry.entry_time < next_day
-            ).all()
-
-            durations = [
-                (s.exit_time - s.entry_time).total_seconds() / 3600
-                for s in sessions if s.exit_time
-            ]
-            avg_duration = sum(durations) / len(durations) if durations else 0
-            turnover = 24 / avg_duration if avg_duration > 0 else 0
+        start_date = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-            results.append({
-                'date': day.strftime('%Y-%m-%d'),
-                'avg_turnover_time': round(avg_duration, 2),
-                'turnover_rate': round(turnover, 2)
-            })
+        # The whole month from one grouped query
+        results = turnover.daily_turnover(db.session, start_date, end_date)
 
         return jsonify(results), 200
     except Exception as e:
@@ -101,108 +63,29 @@ def turnover_trend():
 @jwt_required()
 @role_required(['Admin'])
 def hourly_prediction():
-    try:
-        # Use all historical entry records
-        entries = db.session.query(
-            func.extract('hour', VehicleEntry.entry_time).label('hour'),
-            func.count().label('count')
-        ).group_by('hour').all()
-
-        # Convert to dict
-        hourly_data = {int(row.hour): int(row.count) for row in entries}
-
-        # Normalize by number of days to get average per hour
-        first_entry = db.session.query(func.min(VehicleEntry.entry_time)).scalar()
-        last_entry = db.session.query(func.max(VehicleEntry.entry_time)).scalar()
-
-        total_days = (last_entry.date() - first_entry.date()).days + 1
-
-        predicted_data = []
-        for hour in range(6, 23):  # 6 AM to 10 PM
-            count = hourly_data.get(hour, 0)
-            avg = count / total_days
-            predicted_data.append({
-                "hour": hour,
-                "predicted_entries": round(avg, 2)
-            })
-
-        return jsonify(predicted_data), 200
-    except Exception as e:
-        print(f"Error in hourly_prediction: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    """Average entries per hour of day, precomputed by the forecaster"""
+    forecaster.start()
+    predicted_data = forecaster.hourly_profile()
+    if predicted_data is None:
+        return jsonify({"error": "Forecast is still being prepared, try again shortly"}), 503
+    return jsonify(predicted_data), 200
 
 
 @regression_bp.route('/traffic/arima-forecast', methods=['GET'])
 @jwt_required()
 @role_required(['Admin'])
 def forecast_hourly_traffic_arima():
-    try:
-        from pmdarima import auto_arima
-        from collections import defaultdict
-
-        # Get historical vehicle entry timestamps
-        entries = db.session.query(VehicleEntry.entry_time).all()
-        timestamps = [row.entry_time for row in entries if row.entry_time]
-
-        print(f"[DEBUG] Total timestamps fetched: {len(timestamps)}")
-
-        if not timestamps:
+    """
+    Latest precomputed ARIMA forecast (refreshed in the background by the forecaster).
+    POST /jobs with kind 'arima-forecast' forces a refit.
+    """
+    forecaster.start()
+    grouped_forecast = forecaster.forecast()
+    if grouped_forecast is None:
+        if forecaster.ready:
             return jsonify({"error": "No data to forecast"}), 400
-
-        # Create hourly count time series
-        df = pd.DataFrame(timestamps, columns=['timestamp'])
-        df = df.set_index('timestamp').resample('H').size().rename('count').to_frame()
-        df = df.asfreq('H').fillna(0)
-
-        print(f"[DEBUG] Resampled DataFrame head:\n{df.head()}")
-
-        # Use auto_arima to find best model
-        model = auto_arima(
-            df['count'],
-            start_p=0, max_p=5,
-            start_q=0, max_q=5,
-            d=None,            # let it decide differencing
-            seasonal=False,
-            stepwise=True,
-            error_action="ignore",
-            suppress_warnings=True,
-            trace=False
-        )
-
-        # Forecast 17 hours (6 AM to 10 PM)
-        forecast_hours = 17
-        forecast_result = model.predict(n_periods=forecast_hours)
-
-        # Define fixed forecast window starting at 6AM tomorrow
-        tomorrow = (datetime.now() + timedelta(days=1)).date()
-        start = datetime.combine(tomorrow, datetime.min.time()) + timedelta(hours=6)
-        future_index = pd.date_range(start=start, periods=forecast_hours, freq='H')
-
-        print(f"[DEBUG] Future index range: {future_index[0]} to {future_index[-1]}")
-
-        # Group by 3-hour blocks
-        group_map = defaultdict(list)
-        for ts, val in zip(future_index, forecast_result):
-            group_start_hour = (ts.hour - 6) // 3 * 3 + 6
-            label = f"{group_start_hour:02d}:00–{group_start_hour + 3:02d}:00"
-            group_map[label].append(max(0, val))  # ensure no negative predictions
-
-        # Average values per group
-        grouped_forecast = [
-            {
-                "hour_group": label,
-                "predicted_entries": round(sum(vals) / len(vals), 2)
-            }
-            for label, vals in group_map.items()
-        ]
-
-        print(f"[DEBUG] Grouped forecast data:\n{grouped_forecast}")
-
-        return jsonify(grouped_forecast), 200
-
-    except Exception as e:
-        print("Error in ARIMA forecast:", str(e))
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": "Forecast is still being prepared, try again shortly"}), 503
+    return jsonify(grouped_forecast), 200
 
 
 def get_time_series_data(start_date, end_date, lot_id=None):
@@ -264,66 +147,15 @@ def get_time_series_data(start_date, end_date, lot_id=None):
 @jwt_required()
 @role_required(['Admin'])
 def predict_traffic():
-    """Predict traffic patterns based on current month's data"""
+    """Predict traffic patterns based on current month's data (?format=columnar for arrays)"""
     try:
         # Calculate date range (use current month's data)
         end_date = datetime.now()
         start_date = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        # Get all entries and exits for the current month
-        entries_query = db.session.query(
-            func.date_trunc('hour', VehicleEntry.entry_time).label('timestamp'),
-            func.count().label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        )
-        
-        exits_query = db.session.query(
-            func.date_trunc('hour', VehicleExit.exit_time).label('timestamp'),
-            func.count().label('count')
-        ).filter(
-            VehicleExit.exit_time >= start_date,
-            VehicleExit.exit_time <= end_date
-        )
-        
-        # Execute queries
-        entries = entries_query.group_by('timestamp').all()
-        exits = exits_query.group_by('timestamp').all()
-
-        # Convert to pandas DataFrame
-        entries_df = pd.DataFrame(entries, columns=['timestamp', 'count'])
-        exits_df = pd.DataFrame(exits, columns=['timestamp', 'count'])
-        
-        # Create a complete date-hour grid for the current month
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        # Initialize the data structure for the graph
-        graph_data = []
-        
-        # For each date in the current month
-        for date in date_range:
-            date_str = date.strftime('%Y-%m-%d')
-            date_entries = entries_df[entries_df['timestamp'].dt.date == date.date()]
-            date_exits = exits_df[exits_df['timestamp'].dt.date == date.date()]
-            
-            # For each specific hour (00:00, 12:00, 23:59)
-            for hour in [0, 12, 23]:
-                # Get entries and exits for this specific hour
-                hour_entries = date_entries[date_entries['timestamp'].dt.hour == hour]
-                hour_exits = date_exits[date_exits['timestamp'].dt.hour == hour]
-                
-                # Convert numpy/pandas types to Python native types
-                entry_count = float(hour_entries['count'].sum()) if not hour_entries.empty else 0
-                exit_count = float(hour_exits['count'].sum()) if not hour_exits.empty else 0
-                
-                graph_data.append({
-                    'date': date_str,
-                    'hour': int(hour),
-                    'entries': round(entry_count, 2),
-                    'exits': round(exit_count, 2),
-                    'net_change': round(entry_count - exit_count, 2)
-                })
+        # Dense day x hour grid of entries and exits for the month
+        days, entries, exits = hourly_grid(db.session, start_date, end_date)
+        graph_data = prediction_payload(days, entries, exits, columnar=request.args.get('format') == 'columnar')
         
         return jsonify({
             'prediction_type': 'graph',
@@ -345,45 +177,7 @@ def calculate_turnover_rate(lot_id=None):
         # Get current month's data
         end_date = datetime.now()
         start_date = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Query parking sessions with their duration
-        query = db.session.query(
-            VehicleEntry.entry_time,
-            VehicleExit.exit_time,
-            ParkingSession.lot_id
-        ).join(
-            ParkingSession,
-            VehicleEntry.entry_id == ParkingSession.entry_id
-        ).join(
-            VehicleExit,
-            VehicleExit.exit_id == ParkingSession.exit_id
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        )
-        
-        if lot_id:
-            query = query.filter(ParkingSession.lot_id == lot_id)
-            
-        sessions = query.all()
-        
-        # Calculate average duration
-        total_duration = 0
-        count = 0
-        for session in sessions:
-            if session.exit_time:
-                duration = (session.exit_time - session.entry_time).total_seconds() / 3600  # Convert to hours
-                total_duration += duration
-                count += 1
-        
-        avg_turnover_time = total_duration / count if count > 0 else 0
-        turnover_rate = 24 / avg_turnover_time if avg_turnover_time > 0 else 0  # Spots per day
-        
-        return {
-            "avg_turnover_time_hours": round(avg_turnover_time, 2),
-            "turnover_rate_per_day": round(turnover_rate, 2),
-            "confidence": round(min(1.0, count / 50), 2)  # Confidence based on sample size
-        }
+        return turnover.turnover_rate(db.session, start_date, end_date, lot_id)
     except Exception as e:
         print(f"Error calculating turnover rate: {str(e)}")
         return None
@@ -394,49 +188,7 @@ def predict_visit_frequency(lot_id=None):
         # Get current month's data
         end_date = datetime.now()
         start_date = end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Query vehicle entries with their timestamps
-        query = db.session.query(
-            VehicleEntry.plate_number,
-            VehicleEntry.entry_time,
-                ParkingSession.lot_id
-            ).join(
-                ParkingSession,
-                VehicleEntry.entry_id == ParkingSession.entry_id
-            ).filter(
-                VehicleEntry.entry_time >= start_date,
-                VehicleEntry.entry_time <= end_date
-        )
-        
-        if lot_id:
-            query = query.filter(ParkingSession.lot_id == lot_id)
-            
-        entries = query.all()
-            
-        # Group by plate_number and count visits
-        vehicle_visits = {}
-        for entry in entries:
-            if entry.plate_number not in vehicle_visits:
-                vehicle_visits[entry.plate_number] = []
-            vehicle_visits[entry.plate_number].append(entry.entry_time)
-        
-        # Calculate average days between visits
-        visit_intervals = []
-        for visits in vehicle_visits.values():
-            if len(visits) > 1:
-                visits.sort()
-                for i in range(1, len(visits)):
-                    interval = (visits[i] - visits[i-1]).total_seconds() / (24 * 3600)  # Convert to days
-                    visit_intervals.append(interval)
-        
-        avg_interval = sum(visit_intervals) / len(visit_intervals) if visit_intervals else 0
-        visits_per_month = len(entries) / ((end_date - start_date).days + 1) * 30  # Normalize to 30 days
-        
-        return {
-            "avg_days_between_visits": round(avg_interval, 1),
-            "visits_per_month": round(visits_per_month, 1),
-            "confidence": round(min(1.0, len(visit_intervals) / 50), 2)
-        }
+        return turnover.visit_frequency(db.session, start_date, end_date, lot_id)
     except Exception as e:
         print(f"Error predicting visit frequency: {str(e)}")
         return None
@@ -444,17 +196,13 @@ def predict_visit_frequency(lot_id=None):
 def predict_availability():
     """Predict available slots in the future"""
     try:
-        # Get total spots by counting parking slots
-        total_spots_query = db.session.query(func.count(ParkingSlot.slot_id))
-        total_spots = total_spots_query.scalar()
+        # Total and currently occupied/reserved spots from the lot counters (no COUNT queries)
+        lot_counters.ensure_loaded(db.session)
+        totals = lot_counters.totals()
+        total_spots = totals['total']
         print(f"Total spots: {total_spots}")
         
-        # Get current occupied and reserved spots from parking_slots
-        current_occupied_query = db.session.query(func.count(ParkingSlot.slot_id)).filter(
-            ParkingSlot.status.in_(['occupied', 'reserved'])
-        )
-        
-        current_occupied = current_occupied_query.scalar()
+        current_occupied = totals['occupied'] + totals['reserved']
         print(f"Current occupied spots: {current_occupied}")
         
         # Get current month's slot status changes
@@ -559,6 +307,7 @@ def predict_peak_hours():
 
 @regression_bp.route('/predictions', methods=['GET'])
 @jwt_required()
+@cached_report('predictions')
 def get_predictions():
     try:
         print("Getting predictions for all lots")
@@ -601,7 +350,7 @@ def get_predictions():
         if not peak_hours:
             peak_hours = []
             
-            return jsonify({
+        return jsonify({
             "turnover_rate": turnover_rate,
             "visit_frequency": visit_frequency,
             "availability": availability,
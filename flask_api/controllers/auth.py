@@ -19,7 +19,8 @@ import uuid
 import secrets
 from utils.email_sender import generate_otp, send_otp_email
 import redis
-import time
+from utils.redis_client import get_redis
+from services.authz import authz
 
 load_dotenv()
 
@@ -33,45 +34,10 @@ OAUTH_STATE_STRING = secrets.token_hex(16)
 # JWT Secret (similar to jwtSecret in Golang)
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'c2lrbG9NTkw')
 
-# Initialize Redis for OTP storage with connection retry and error handling
-def init_redis():
-    """Initialize Redis connection with retry logic"""
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            redis_client = redis.Redis(
-                host=os.getenv('REDIS_HOST', 'localhost'),
-                port=int(os.getenv('REDIS_PORT', 6379)),
-                db=0,
-                decode_responses=True,
-                socket_timeout=5,  # 5 seconds timeout
-                socket_connect_timeout=5,  # 5 seconds connection timeout
-                retry_on_timeout=True
-            )
-            # Test the connection
-            redis_client.ping()
-            print("✅ Successfully connected to Redis")
-            return redis_client
-        except redis.ConnectionError as e:
-            if attempt < max_retries - 1:
-                print(f"⚠️ Redis connection attempt {attempt + 1} failed: {str(e)}")
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                print("❌ Failed to connect to Redis after multiple attempts")
-                raise
-        except Exception as e:
-            print(f"❌ Unexpected error connecting to Redis: {str(e)}")
-            raise
-
-try:
-    redis_client = init_redis()
-except Exception as e:
-    print(f"❌ Redis initialization failed: {str(e)}")
+# Redis for OTP storage (shared client, see utils/redis_client.py)
+redis_client = get_redis()
+if redis_client is None:
     print("⚠️ Running without Redis - OTP functionality will be disabled")
-    redis_client = None
 
 # OTP expiration time (10 minutes)
 OTP_EXPIRY = 600
@@ -245,8 +211,7 @@ def google_callback():
             'firstName': first_name,
             'lastName': last_name,
             'picture': user.image_url or picture,
-            'role': user.role,
-            'is_blocked': user.is_blocked
+            **authz.claims(user)
         }
     )
     print(f"JWT Claims: {jwt_access_token}")
@@ -428,7 +393,7 @@ def verify_registration():
         redis_client.delete(otp_key)
 
         # Generate tokens
-        access_token = create_access_token(identity=new_user.id)
+        access_token = create_access_token(identity=new_user.id, additional_claims=authz.claims(new_user))
         refresh_token = create_refresh_token(identity=new_user.id)
 
         return jsonify({
@@ -515,7 +480,7 @@ def verify_login():
         redis_client.delete(otp_key)
 
         # Generate tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=authz.claims(user))
         refresh_token = create_refresh_token(identity=user.id)
 
         return jsonify({
@@ -531,7 +496,13 @@ def verify_login():
 @jwt_required(refresh=True)
 def refresh():
     current_user_id = get_jwt_identity()
-    access_token = create_access_token(identity=current_user_id)
+    # Re-read the user so the new token carries their current role/blocked status
+    user = User.query.get(current_user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    if user.is_blocked:
+        return jsonify({'error': 'Account is blocked'}), 403
+    access_token = create_access_token(identity=current_user_id, additional_claims=authz.claims(user))
     
     return jsonify({'access_token': access_token}), 200
 
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.base import db
 from models.customer import ParkingCustomer
+from services.customer_search import search_customers
+from utils.pagination import page_size
 from sqlalchemy.exc import IntegrityError
 from uuid import UUID
 from flask import current_app
@@ -123,33 +125,21 @@ Thank you for choosing KoTsek!
 
 @customer_bp.route('/get-customers', methods=['GET'])
 def get_customers():
-    """Fetch all parking customers with optional filtering"""
+    """Fetch parking customers with optional filtering and ?limit=/?cursor= paging"""
     try:
         is_registered = request.args.get('is_registered')
-        plate_number = request.args.get('plate_number')
-        search = request.args.get('search')
-
-        query = ParkingCustomer.query
-
         if is_registered is not None:
             is_registered = is_registered.lower() == 'true'
-            query = query.filter(ParkingCustomer.is_registered == is_registered)
-
-        if plate_number:
-            query = query.filter(ParkingCustomer.plate_number.ilike(f"%{plate_number}%"))
+        limit = request.args.get('limit')
 
-        if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(
-                db.or_(
-                    db.func.lower(ParkingCustomer.first_name).ilike(search_term),
-                    db.func.lower(ParkingCustomer.last_name).ilike(search_term),
-                    db.func.lower(ParkingCustomer.plate_number).ilike(search_term)
-                )
-            )
-        query = query.order_by(ParkingCustomer.last_name.asc(), ParkingCustomer.first_name.asc())
-
-        customers = query.all()
+        customers, next_cursor, total_estimate = search_customers(
+            db.session,
+            search=request.args.get('search'),
+            plate_number=request.args.get('plate_number'),
+            is_registered=is_registered,
+            limit=page_size(limit) if limit else None,
+            cursor=request.args.get('cursor')
+        )
         result = [{
             'customer_id': str(customer.customer_id),
             'first_name': customer.first_name,
@@ -166,8 +156,15 @@ def get_customers():
             'updated_at': customer.updated_at.isoformat() if customer.updated_at else None
         } for customer in customers]
 
-        return jsonify(result), 200
+        response = jsonify(result)
+        # Paging info travels in headers so the body stays a plain list
+        response.headers['X-Total-Count-Estimate'] = str(total_estimate)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
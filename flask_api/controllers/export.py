@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required
+from controllers.admin import admin_required
+from services.export import export_stream, parse_bound
+
+export_bp = Blueprint('export', __name__, url_prefix='/export')
+
+
+def streamed_export(dataset, filters=None):
+    """Streaming download of a dataset for ?start_date=&end_date=&format=csv|parquet|arrow"""
+    try:
+        start = parse_bound(request.args.get('start_date'))
+        end = parse_bound(request.args.get('end_date'), end=True)
+        stream, mimetype, filename = export_stream(
+            dataset, request.args.get('format', 'csv'), start, end, filters
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return Response(stream, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@export_bp.route('/<dataset>', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_dataset(dataset):
+    """
+    Export entries, exits, sessions or logs.
+    Query Parameters:
+    - start_date / end_date: ISO date or datetime (optional)
+    - format: csv (default), parquet or arrow
+    """
+    return streamed_export(dataset)
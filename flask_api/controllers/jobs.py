@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from controllers.admin import admin_required
+from services.jobs import job_queue, COMPLETED, FAILED
+from services.report_engine import build_weekly_report, parse_report_range
+from services.forecasting import forecaster
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def _run_weekly_summary(session, start_date=None, end_date=None, sections=None, user='System', **_):
+    return build_weekly_report(session, start_date, end_date, sections, user)
+
+
+def _validate_weekly_summary(params):
+    parse_report_range(params.get('start_date'), params.get('end_date'))
+
+
+def _run_arima_forecast(session, **_):
+    # Refit now and publish the result to /reg/traffic/arima-forecast readers as well
+    forecast = forecaster.refresh(session, force_refit=True)
+    if forecast is None:
+        raise ValueError("No data to forecast")
+    return forecast
+
+
+job_queue.register('weekly-summary', _run_weekly_summary, _validate_weekly_summary)
+job_queue.register('arima-forecast', _run_arima_forecast)
+
+
+def _with_links(job):
+    job['status_url'] = f"/jobs/{job['job_id']}"
+    job['result_url'] = f"/jobs/{job['job_id']}/result"
+    return job
+
+
+@jobs_bp.route('', methods=['POST'])
+@jwt_required()
+@admin_required
+def submit_job():
+    """
+    Queue a background report/forecast.
+    Body: {"kind": "weekly-summary" | "arima-forecast", "params": {...}}
+    Identical submissions while one is still pending return the same job.
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params must be an object'}), 400
+
+    try:
+        job, created = job_queue.submit(kind, params, submitted_by=get_jwt_identity())
+    except KeyError:
+        return jsonify({'error': f'Unknown job kind: {kind}'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'job': _with_links(job), 'created': created}), 202
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_job(job_id):
+    """Job status; completion is also pushed as 'job_update' to sockets that sent 'job_subscribe'"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify({'job': _with_links(job)}), 200
+
+
+@jobs_bp.route('/<job_id>/result', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_job_result(job_id):
+    """The finished job's JSON result; ?download=1 serves it as an attachment"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job['status'] == FAILED:
+        return jsonify({'error': 'Job failed', 'details': job['error']}), 500
+    if job['status'] != COMPLETED:
+        return jsonify({'error': 'Job not finished', 'status': job['status']}), 409
+
+    response = Response(job_queue.result(job_id), mimetype='application/json')
+    if request.args.get('download'):
+        response.headers['Content-Disposition'] = f'attachment; filename="{job["kind"]}-{job_id}.json"'
+    return response
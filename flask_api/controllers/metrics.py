@@ -0,0 +1,75 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from controllers.admin import admin_required
+from db.db import db, pool_metrics
+from services.lot_counters import lot_counters
+from services.report_cache import report_cache
+from services.jobs import job_queue
+from services.forecasting import forecaster
+from services.authz import authz
+from services.audit_log import audit_log
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+
+@metrics_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_pool_metrics():
+    """Connection pool usage and per-subsystem budgets for the shared engine"""
+    return jsonify(pool_metrics()), 200
+
+
+@metrics_bp.route('/lot-counters', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_lot_counter_drift():
+    """Compare the in-memory lot counters against parking_slots and report any drift"""
+    lot_counters.ensure_loaded(db.session)
+    drift, _ = lot_counters.check(db.session)
+    return jsonify({
+        'consistent': not drift,
+        'drift': drift,
+        'counters': lot_counters.all(),
+        'stats': lot_counters.metrics()
+    }), 200
+
+
+@metrics_bp.route('/report-cache', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_report_cache_metrics():
+    """Hit/miss counts for cached analytics reports"""
+    return jsonify(report_cache.metrics()), 200
+
+
+@metrics_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_job_metrics():
+    """Background job counts by status and how many submissions were deduplicated"""
+    return jsonify(job_queue.metrics()), 200
+
+
+@metrics_bp.route('/forecast', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_forecast_metrics():
+    """State of the background traffic forecaster (series size, last fit/update)"""
+    return jsonify(forecaster.metrics()), 200
+
+
+@metrics_bp.route('/authz', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_authz_metrics():
+    """How often authorization was answered from JWT claims vs the user table"""
+    return jsonify(authz.metrics()), 200
+
+
+@metrics_bp.route('/audit-log', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_audit_log_metrics():
+    """Buffered audit log writer: records written, dropped, delayed and still buffered"""
+    return jsonify(audit_log.metrics()), 200
@@ -1,13 +1,20 @@
 # parking_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from models.base import db
 from models.vehicle_entry import VehicleEntry
 from models.parking_slot import ParkingSlot
-from models.parking_lot import ParkingLot
 from models.parking_session import ParkingSession
 from models.customer import ParkingCustomer
+from services.slot_allocator import slot_allocator
+from services.parking_status import parking_status_cache
+from services.occupancy import occupancy
+from services.customer_search import search_customers
+from services.parking_history import history_query
+from detection_service.session_index import active_session_for_slot
+from utils.pagination import keyset_page, page_size
 from uuid import UUID
 from datetime import datetime
+import json
 
 parking_bp = Blueprint('parking', __name__)
 
@@ -44,14 +51,20 @@ def assign_parking_slot():
         # Check if slot is available
         if parking_slot.status != 'available':
             return jsonify({"error": f"Parking slot is not available (current status: {parking_slot.status})"}), 409
-            
-        # Update parking slot
-        parking_slot.status = 'occupied'
-        parking_slot.current_vehicle_id = vehicle_entry.entry_id
-        parking_slot.updated_at = datetime.utcnow()
-        
-        # Update vehicle entry
-        vehicle_entry.status = 'assigned'
+
+        # Claim the slot atomically; another guard may have taken it since the read above
+        slot_allocator.ensure_loaded(db.session)
+        if not slot_allocator.claim_slot(db.session, parking_slot.slot_id, vehicle_entry.entry_id):
+            db.session.rollback()
+            return jsonify({"error": "Parking slot was just assigned to another vehicle"}), 409
+
+        # Update vehicle entry (only if still unassigned, so the same car is not assigned twice)
+        entry_updated = VehicleEntry.query\
+            .filter_by(entry_id=vehicle_entry.entry_id, status='unassigned')\
+            .update({'status': 'assigned'}, synchronize_session=False)
+        if not entry_updated:
+            db.session.rollback()
+            return jsonify({"error": "Vehicle entry was just assigned to another slot"}), 409
         
         # Create new parking session
         new_session = ParkingSession(
@@ -145,10 +158,7 @@ def release_parking_slot():
             vehicle_entry = VehicleEntry.query.filter_by(entry_id=parking_slot.current_vehicle_id).first()
 
             # ✅ Get and complete active session
-            active_session = ParkingSession.query.filter_by(
-                slot_id=parking_slot.slot_id,
-                status='active'
-            ).order_by(ParkingSession.start_time.desc()).first()
+            active_session = active_session_for_slot(db.session, parking_slot.slot_id).first()
 
             if active_session:
                 active_session.end_time = datetime.utcnow()
@@ -250,127 +260,18 @@ def get_slots_by_vehicle_type():
     """
     Fetches the current status of all parking slots,
     including reserved customer details for reserved slots.
+    Served from a cached snapshot; send If-None-Match to get a 304 when nothing changed.
     """
-    print("Attempting to fetch parking status...")
     try:
-        # Base query to get all slots
-        query = db.session.query(ParkingSlot)
-
-        # Execute query
-        all_slots = query.all()
-
-        # Fetch all registered customers to easily look up reserved customer details
-        # This avoids N+1 queries if many slots are reserved
-        all_customers = ParkingCustomer.query.filter_by(is_registered=True).all()
-        customer_lookup = {str(c.customer_id): c for c in all_customers}
-
-
-        # Initialize data structure
-        response_data = {
-            "car": {
-                "left": [],
-                "right": [],
-                "center": [],
-                "top": []
-            },
-            "motorcycle": [],
-            "bicycle": []
-        }
-
-        # Process query results
-        for slot in all_slots:
-            slot_data = {
-                "id": str(slot.slot_id),
-                "slot_number": slot.slot_number,
-                "lot_id": slot.lot_id,
-                "section": slot.section, # Ensure section is included
-                "status": slot.status,
-                "current_vehicle_id": str(slot.current_vehicle_id) if slot.current_vehicle_id else None,
-                "reserved_for": str(slot.reserved_for) if slot.reserved_for else None, # Include reserved_for UUID
-                "plate_number": None, # Will be populated for occupied slots
-                "reserved_customer_name": None, # Will be populated for reserved slots
-                "reserved_plate_number": None, # Will be populated for reserved slots
-            }
-
-            # If occupied, fetch plate number from VehicleEntry
-            if slot.status == 'occupied' and slot.current_vehicle_id:
-                vehicle_entry = VehicleEntry.query.filter_by(entry_id=slot.current_vehicle_id).first()
-                if vehicle_entry:
-                    slot_data["plate_number"] = vehicle_entry.plate_number
-
-            # If reserved, fetch customer details
-            if slot.status == 'reserved' and slot.reserved_for:
-                reserved_customer = customer_lookup.get(str(slot.reserved_for))
-                if reserved_customer:
-                    # Format display name and include plate number
-                    display_name = f"{reserved_customer.first_name or ''} {reserved_customer.last_name or ''}".strip()
-                    slot_data["reserved_customer_name"] = display_name if display_name else "Unnamed Customer"
-                    slot_data["reserved_plate_number"] = reserved_customer.plate_number
-
-
-            # Categorize slots
-            if slot.vehicle_type == 'car':
-                # For cars, organize by section
-                if slot.section in response_data["car"]:
-                    response_data["car"][slot.section].append(slot_data)
-            elif slot.vehicle_type == 'motorcycle':
-                # For motorcycles, add to flat list
-                response_data["motorcycle"].append(slot_data)
-            elif slot.vehicle_type == 'bicycle':
-                # For bicycles, add to flat list
-                response_data["bicycle"].append(slot_data)
-
-        # Note: Calculating stats here might be less efficient if you have many lots.
-        # Consider moving stat calculation to a separate endpoint or a more optimized query if performance is an issue.
-        # For now, keeping the existing stat calculation logic as is, assuming it's functional.
-        stats = {}
-
-        # Car statistics - aggregate across all car lots
-        car_lots = ParkingLot.query.filter_by(vehicle_type='car').all()
-        stats["car"] = {
-            "total": sum(lot.total_capacity for lot in car_lots),
-            "occupied": sum(lot.occupied_count() for lot in car_lots),
-            "reserved": sum(lot.reserved_count() for lot in car_lots),
-            "available": sum(lot.available_count() for lot in car_lots)
-        }
+        body, etag = parking_status_cache.get(db.session)
 
-        # Motorcycle statistics
-        motorcycle_lots = ParkingLot.query.filter_by(vehicle_type='motorcycle').all()
-        stats["motorcycle"] = {
-            "total": sum(lot.total_capacity for lot in motorcycle_lots),
-            "occupied": sum(lot.occupied_count() for lot in motorcycle_lots),
-            "reserved": sum(lot.reserved_count() for lot in motorcycle_lots),
-            "available": sum(lot.available_count() for lot in motorcycle_lots)
-        }
-
-        # Bicycle statistics
-        bicycle_lots = ParkingLot.query.filter_by(vehicle_type='bicycle').all()
-        stats["bicycle"] = {
-            "total": sum(lot.total_capacity for lot in bicycle_lots),
-            "occupied": sum(lot.occupied_count() for lot in bicycle_lots),
-            "reserved": sum(lot.reserved_count() for lot in bicycle_lots),
-            "available": sum(lot.available_count() for lot in bicycle_lots)
-        }
-
-        # Add capacity status for each vehicle type
-        for vehicle_type in stats:
-            if stats[vehicle_type]["total"] > 0:
-                occupied_ratio = stats[vehicle_type]["occupied"] / stats[vehicle_type]["total"]
-                stats[vehicle_type]["capacity_status"] = "High" if occupied_ratio > 0.8 else \
-                                                        "Medium" if occupied_ratio > 0.5 else "Low"
-            else:
-                stats[vehicle_type]["capacity_status"] = "N/A"
-
-
-        print("Successfully fetched and formatted parking status.")
-
-        return jsonify({
-            "success": True,
-            "data": {
-                "slots": response_data,
-                "stats": stats
-            }
-        }), 200
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, status=200, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
         import traceback
@@ -379,8 +280,46 @@ def get_slots_by_vehicle_type():
         return jsonify({"error": f"Server error fetching parking status: {str(e)}"}), 500
     
 
+@parking_bp.route('/parking/occupancy', methods=['GET'])
+def get_occupancy():
+    """
+    Slot states for live dashboards. Pass since=<version>&epoch=<epoch> to get only the
+    deltas after that version (falls back to a full snapshot when too far behind).
+    """
+    try:
+        occupancy.ensure_loaded()
+        since = request.args.get('since', type=int)
+        epoch = request.args.get('epoch')
+        return jsonify({"success": True, "data": occupancy.since(since, epoch)}), 200
+    except Exception as e:
+        print(f"Error fetching occupancy: {e}")
+        return jsonify({"error": f"Server error fetching occupancy: {str(e)}"}), 500
+
+
+def _history_row(row):
+    return {
+        "session_id": str(row.session_id),
+        "plate_number": row.plate_number,
+        "customer_name": f"{row.first_name} {row.last_name}" if row.first_name is not None else "Unknown",
+        "slot_info": f"{row.section}-{row.slot_number}" if row.section is not None else "Unknown",
+        "lot_id": row.lot_id,
+        "start_time": row.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        "end_time": row.end_time.strftime('%Y-%m-%d %H:%M:%S') if row.end_time else None,
+        "duration_minutes": row.duration_minutes,
+        "status": row.status
+    }
+
+
 @parking_bp.route('/parking/history', methods=['GET'])
 def get_parking_history():
+    """
+    Parking sessions newest first, paged by keyset on (start_time, session_id).
+    Query Parameters:
+    - slot_id, lot_id, plate_number, customer_id, start_date, end_date: filters
+    - limit: page size (default 100, max 500)
+    - cursor: next_cursor from the previous page
+    - stream=ndjson: the whole filtered range as newline-delimited JSON instead of a page
+    """
     try:
         # Filter parameters
         slot_id = request.args.get('slot_id')
@@ -390,53 +329,39 @@ def get_parking_history():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # Base query
-        query = db.session.query(ParkingSession)
-        
-        # Apply filters
-        if slot_id:
-            query = query.filter(ParkingSession.slot_id == slot_id)
-        if lot_id:
-            query = query.filter(ParkingSession.lot_id == lot_id)
-        if plate_number:
-            query = query.filter(ParkingSession.plate_number == plate_number)
-        if customer_id:
-            query = query.filter(ParkingSession.customer_id == customer_id)
-        if start_date:
-            start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(ParkingSession.start_time >= start_datetime)
+        start_datetime = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end_datetime = None
         if end_date:
-            end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
-            end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
-            query = query.filter(ParkingSession.start_time <= end_datetime)
-            
-        # Execute query and limit results
-        sessions = query.order_by(ParkingSession.start_time.desc()).limit(100).all()
+            end_datetime = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+        query = history_query(db.session, slot_id, lot_id, plate_number, customer_id,
+                              start_datetime, end_datetime)
+
+        if request.args.get('stream') == 'ndjson':
+            rows = query.order_by(
+                ParkingSession.start_time.desc(), ParkingSession.session_id.desc()
+            ).yield_per(500)
+            lines = (json.dumps(_history_row(row)) + "\n" for row in rows)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
         
-        # Format results
-        results = []
-        for session in sessions:
-            slot = ParkingSlot.query.get(session.slot_id)
-            customer = ParkingCustomer.query.get(session.customer_id)
-            
-            results.append({
-                "session_id": str(session.session_id),
-                "plate_number": session.plate_number,
-                "customer_name": f"{customer.first_name} {customer.last_name}" if customer else "Unknown",
-                "slot_info": f"{slot.section}-{slot.slot_number}" if slot else "Unknown",
-                "lot_id": session.lot_id,
-                "start_time": session.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "end_time": session.end_time.strftime('%Y-%m-%d %H:%M:%S') if session.end_time else None,
-                "duration_minutes": session.duration_minutes,
-                "status": session.status
-            })
+        sessions, next_cursor = keyset_page(
+            query,
+            ParkingSession.start_time,
+            ParkingSession.session_id,
+            cursor=request.args.get('cursor'),
+            limit=page_size(request.args.get('limit'))
+        )
+        results = [_history_row(row) for row in sessions]
         
         return jsonify({
             "success": True,
             "count": len(results),
-            "data": results
+            "data": results,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -579,7 +504,14 @@ def get_registered_customers():
         # Query the database for all registered customers
         # Assuming your ParkingCustomer model has an 'is_registered' column
         # Add a check for the column existence if necessary, though SQLAlchemy should handle it
-        registered_customers = ParkingCustomer.query.filter_by(is_registered=True).all()
+        limit = request.args.get('limit')
+        registered_customers, next_cursor, total_estimate = search_customers(
+            db.session,
+            search=request.args.get('search'),
+            is_registered=True,
+            limit=page_size(limit) if limit else None,
+            cursor=request.args.get('cursor')
+        )
 
         print(f"Found {len(registered_customers)} registered customers.") # Added debug print
 
@@ -622,9 +554,13 @@ def get_registered_customers():
         return jsonify({
             "success": True,
             "count": len(customers_data),
+            "total_estimate": total_estimate,
+            "next_cursor": next_cursor,
             "data": customers_data
         }), 200
 
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         # Log the error for debugging
         print(f"Error fetching registered customers: {e}")
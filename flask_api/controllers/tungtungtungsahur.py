@@ -9,6 +9,11 @@ from models.parking_session import ParkingSession
 from models.customer import ParkingCustomer
 from models.parking_slot import ParkingSlot
 from models.parking_lot import ParkingLot
+from services.lot_counters import lot_counters
+from models.traffic_rollup import TrafficRollup
+from services.traffic_rollup import totals_by, ENTRY, EXIT
+from services.report_engine import build_weekly_report, format_duration
+from services.report_cache import cached_report, ends_before_today
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -37,6 +42,7 @@ def get_date_range(time_period):
     return start_date, end_date
 
 @analytics_bp.route('/weekly-summary', methods=['GET'])
+@cached_report('weekly-summary', is_closed=ends_before_today)
 def weekly_summary():
     """
     Generate a comprehensive weekly summary report suitable for PDF export
@@ -47,459 +53,13 @@ def weekly_summary():
     - end_date: Required end date in YYYY-MM-DD format.
     """
     try:
-        # Parse start and end dates from query parameters
-        start_date_str = request.args.get('start_date')
-        end_date_str = request.args.get('end_date')
-        generated_by = request.args.get('user', 'System')
-        
-        # Validate that both dates are provided
-        if not start_date_str or not end_date_str:
-            return jsonify({'error': 'Both start_date and end_date are required'}), 400
-            
-        # Parse the dates
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0)
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999)
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD'}), 400
-        
-        # Format dates for display
-        start_date_display = start_date.strftime('%B %d, %Y')
-        end_date_display = end_date.strftime('%B %d, %Y')
-        sections_filter = request.args.get("sections", "")
-        sections_included = set(sections_filter.split(",")) if sections_filter else None
-        
-        # Initialize report structure
-        report = {
-            "report_title": f"Parking System Summary Report",
-            "date_range": {
-                "start_date": start_date_str,
-                "end_date": end_date_str,
-                "display_range": f"{start_date_display} - {end_date_display}"
-            },
-            "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
-            "generated_by": generated_by,
-            "sections": []
-        }
-        
-        # -----------------------------------
-        # Section 1: Overall Traffic Summary
-        # -----------------------------------
-        
-        # Query for entries and exits during the selected period
-        total_entries = db.session.query(func.count(VehicleEntry.entry_id)).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        ).scalar()
-        
-        total_exits = db.session.query(func.count(VehicleExit.exit_id)).filter(
-            VehicleExit.exit_time >= start_date,
-            VehicleExit.exit_time <= end_date
-        ).scalar()
-        
-        # Query for entries by vehicle type
-        entries_by_type = db.session.query(
-            VehicleEntry.vehicle_type, 
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        ).group_by(
-            VehicleEntry.vehicle_type
-        ).all()
-        
-        # Calculate average parking duration for the period
-        avg_duration = db.session.query(
-            func.avg(ParkingSession.duration_minutes).label('avg_duration')
-        ).filter(
-            ParkingSession.start_time >= start_date,
-            ParkingSession.start_time <= end_date,
-            ParkingSession.duration_minutes.isnot(None)
-        ).scalar()
-        
-        # Format the average duration
-        avg_duration_formatted = "N/A"
-        if avg_duration:
-            hours = int(avg_duration // 60)
-            minutes = int(avg_duration % 60)
-            avg_duration_formatted = f"{hours}h {minutes}m"
-        
-        # Build the traffic summary section
-        traffic_summary = {
-            "section_title": "Traffic Overview",
-            "total_entries": total_entries,
-            "total_exits": total_exits,
-            "total_traffic": total_entries + total_exits,
-            "vehicle_type_distribution": {vt: count for vt, count in entries_by_type},
-            "average_parking_duration": {
-                "minutes": round(avg_duration) if avg_duration else 0,
-                "formatted": avg_duration_formatted
-            }
-        }
-        
-        if not sections_included or "summary" in sections_included:
-            report["sections"].append(traffic_summary)
-        
-        # -----------------------------------
-        # Section 2: Daily Traffic Breakdown
-        # -----------------------------------
-        
-        # Calculate the number of days in the selected range
-        days_delta = (end_date.date() - start_date.date()).days + 1
-        
-        # Prepare a structure for all days in the selected range
-        days_of_week = []
-        daily_data = {}
-        
-        # Create a list of all dates in the range and initialize data structures
-        for i in range(days_delta):
-            current_date = start_date.date() + timedelta(days=i)
-            day_str = current_date.strftime('%Y-%m-%d')
-            day_name = current_date.strftime('%A')
-            
-            days_of_week.append({
-                'date': day_str,
-                'day_name': day_name
-            })
-            
-            daily_data[day_str] = {
-                'entries': 0,
-                'exits': 0,
-                'day_name': day_name
-            }
-        
-        # Query for entries grouped by date
-        entries_by_date = db.session.query(
-            func.date(VehicleEntry.entry_time).label('date'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        ).group_by('date').all()
-        
-        # Query for exits grouped by date
-        exits_by_date = db.session.query(
-            func.date(VehicleExit.exit_time).label('date'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time >= start_date,
-            VehicleExit.exit_time <= end_date
-        ).group_by('date').all()
-        
-        # Update the entries data
-        for date_obj, count in entries_by_date:
-            date_str = date_obj.strftime('%Y-%m-%d')
-            if date_str in daily_data:
-                daily_data[date_str]['entries'] = count
-        
-        # Update the exits data
-        for date_obj, count in exits_by_date:
-            date_str = date_obj.strftime('%Y-%m-%d')
-            if date_str in daily_data:
-                daily_data[date_str]['exits'] = count
-        
-        # Format the results for the report
-        daily_traffic = []
-        for day_info in days_of_week:
-            date_str = day_info['date']
-            data = daily_data[date_str]
-            daily_traffic.append({
-                'date': date_str,
-                'day_name': day_info['day_name'],
-                'entries': data['entries'],
-                'exits': data['exits'],
-                'total': data['entries'] + data['exits']
-            })
-        
-        # Find the busiest day
-        busiest_day = max(daily_traffic, key=lambda x: x['total']) if daily_traffic else None
-        
-        # Build the daily breakdown section
-        daily_breakdown = {
-            "section_title": "Daily Traffic Breakdown",
-            "daily_data": daily_traffic,
-            "busiest_day": busiest_day
-        }
-        
-        if not sections_included or "daily" in sections_included:
-            report["sections"].append(daily_breakdown)
-        
-        # -----------------------------------
-        # Section 3: Hourly Traffic Patterns
-        # -----------------------------------
-        
-        # Query for hourly entries
-        hourly_entries = db.session.query(
-            extract('hour', VehicleEntry.entry_time).label('hour'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time <= end_date
-        ).group_by('hour').order_by('hour').all()
-        
-        # Query for hourly exits
-        hourly_exits = db.session.query(
-            extract('hour', VehicleExit.exit_time).label('hour'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time >= start_date,
-            VehicleExit.exit_time <= end_date
-        ).group_by('hour').order_by('hour').all()
-        
-        # Format hourly data for all hours of the day (0-23)
-        hourly_traffic = []
-        for hour in range(24):
-            entry_count = next((count for h, count in hourly_entries if int(h) == hour), 0)
-            exit_count = next((count for h, count in hourly_exits if int(h) == hour), 0)
-            
-            hourly_traffic.append({
-                'hour': hour,
-                'hour_display': f"{hour:02d}:00 - {hour:02d}:59",
-                'entries': entry_count,
-                'exits': exit_count,
-                'total': entry_count + exit_count
-            })
-        
-        # Find peak hours
-        peak_entry_hour = max(hourly_traffic, key=lambda x: x['entries']) if hourly_traffic else None
-        peak_exit_hour = max(hourly_traffic, key=lambda x: x['exits']) if hourly_traffic else None
-        
-        # Build the hourly patterns section
-        hourly_patterns = {
-            "section_title": "Hourly Traffic Patterns",
-            "hourly_data": hourly_traffic,
-            "peak_entry_hour": peak_entry_hour,
-            "peak_exit_hour": peak_exit_hour
-        }
-        
-        if not sections_included or "hourly" in sections_included:
-            report["sections"].append(hourly_patterns)
-        
-        # -----------------------------------
-        # Section 4: Parking Slot Utilization
-        # -----------------------------------
-        
-        # Query for total hours of slot usage during the period
-        slot_usage = db.session.query(
-            ParkingSlot.slot_id,
-            ParkingSlot.slot_number,
-            ParkingSlot.section,
-            ParkingLot.name.label('lot_name'),
-            func.sum(ParkingSession.duration_minutes).label('total_minutes')
-        ).join(
-            ParkingSession, ParkingSession.slot_id == ParkingSlot.slot_id
-        ).join(
-            ParkingLot, ParkingLot.lot_id == ParkingSlot.lot_id
-        ).filter(
-            ParkingSession.start_time >= start_date,
-            ParkingSession.start_time <= end_date,
-            ParkingSession.duration_minutes.isnot(None)
-        ).group_by(
-            ParkingSlot.slot_id,
-            ParkingSlot.slot_number,
-            ParkingSlot.section,
-            ParkingLot.name
-        ).order_by(desc('total_minutes')).limit(10).all()
-        
-        # Format the slot usage data
-        top_slots = []
-        for row in slot_usage:
-            minutes = row.total_minutes or 0
-            hours = round(minutes / 60, 2)
-            
-            # Format duration
-            if minutes < 60:
-                formatted_duration = f"{minutes} minutes"
-            else:
-                hours_int = int(minutes // 60)
-                mins_int = int(minutes % 60)
-                formatted_duration = f"{hours_int}h {mins_int}m"
-            
-            top_slots.append({
-                'slot_id': str(row.slot_id),
-                'slot_number': row.slot_number,
-                'section': row.section,
-                'lot_name': row.lot_name,
-                'total_hours': hours,
-                'total_minutes': minutes,
-                'formatted_duration': formatted_duration
-            })
-        
-        # Get section usage statistics
-        section_usage = db.session.query(
-            ParkingSlot.section,
-            ParkingLot.name.label('lot_name'),
-            func.sum(ParkingSession.duration_minutes).label('total_minutes'),
-            func.count(ParkingSession.session_id).label('session_count')
-        ).join(
-            ParkingSession, ParkingSession.slot_id == ParkingSlot.slot_id
-        ).join(
-            ParkingLot, ParkingLot.lot_id == ParkingSlot.lot_id
-        ).filter(
-            ParkingSession.start_time >= start_date,
-            ParkingSession.start_time <= end_date
-        ).group_by(
-            ParkingSlot.section,
-            ParkingLot.name
-        ).order_by(desc('total_minutes')).all()
-        
-        # Format section usage data
-        section_stats = []
-        for row in section_usage:
-            minutes = row.total_minutes or 0
-            hours = round(minutes / 60, 2)
-            
-            section_stats.append({
-                'section': row.section,
-                'lot_name': row.lot_name,
-                'total_hours': hours,
-                'session_count': row.session_count,
-                'formatted_duration': format_duration(minutes)
-            })
-        
-        # Build the slot utilization section
-        slot_utilization = {
-            "section_title": "Parking Slot Utilization",
-            "top_utilized_slots": top_slots,
-            "section_statistics": section_stats
-        }
-        
-        if not sections_included or "utilization" in sections_included:
-            report["sections"].append(slot_utilization)
-        
-        # -----------------------------------
-        # Section 5: Customer Analytics
-        # -----------------------------------
-        
-        # Query for top customers during the period
-        top_customers = db.session.query(
-            ParkingCustomer.customer_id,
-            ParkingCustomer.first_name,
-            ParkingCustomer.last_name,
-            ParkingCustomer.vehicle_type,
-            func.count(ParkingSession.session_id).label('visit_count'),
-            func.sum(ParkingSession.duration_minutes).label('total_minutes')
-        ).join(
-            ParkingSession, ParkingSession.customer_id == ParkingCustomer.customer_id
-        ).filter(
-            ParkingSession.start_time >= start_date,
-            ParkingSession.start_time <= end_date
-        ).group_by(
-            ParkingCustomer.customer_id,
-            ParkingCustomer.first_name,
-            ParkingCustomer.last_name,
-            ParkingCustomer.vehicle_type
-        ).order_by(desc('visit_count')).limit(10).all()
-        
-        # Format top customers data
-        top_customer_data = []
-        for cust in top_customers:
-            minutes = cust.total_minutes or 0
-            
-            top_customer_data.append({
-                'customer_id': str(cust.customer_id),
-                'name': f"{cust.first_name} {cust.last_name}",
-                'vehicle_type': cust.vehicle_type,
-                'visits': cust.visit_count,
-                'total_parking_time': {
-                    'minutes': minutes,
-                    'hours': round(minutes / 60, 2),
-                    'formatted': format_duration(minutes)
-                }
-            })
-        
-        # Query for favorite parking spots of top customers
-        customer_favorite_spots = []
-        
-        for cust in top_customers[:5]:  # Limit to top 5 for report brevity
-            favorite_spots = db.session.query(
-                ParkingSlot.slot_id,
-                ParkingSlot.slot_number,
-                ParkingSlot.section,
-                ParkingLot.name.label('lot_name'),
-                func.count(ParkingSession.session_id).label('usage_count')
-            ).join(
-                ParkingSession, ParkingSession.slot_id == ParkingSlot.slot_id
-            ).join(
-                ParkingLot, ParkingLot.lot_id == ParkingSlot.lot_id
-            ).filter(
-                ParkingSession.customer_id == cust.customer_id,
-                ParkingSession.start_time >= start_date,
-                ParkingSession.start_time <= end_date
-            ).group_by(
-                ParkingSlot.slot_id,
-                ParkingSlot.slot_number,
-                ParkingSlot.section,
-                ParkingLot.name
-            ).order_by(desc('usage_count')).limit(3).all()
-            
-            spots = [
-                {
-                    'slot_number': spot.slot_number,
-                    'section': spot.section,
-                    'lot_name': spot.lot_name,
-                    'usage_count': spot.usage_count
-                } for spot in favorite_spots
-            ]
-            
-            if spots:
-                customer_favorite_spots.append({
-                    'customer_id': str(cust.customer_id),
-                    'name': f"{cust.first_name} {cust.last_name}",
-                    'favorite_spots': spots
-                })
-        
-        # Build the customer analytics section
-        customer_analytics = {
-            "section_title": "Customer Analytics",
-            "top_customers": top_customer_data,
-            "customer_favorite_spots": customer_favorite_spots
-        }
-        
-        if not sections_included or "customers" in sections_included:
-            report["sections"].append(customer_analytics)
-        
-        # -----------------------------------
-        # Section 6: Duration Distribution
-        # -----------------------------------
-        
-        # Set up duration ranges
-        duration_ranges = [
-            ('< 30 min', 0, 30),
-            ('30-60 min', 30, 60),
-            ('1-2 hours', 60, 120),
-            ('2-4 hours', 120, 240),
-            ('4-8 hours', 240, 480),
-            ('> 8 hours', 480, None)
-        ]
-        
-        # Query for duration distribution
-        duration_dist = {}
-        for label, min_val, max_val in duration_ranges:
-            if max_val is None:
-                # For the last range (> 8 hours)
-                count = db.session.query(func.count(ParkingSession.session_id)).filter(
-                    ParkingSession.duration_minutes >= min_val,
-                    ParkingSession.start_time >= start_date,
-                    ParkingSession.start_time <= end_date
-                ).scalar()
-            else:
-                count = db.session.query(func.count(ParkingSession.session_id)).filter(
-                    ParkingSession.duration_minutes >= min_val,
-                    ParkingSession.duration_minutes < max_val,
-                    ParkingSession.start_time >= start_date,
-                    ParkingSession.start_time <= end_date
-                ).scalar()
-            duration_dist[label] = count
-        
-        # Build the duration distribution section
-        duration_analysis = {
-            "section_title": "Parking Duration Analysis",
-            "duration_distribution": duration_dist
-        }
-        
-        if not sections_included or "duration" in sections_included:
-            report["sections"].append(duration_analysis)
+        report = build_weekly_report(
+            db.session,
+            request.args.get('start_date'),
+            request.args.get('end_date'),
+            request.args.get("sections", ""),
+            request.args.get('user', 'System')
+        )
         
         return jsonify(report), 200
         
@@ -549,44 +109,20 @@ def current_week_traffic():
                 'day_name': day_name
             }
         
-        # Query for entries grouped by date
-        entries_by_date = db.session.query(
-            func.date(VehicleEntry.entry_time).label('date'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time < end_date
-        ).group_by('date').all()
-        
-        # Query for exits grouped by date
-        exits_by_date = db.session.query(
-            func.date(VehicleExit.exit_time).label('date'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time >= start_date,
-            VehicleExit.exit_time < end_date
-        ).group_by('date').all()
-        
-        # Query for entries by vehicle type
-        entries_by_type = db.session.query(
-            VehicleEntry.vehicle_type, 
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time >= start_date,
-            VehicleEntry.entry_time < end_date
-        ).group_by(
-            VehicleEntry.vehicle_type
-        ).all()
+        # Daily and per-type counts from the hourly rollup
+        entries_by_date = totals_by(db.session, ENTRY, start_date, end_date, func.date(TrafficRollup.hour_bucket))
+        exits_by_date = totals_by(db.session, EXIT, start_date, end_date, func.date(TrafficRollup.hour_bucket))
+        entries_by_type = totals_by(db.session, ENTRY, start_date, end_date, TrafficRollup.vehicle_type)
         
         # Update the entries data
         for date_obj, count in entries_by_date:
-            date_str = date_obj.strftime('%Y-%m-%d')
+            date_str = str(date_obj)[:10]
             if date_str in daily_data:
                 daily_data[date_str]['entries'] = count
         
         # Update the exits data
         for date_obj, count in exits_by_date:
-            date_str = date_obj.strftime('%Y-%m-%d')
+            date_str = str(date_obj)[:10]
             if date_str in daily_data:
                 daily_data[date_str]['exits'] = count
         
@@ -627,6 +163,7 @@ def current_week_traffic():
 
 # Vehicle Traffic Analytics
 @analytics_bp.route('/traffic/<time_period>', methods=['GET'])
+@cached_report('traffic-period')
 def traffic_analytics(time_period):
     """
     Get vehicle traffic analytics for a specific time period (day, week, month)
@@ -635,44 +172,17 @@ def traffic_analytics(time_period):
     try:
         start_date, end_date = get_date_range(time_period)
         
-        # Query for entries by vehicle type
-        entries_by_type = db.session.query(
-            VehicleEntry.vehicle_type, 
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time.between(start_date, end_date)
-        ).group_by(
-            VehicleEntry.vehicle_type
-        ).all()
-        
-        # Query for exits by vehicle type
-        exits_by_type = db.session.query(
-            VehicleExit.vehicle_type, 
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time.between(start_date, end_date)
-        ).group_by(
-            VehicleExit.vehicle_type
-        ).all()
+        # Entries/exits by vehicle type from the hourly rollup
+        entries_by_type = totals_by(db.session, ENTRY, start_date, end_date, TrafficRollup.vehicle_type)
+        exits_by_type = totals_by(db.session, EXIT, start_date, end_date, TrafficRollup.vehicle_type)
         
         # Format the results
         entries_data = {vt: count for vt, count in entries_by_type}
         exits_data = {vt: count for vt, count in exits_by_type}
         
         # Get hourly breakdown for the time period
-        hourly_entries = db.session.query(
-            extract('hour', VehicleEntry.entry_time).label('hour'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time.between(start_date, end_date)
-        ).group_by('hour').order_by('hour').all()
-        
-        hourly_exits = db.session.query(
-            extract('hour', VehicleExit.exit_time).label('hour'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time.between(start_date, end_date)
-        ).group_by('hour').order_by('hour').all()
+        hourly_entries = totals_by(db.session, ENTRY, start_date, end_date, extract('hour', TrafficRollup.hour_bucket))
+        hourly_exits = totals_by(db.session, EXIT, start_date, end_date, extract('hour', TrafficRollup.hour_bucket))
         
         # Format hourly data
         hourly_data = {
@@ -681,8 +191,8 @@ def traffic_analytics(time_period):
         }
         
         # Get current vehicles in the parking lot
-        current_count = db.session.query(func.count(ParkingSlot.slot_id))\
-            .filter(ParkingSlot.status == 'occupied').scalar()
+        lot_counters.ensure_loaded(db.session)
+        current_count = lot_counters.totals()['occupied']
         
         result = {
             'time_period': time_period,
@@ -718,21 +228,9 @@ def weekly_traffic_pattern():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(weeks=4)
         
-        # Query entries by day of week
-        entries_by_dow = db.session.query(
-            extract('dow', VehicleEntry.entry_time).label('day_of_week'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time.between(start_date, end_date)
-        ).group_by('day_of_week').order_by('day_of_week').all()
-        
-        # Query exits by day of week
-        exits_by_dow = db.session.query(
-            extract('dow', VehicleExit.exit_time).label('day_of_week'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time.between(start_date, end_date)
-        ).group_by('day_of_week').order_by('day_of_week').all()
+        # Entries/exits by day of week from the hourly rollup
+        entries_by_dow = totals_by(db.session, ENTRY, start_date, end_date, extract('dow', TrafficRollup.hour_bucket))
+        exits_by_dow = totals_by(db.session, EXIT, start_date, end_date, extract('dow', TrafficRollup.hour_bucket))
         
         # Convert to day names for better readability
         days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
@@ -765,21 +263,13 @@ def peak_hours():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=30)
         
-        # Query peak entry hours
-        peak_entry_hours = db.session.query(
-            extract('hour', VehicleEntry.entry_time).label('hour'),
-            func.count(VehicleEntry.entry_id).label('count')
-        ).filter(
-            VehicleEntry.entry_time.between(start_date, end_date)
-        ).group_by('hour').order_by(desc('count')).limit(5).all()
-        
-        # Query peak exit hours
-        peak_exit_hours = db.session.query(
-            extract('hour', VehicleExit.exit_time).label('hour'),
-            func.count(VehicleExit.exit_id).label('count')
-        ).filter(
-            VehicleExit.exit_time.between(start_date, end_date)
-        ).group_by('hour').order_by(desc('count')).limit(5).all()
+        # Peak entry/exit hours from the hourly rollup (at most 24 groups, top 5 kept)
+        peak_entry_hours = sorted(
+            totals_by(db.session, ENTRY, start_date, end_date, extract('hour', TrafficRollup.hour_bucket)),
+            key=lambda row: row[1], reverse=True)[:5]
+        peak_exit_hours = sorted(
+            totals_by(db.session, EXIT, start_date, end_date, extract('hour', TrafficRollup.hour_bucket)),
+            key=lambda row: row[1], reverse=True)[:5]
         
         result = {
             'date_range': {
@@ -919,26 +409,16 @@ def occupancy_analytics():
     Get current and historical occupancy statistics for parking lots
     """
     try:
-        # Get current occupancy by lot
-        current_occupancy = db.session.query(
-            ParkingSlot.lot_id,
-            func.count(ParkingSlot.slot_id).label('occupied_count')
-        ).filter(
-            ParkingSlot.status == 'occupied'
-        ).group_by(ParkingSlot.lot_id).all()
-        
-        # Get total capacity by lot
-        total_capacity = db.session.query(
-            ParkingSlot.lot_id,
-            func.count(ParkingSlot.slot_id).label('total_count')
-        ).filter(
-            ParkingSlot.is_active == True
-        ).group_by(ParkingSlot.lot_id).all()
+        # Current occupancy by lot, from the incrementally maintained counters
+        lot_counters.ensure_loaded(db.session)
         
         # Calculate occupancy percentages
         occupancy_data = {}
-        for lot_id, total in total_capacity:
-            occupied = next((count for lid, count in current_occupancy if lid == lot_id), 0)
+        for lot_id, counts in lot_counters.all().items():
+            total = counts['active']
+            if total == 0:
+                continue
+            occupied = counts['occupied']
             occupancy_data[lot_id] = {
                 'total_slots': total,
                 'occupied_slots': occupied,
@@ -1199,19 +679,3 @@ def top_parking_spots_by_duration():
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
-
-# Helper function to format duration in a human-readable way
-def format_duration(minutes):
-    """
-    Format minutes into human-readable duration
-    """
-    if minutes < 60:
-        return f"{minutes} min"
-    elif minutes < 60 * 24:
-        hours = minutes // 60
-        mins = minutes % 60
-        return f"{hours}h {mins}m"
-    else:
-        days = minutes // (60 * 24)
-        hours = (minutes % (60 * 24)) // 60
-        return f"{days}d {hours}h"
\ No newline at end of file
@@ -1,25 +1,183 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 import os
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 
 load_dotenv()
 db = SQLAlchemy()
 
+# One pool for the whole process (web requests, detection pipelines, background work)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 20))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+
+ENGINE_OPTIONS = {
+    'pool_size': DB_POOL_SIZE,
+    'pool_recycle': 1800,  # Recycle connections after 30 minutes
+    'pool_pre_ping': True,  # Enable connection health checks
+    'pool_timeout': 30,  # 30 seconds timeout
+    'max_overflow': DB_MAX_OVERFLOW,
+    'echo': False
+}
+
+# How many pooled connections each non-web subsystem may hold at once.
+# Whatever is left over stays reserved for web requests.
+POOL_BUDGETS = {
+    'detection': int(os.getenv('DB_POOL_BUDGET_DETECTION', 6)),
+    'background': int(os.getenv('DB_POOL_BUDGET_BACKGROUND', 4)),
+}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+class _PoolBudget:
+    """
+    Caps concurrent threads holding sessions for one subsystem and records how often
+    it had to wait. Re-entrant per thread, so a nested session (e.g. slot assignment
+    inside entry upload) never deadlocks against its own caller.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.in_use = 0
+        self.peak = 0
+        self.acquired = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def acquire(self, timeout):
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            self._local.depth = depth + 1
+            return
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.waits += 1
+            if not self._semaphore.acquire(timeout=timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"DB pool budget for '{self.name}' exhausted ({self.limit} connections)")
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.peak = max(self.peak, self.in_use)
+        self._local.depth = 1
+
+    def release(self):
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        with self._lock:
+            self.in_use -= 1
+        self._semaphore.release()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_use': self.in_use,
+                'peak': self.peak,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'timeouts': self.timeouts
+            }
+
+
+_budgets = {name: _PoolBudget(name, limit) for name, limit in POOL_BUDGETS.items()}
+
+_pool_stats_lock = threading.Lock()
+_pool_stats = {
+    'connections_opened': 0,
+    'checkouts': 0,
+    'checked_out': 0,
+    'peak_checked_out': 0,
+}
+
+
+def _on_connect(dbapi_connection, connection_record):
+    with _pool_stats_lock:
+        _pool_stats['connections_opened'] += 1
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _pool_stats_lock:
+        _pool_stats['checkouts'] += 1
+        _pool_stats['checked_out'] += 1
+        _pool_stats['peak_checked_out'] = max(_pool_stats['peak_checked_out'], _pool_stats['checked_out'])
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    with _pool_stats_lock:
+        _pool_stats['checked_out'] = max(0, _pool_stats['checked_out'] - 1)
+
+
+def _set_engine(engine):
+    global _engine
+    _engine = engine
+    event.listen(engine, 'connect', _on_connect)
+    event.listen(engine, 'checkout', _on_checkout)
+    event.listen(engine, 'checkin', _on_checkin)
+
+
 def init_db(app):
     # Use your Supabase DATABASE_URL environment variable
     DATABASE_URL = os.getenv('DATABASE_URL')
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-    # Updated engine options for better connection pooling
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_size': 20,  # Increased pool size
-        'pool_recycle': 1800,  # Recycle connections after 30 minutes
-        'pool_pre_ping': True,  # Enable connection health checks
-        'pool_timeout': 30,  # 30 seconds timeout
-        'max_overflow': 10,  # Allow up to 10 additional connections
-        'echo': False
-    }
+    # Single pool shared with the detection pipelines (see get_engine)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ENGINE_OPTIONS
 
     db.init_app(app)
+
+    # Detection and background work reuse Flask-SQLAlchemy's engine instead of opening their own pools
+    with _engine_lock:
+        with app.app_context():
+            _set_engine(db.engine)
+
+
+def get_engine():
+    """The process-wide engine; standalone scripts without a Flask app get one lazily"""
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _set_engine(create_engine(os.getenv('DATABASE_URL'), **ENGINE_OPTIONS))
+    return _engine
+
+
+@contextmanager
+def session_scope(subsystem='detection'):
+    """
+    Session on the shared engine for code running outside a Flask request.
+    Blocks (up to pool_timeout) while the subsystem is at its connection budget.
+    """
+    budget = _budgets[subsystem]
+    budget.acquire(timeout=ENGINE_OPTIONS['pool_timeout'])
+    try:
+        with Session(get_engine()) as session:
+            yield session
+    finally:
+        budget.release()
+
+
+def pool_metrics():
+    """Snapshot of pool usage and per-subsystem budgets"""
+    engine = _engine
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats['pool_size'] = DB_POOL_SIZE
+    stats['max_overflow'] = DB_MAX_OVERFLOW
+    stats['pool_status'] = engine.pool.status() if engine is not None else None
+    stats['budgets'] = {name: budget.to_dict() for name, budget in _budgets.items()}
+    stats['budgets']['web'] = {
+        'limit': DB_POOL_SIZE + DB_MAX_OVERFLOW - sum(POOL_BUDGETS.values())
+    }
+    return stats
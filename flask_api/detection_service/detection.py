@@ -15,9 +15,7 @@ import re
 import os
 import base64
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from db.db import db
+from db.db import db, get_engine, session_scope
 from supabase import create_client, Client
 import subprocess
 # Import models
@@ -26,6 +24,10 @@ from models.vehicle_exit import VehicleExit
 from models.customer import ParkingCustomer
 from models.guards import Guard
 from models.parking_session import ParkingSession
+from detection_service.plate_index import plate_index
+from detection_service.session_index import session_index, complete_session, latest_entry_query
+from services.slot_allocator import slot_allocator
+from services.event_bus import event_bus, publish_on_commit, ENTRY_CREATED, EXIT_CREATED
 
 # Load environment variables
 load_dotenv()
@@ -68,8 +70,8 @@ class VideoProcessor:
         self.previous_centers = {}  # Store previous centers for each track ID
         self.logged_lost_ids = set()
         
-        # Create SQLAlchemy engine for when we need a session outside Flask context
-        self.engine = create_engine(DATABASE_URL)
+        # Shared engine for when we need a session outside Flask context (one pool per process)
+        self.engine = get_engine()
         self.active_guard_id = None
 
     def set_active_guard(self, guard_id):
@@ -81,7 +83,7 @@ class VideoProcessor:
             
         try:
             # Verify the guard exists
-            with Session(self.engine) as session:
+            with session_scope('detection') as session:
                 guard = session.query(Guard).filter_by(guard_id=guard_id).first()
                 if not guard:
                     print(f"❌ Guard with ID {guard_id} not found.")
@@ -143,31 +145,18 @@ class VideoProcessor:
         return None
     
     def assign_bicycle(self, entry_id, customer_id, plate_number, entry_time):
-        from models.parking_slot import ParkingSlot
-        from models.parking_session import ParkingSession
-
-        with Session(self.engine) as session:
-            # Search for available slot in 'bike area left'
-            slot = session.query(ParkingSlot)\
-                .filter_by(section="bike area left", vehicle_type="bicycle", status="available", is_active=True)\
-                .order_by(ParkingSlot.slot_number.asc())\
-                .first()
-
-            # If none, try 'bike area right'
-            if not slot:
-                slot = session.query(ParkingSlot)\
-                    .filter_by(section="bike area right", vehicle_type="bicycle", status="available", is_active=True)\
-                    .order_by(ParkingSlot.slot_number.asc())\
-                    .first()
-
-            if not slot:
-                print("❌ No available bicycle slots in either section.")
-                return
+
+        with session_scope('detection') as session:
+            slot_allocator.ensure_loaded(session)
 
             try:
-                # Assign slot
-                slot.status = "occupied"
-                slot.current_vehicle_id = entry_id
+                # Claim the first free slot in 'bike area left', then 'bike area right'
+                slot = slot_allocator.claim(session, ["bike area left", "bike area right"], "bicycle", entry_id)
+
+                if not slot:
+                    print("❌ No available bicycle slots in either section.")
+                    session.rollback()
+                    return
 
                 # Create parking session
                 session_entry = ParkingSession(
@@ -186,25 +175,20 @@ class VideoProcessor:
             except Exception as e:
                 session.rollback()
                 print(f"❌ Failed to assign bicycle: {e}")
+
     def assign_motorcycle(self, entry_id, customer_id, plate_number, entry_time):
-        from models.parking_slot import ParkingSlot
-        from models.parking_session import ParkingSession
-
-        with Session(self.engine) as session:
-            # Find available motorcycle slot in elevated parking
-            slot = session.query(ParkingSlot)\
-                .filter_by(section="elevated parking", vehicle_type="motorcycle", status="available", is_active=True)\
-                .order_by(ParkingSlot.slot_number.asc())\
-                .first()
-
-            if not slot:
-                print("❌ No available motorcycle slots in elevated parking.")
-                return
+
+        with session_scope('detection') as session:
+            slot_allocator.ensure_loaded(session)
 
             try:
-                # Assign slot
-                slot.status = "occupied"
-                slot.current_vehicle_id = entry_id
+                # Claim a free motorcycle slot in elevated parking
+                slot = slot_allocator.claim(session, ["elevated parking"], "motorcycle", entry_id)
+
+                if not slot:
+                    print("❌ No available motorcycle slots in elevated parking.")
+                    session.rollback()
+                    return
 
                 # Create parking session
                 session_entry = ParkingSession(
@@ -250,10 +234,15 @@ class VideoProcessor:
             print(f"✅ Screenshot uploaded: {public_url}")
 
             # Create a SQLAlchemy session and add vehicle entry record
-            with Session(self.engine) as session:
-                # First, check if this plate exists in the customer table
-                customer = session.query(ParkingCustomer).filter_by(plate_number=plate_text).first()
-                
+            with session_scope('detection') as session:
+                # First, resolve the read against known customers (tolerates small OCR misreads)
+                plate_index.ensure_loaded(session)
+                match = plate_index.match_customer(plate_text)
+                if match and match.plate_number != plate_text:
+                    print(f"🔎 Plate read {plate_text} resolved to known customer {match.plate_number} (distance {match.distance})")
+                    plate_text = match.plate_number
+                customer = match
+
                 if not customer:
                     # Create a temporary customer record with minimal information
                     new_customer = ParkingCustomer(
@@ -308,12 +297,18 @@ class VideoProcessor:
                         "guard_id": str(self.active_guard_id) if self.active_guard_id else None,
                         "status": entry_status
                     })
-                    try:
-                        import requests
-                        requests.get("http://localhost:5000/api/unassigned-vehicles")
-                        print("📣 Triggered /api/unassigned-vehicles")
-                    except Exception as e:
-                        print(f"❌ Failed to notify unassigned vehicles: {e}")
+                    # ✅ Let the SSE/socket layers push the new entry to clients
+                    event_bus.publish(ENTRY_CREATED, {
+                        "entry_id": entry.entry_id,
+                        "plate_number": plate_text,
+                        "entry_time": entry.entry_time,
+                        "vehicle_type": vehicle_type,
+                        "hex_color": hex_color,
+                        "customer_id": customer_id,
+                        "guard_id": self.active_guard_id,
+                        "image_url": public_url,
+                        "status": entry_status
+                    })
 
                 except Exception as e:
                     session.rollback()
@@ -323,38 +318,27 @@ class VideoProcessor:
             print(f"❌ Exception in upload_vehicle_entry: {e}")
     
     def auto_release_slot(self, plate_number, exit_time_str):
-        from models.parking_session import ParkingSession
-        from models.parking_slot import ParkingSlot
-        from models.vehicle_exit import VehicleExit
-
         try:
-            with Session(self.engine) as session:
-                # Get the latest active session for this plate
-                session_record = session.query(ParkingSession)\
-                    .filter_by(plate_number=plate_number, status='active', exit_id=None)\
-                    .order_by(ParkingSession.start_time.desc())\
-                    .first()
-
-                if not session_record:
+            with session_scope('detection') as session:
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                plate_number = plate_index.resolve(plate_number)
+
+                # Get the active session for this plate from the index
+                active = session_index.get(plate_number)
+                if not active:
                     print(f"⚠️ No active session found for auto-exit of {plate_number}")
                     return
 
-                # Mark slot as available
-                slot = session_record.slot
-                if slot:
-                    slot.status = 'available'
-                    slot.current_vehicle_id = None
-
-                # Calculate session end and duration
+                # Close the session and free the slot in one transaction
                 exit_time = datetime.strptime(exit_time_str, "%Y-%m-%d %H:%M:%S")
-                session_record.end_time = exit_time
-                session_record.status = 'completed'
-                if session_record.start_time:
-                    duration = exit_time - session_record.start_time
-                    session_record.duration_minutes = int(duration.total_seconds() // 60)
-
+                completed, duration_minutes = complete_session(session, active, exit_time)
                 session.commit()
-                print(f"✅ Auto-unassigned slot {slot.slot_number} for {plate_number} (Duration: {session_record.duration_minutes} mins)")
+
+                if not completed:
+                    print(f"⚠️ Session for {plate_number} was already closed")
+                    return
+                print(f"✅ Auto-unassigned slot {active.slot_id} for {plate_number} (Duration: {duration_minutes} mins)")
 
         except Exception as e:
             print(f"❌ Failed to auto-release slot: {e}")
@@ -381,30 +365,36 @@ class VideoProcessor:
             print(f"✅ Screenshot uploaded: {public_url}")
 
             # Create a SQLAlchemy session
-            with Session(self.engine) as session:
-                # Find the latest matching vehicle entry
-                entry = session.query(VehicleEntry)\
-                    .filter(VehicleEntry.plate_number == plate_text)\
-                    .filter(VehicleEntry.entry_time <= datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S"))\
-                    .order_by(VehicleEntry.entry_time.desc())\
-                    .first()
-
-                if not entry:
-                    print(f"❌ No matching entry found for plate {plate_text} before {exit_time}")
-                    return
+            with session_scope('detection') as session:
+                # Snap the read onto an open session / known plate before matching
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                plate_text = plate_index.resolve(plate_text)
+                exit_dt = datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S")
+
+                # Open session for this plate (a dictionary lookup, no queries)
+                active = session_index.get(plate_text)
+
+                if not active:
+                    # No slot was ever assigned (e.g. unassigned car); still require a prior entry
+                    entry = latest_entry_query(session, plate_text, exit_dt).first()
+
+                    if not entry:
+                        print(f"❌ No matching entry found for plate {plate_text} before {exit_time}")
+                        return
 
                 # Find the corresponding customer
-                customer = session.query(ParkingCustomer)\
-                    .filter_by(plate_number=plate_text)\
-                    .first()
-
-                customer_id = customer.customer_id if customer else None
+                if active:
+                    customer_id = active.customer_id
+                else:
+                    customer = plate_index.match_customer(plate_text, max_distance=0)
+                    customer_id = customer.customer_id if customer else None
 
                 # Create a new VehicleExit record
                 exit_record = VehicleExit(
                     exit_id=str(uuid.uuid4()),
                     plate_number=plate_text,
-                    exit_time=datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S"),
+                    exit_time=exit_dt,
                     image_url=public_url,
                     guard_id=self.active_guard_id,  # Assuming self.active_guard_id exists
                     customer_id=customer_id,
@@ -414,50 +404,32 @@ class VideoProcessor:
                 )
 
                 try:
+                    # ✅ Exit record, session completion and slot release in a single transaction
                     session.add(exit_record)
+                    session.flush()
+                    completed = False
+                    duration_minutes = None
+                    if active:
+                        completed, duration_minutes = complete_session(
+                            session, active, exit_dt, exit_id=exit_record.exit_id)
+                    publish_on_commit(session, EXIT_CREATED, {
+                        "exit_id": exit_record.exit_id,
+                        "plate_number": plate_text,
+                        "exit_time": exit_dt,
+                        "customer_id": customer_id,
+                        "vehicle_type": vehicle_type,
+                        "session_id": active.session_id if completed else None,
+                        "slot_id": active.slot_id if completed else None,
+                        "lot_id": active.lot_id if completed else None,
+                        "duration_minutes": duration_minutes
+                    })
                     session.commit()
                     print("✅ Exit inserted into database")
-                    # ✅ Update parking session and slot status
-                    try:
-                        # Find active parking session matching the entry
-                        session_record = session.query(ParkingSession)\
-                            .filter_by(entry_id=entry.entry_id, status='active', exit_id=None)\
-                            .order_by(ParkingSession.start_time.desc())\
-                            .first()
-
-                        if session_record:
-                            session_record.exit_id = exit_record.exit_id
-                            session_record.end_time = exit_record.exit_time
-                            session_record.status = 'completed'
-                            
-
-                            # ✅ Calculate duration in minutes
-                            if session_record.end_time and session_record.start_time:
-                                duration = session_record.end_time - session_record.start_time
-                                session_record.duration_minutes = int(duration.total_seconds() // 60)
-
-                            # ✅ Mark the assigned slot as available & unlink current_vehicle_id
-                            slot = session_record.slot
-                            if slot:
-                                slot.status = 'available'
-                                slot.current_vehicle_id = None
-                            session.commit()
-                            print(f"✅ Parking session completed for plate {plate_text}")
-                        else:
-                            print(f"⚠️ No active session found for plate {plate_text}")
-
-                    except Exception as e:
-                        session.rollback()
-                        print(f"❌ Failed to update parking session: {e}")
-
-                    # ✅ Trigger parking status update
-                    try:
-                        import requests
-                        requests.get("http://localhost:5000/parking/get-parking-status")
-                        print("📣 Triggered /parking/get-parking-status")
-                    except Exception as e:
-                        print(f"❌ Failed to notify parking status: {e}")
 
+                    if completed:
+                        print(f"✅ Parking session completed for plate {plate_text} (Duration: {duration_minutes} mins)")
+                    else:
+                        print(f"⚠️ No active session found for plate {plate_text}")
 
                     self.socketio.emit("new_vehicle_exit", {
                         "exit_id": str(exit_record.exit_id),
@@ -880,6 +852,15 @@ class VideoProcessor:
         if not hasattr(self, 'model') or self.model is None:
             self.model = YOLO(self.model_path)  # or self.model_path if you've saved it
 
+        # Warm the plate index before the first detection needs it
+        try:
+            with session_scope('detection') as session:
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                slot_allocator.reconcile(session)
+        except Exception as e:
+            print(f"⚠️ Failed to load plate/session/slot indexes: {e}")
+
 
         is_rtsp = self.video_path.startswith("rtsp://")
         self.ffmpeg_process = None
@@ -999,8 +980,8 @@ class EntryVideoProcessor:
         self.detection_history = {}
         self.logged_lost_ids = set()
         
-        # Create SQLAlchemy engine for when we need a session outside Flask context
-        self.engine = create_engine(DATABASE_URL)
+        # Shared engine for when we need a session outside Flask context (one pool per process)
+        self.engine = get_engine()
         self.active_guard_id = None
         self.has_captured_big_frame = False
 
@@ -1015,7 +996,7 @@ class EntryVideoProcessor:
             
         try:
             # Verify the guard exists
-            with Session(self.engine) as session:
+            with session_scope('detection') as session:
                 guard = session.query(Guard).filter_by(guard_id=guard_id).first()
                 if not guard:
                     print(f"❌ Guard with ID {guard_id} not found.")
@@ -1078,31 +1059,18 @@ class EntryVideoProcessor:
         return None
     
     def assign_bicycle(self, entry_id, customer_id, plate_number, entry_time):
-        from models.parking_slot import ParkingSlot
-        from models.parking_session import ParkingSession
-
-        with Session(self.engine) as session:
-            # Search for available slot in 'bike area left'
-            slot = session.query(ParkingSlot)\
-                .filter_by(section="bike area left", vehicle_type="bicycle", status="available", is_active=True)\
-                .order_by(ParkingSlot.slot_number.asc())\
-                .first()
-
-            # If none, try 'bike area right'
-            if not slot:
-                slot = session.query(ParkingSlot)\
-                    .filter_by(section="bike area right", vehicle_type="bicycle", status="available", is_active=True)\
-                    .order_by(ParkingSlot.slot_number.asc())\
-                    .first()
-
-            if not slot:
-                print("❌ No available bicycle slots in either section.")
-                return
+
+        with session_scope('detection') as session:
+            slot_allocator.ensure_loaded(session)
 
             try:
-                # Assign slot
-                slot.status = "occupied"
-                slot.current_vehicle_id = entry_id
+                # Claim the first free slot in 'bike area left', then 'bike area right'
+                slot = slot_allocator.claim(session, ["bike area left", "bike area right"], "bicycle", entry_id)
+
+                if not slot:
+                    print("❌ No available bicycle slots in either section.")
+                    session.rollback()
+                    return
 
                 # Create parking session
                 session_entry = ParkingSession(
@@ -1121,25 +1089,20 @@ class EntryVideoProcessor:
             except Exception as e:
                 session.rollback()
                 print(f"❌ Failed to assign bicycle: {e}")
+
     def assign_motorcycle(self, entry_id, customer_id, plate_number, entry_time):
-        from models.parking_slot import ParkingSlot
-        from models.parking_session import ParkingSession
-
-        with Session(self.engine) as session:
-            # Find available motorcycle slot in elevated parking
-            slot = session.query(ParkingSlot)\
-                .filter_by(section="elevated parking", vehicle_type="motorcycle", status="available", is_active=True)\
-                .order_by(ParkingSlot.slot_number.asc())\
-                .first()
-
-            if not slot:
-                print("❌ No available motorcycle slots in elevated parking.")
-                return
+
+        with session_scope('detection') as session:
+            slot_allocator.ensure_loaded(session)
 
             try:
-                # Assign slot
-                slot.status = "occupied"
-                slot.current_vehicle_id = entry_id
+                # Claim a free motorcycle slot in elevated parking
+                slot = slot_allocator.claim(session, ["elevated parking"], "motorcycle", entry_id)
+
+                if not slot:
+                    print("❌ No available motorcycle slots in elevated parking.")
+                    session.rollback()
+                    return
 
                 # Create parking session
                 session_entry = ParkingSession(
@@ -1181,10 +1144,15 @@ class EntryVideoProcessor:
             print(f"✅ Screenshot uploaded: {public_url}")
 
             # Create a SQLAlchemy session and add vehicle entry record
-            with Session(self.engine) as session:
-                # First, check if this plate exists in the customer table
-                customer = session.query(ParkingCustomer).filter_by(plate_number=plate_text).first()
-                
+            with session_scope('detection') as session:
+                # First, resolve the read against known customers (tolerates small OCR misreads)
+                plate_index.ensure_loaded(session)
+                match = plate_index.match_customer(plate_text)
+                if match and match.plate_number != plate_text:
+                    print(f"🔎 Plate read {plate_text} resolved to known customer {match.plate_number} (distance {match.distance})")
+                    plate_text = match.plate_number
+                customer = match
+
                 if not customer:
                     # Create a temporary customer record with minimal information
                     new_customer = ParkingCustomer(
@@ -1239,12 +1207,18 @@ class EntryVideoProcessor:
                         "guard_id": str(self.active_guard_id) if self.active_guard_id else None,
                         "status": entry_status
                     })
-                    try:
-                        import requests
-                        requests.get("http://localhost:5000/api/unassigned-vehicles")
-                        print("📣 Triggered /api/unassigned-vehicles")
-                    except Exception as e:
-                        print(f"❌ Failed to notify unassigned vehicles: {e}")
+                    # ✅ Let the SSE/socket layers push the new entry to clients
+                    event_bus.publish(ENTRY_CREATED, {
+                        "entry_id": entry.entry_id,
+                        "plate_number": plate_text,
+                        "entry_time": entry.entry_time,
+                        "vehicle_type": vehicle_type,
+                        "hex_color": hex_color,
+                        "customer_id": customer_id,
+                        "guard_id": self.active_guard_id,
+                        "image_url": public_url,
+                        "status": entry_status
+                    })
 
                 except Exception as e:
                     session.rollback()
@@ -1253,38 +1227,27 @@ class EntryVideoProcessor:
         except Exception as e:
             print(f"❌ Exception in upload_vehicle_entry: {e}")
     def auto_release_slot(self, plate_number, exit_time_str):
-        from models.parking_session import ParkingSession
-        from models.parking_slot import ParkingSlot
-        from models.vehicle_exit import VehicleExit
-
         try:
-            with Session(self.engine) as session:
-                # Get the latest active session for this plate
-                session_record = session.query(ParkingSession)\
-                    .filter_by(plate_number=plate_number, status='active', exit_id=None)\
-                    .order_by(ParkingSession.start_time.desc())\
-                    .first()
-
-                if not session_record:
+            with session_scope('detection') as session:
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                plate_number = plate_index.resolve(plate_number)
+
+                # Get the active session for this plate from the index
+                active = session_index.get(plate_number)
+                if not active:
                     print(f"⚠️ No active session found for auto-exit of {plate_number}")
                     return
 
-                # Mark slot as available
-                slot = session_record.slot
-                if slot:
-                    slot.status = 'available'
-                    slot.current_vehicle_id = None
-
-                # Calculate session end and duration
+                # Close the session and free the slot in one transaction
                 exit_time = datetime.strptime(exit_time_str, "%Y-%m-%d %H:%M:%S")
-                session_record.end_time = exit_time
-                session_record.status = 'completed'
-                if session_record.start_time:
-                    duration = exit_time - session_record.start_time
-                    session_record.duration_minutes = int(duration.total_seconds() // 60)
-
+                completed, duration_minutes = complete_session(session, active, exit_time)
                 session.commit()
-                print(f"✅ Auto-unassigned slot {slot.slot_number} for {plate_number} (Duration: {session_record.duration_minutes} mins)")
+
+                if not completed:
+                    print(f"⚠️ Session for {plate_number} was already closed")
+                    return
+                print(f"✅ Auto-unassigned slot {active.slot_id} for {plate_number} (Duration: {duration_minutes} mins)")
 
         except Exception as e:
             print(f"❌ Failed to auto-release slot: {e}")
@@ -1311,30 +1274,36 @@ class EntryVideoProcessor:
             print(f"✅ Screenshot uploaded: {public_url}")
 
             # Create a SQLAlchemy session
-            with Session(self.engine) as session:
-                # Find the latest matching vehicle entry
-                entry = session.query(VehicleEntry)\
-                    .filter(VehicleEntry.plate_number == plate_text)\
-                    .filter(VehicleEntry.entry_time <= datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S"))\
-                    .order_by(VehicleEntry.entry_time.desc())\
-                    .first()
-
-                if not entry:
-                    print(f"❌ No matching entry found for plate {plate_text} before {exit_time}")
-                    return
+            with session_scope('detection') as session:
+                # Snap the read onto an open session / known plate before matching
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                plate_text = plate_index.resolve(plate_text)
+                exit_dt = datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S")
+
+                # Open session for this plate (a dictionary lookup, no queries)
+                active = session_index.get(plate_text)
+
+                if not active:
+                    # No slot was ever assigned (e.g. unassigned car); still require a prior entry
+                    entry = latest_entry_query(session, plate_text, exit_dt).first()
+
+                    if not entry:
+                        print(f"❌ No matching entry found for plate {plate_text} before {exit_time}")
+                        return
 
                 # Find the corresponding customer
-                customer = session.query(ParkingCustomer)\
-                    .filter_by(plate_number=plate_text)\
-                    .first()
-
-                customer_id = customer.customer_id if customer else None
+                if active:
+                    customer_id = active.customer_id
+                else:
+                    customer = plate_index.match_customer(plate_text, max_distance=0)
+                    customer_id = customer.customer_id if customer else None
 
                 # Create a new VehicleExit record
                 exit_record = VehicleExit(
                     exit_id=str(uuid.uuid4()),
                     plate_number=plate_text,
-                    exit_time=datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S"),
+                    exit_time=exit_dt,
                     image_url=public_url,
                     guard_id=self.active_guard_id,  # Assuming self.active_guard_id exists
                     customer_id=customer_id,
@@ -1344,49 +1313,32 @@ class EntryVideoProcessor:
                 )
 
                 try:
+                    # ✅ Exit record, session completion and slot release in a single transaction
                     session.add(exit_record)
+                    session.flush()
+                    completed = False
+                    duration_minutes = None
+                    if active:
+                        completed, duration_minutes = complete_session(
+                            session, active, exit_dt, exit_id=exit_record.exit_id)
+                    publish_on_commit(session, EXIT_CREATED, {
+                        "exit_id": exit_record.exit_id,
+                        "plate_number": plate_text,
+                        "exit_time": exit_dt,
+                        "customer_id": customer_id,
+                        "vehicle_type": vehicle_type,
+                        "session_id": active.session_id if completed else None,
+                        "slot_id": active.slot_id if completed else None,
+                        "lot_id": active.lot_id if completed else None,
+                        "duration_minutes": duration_minutes
+                    })
                     session.commit()
                     print("✅ Exit inserted into database")
-                    # ✅ Update parking session and slot status
-                    try:
-                        # Find active parking session matching the entry
-                        session_record = session.query(ParkingSession)\
-                            .filter_by(entry_id=entry.entry_id, status='active', exit_id=None)\
-                            .order_by(ParkingSession.start_time.desc())\
-                            .first()
-
-                        if session_record:
-                            session_record.exit_id = exit_record.exit_id
-                            session_record.end_time = exit_record.exit_time
-                            session_record.status = 'completed'
-
-                            # ✅ Calculate duration in minutes
-                            if session_record.end_time and session_record.start_time:
-                                duration = session_record.end_time - session_record.start_time
-                                session_record.duration_minutes = int(duration.total_seconds() // 60)
-
-                            # ✅ Mark the assigned slot as available & unlink current_vehicle_id
-                            slot = session_record.slot
-                            if slot:
-                                slot.status = 'available'
-                                slot.current_vehicle_id = None
-                            session.commit()
-                            print(f"✅ Parking session completed for plate {plate_text}")
-                        else:
-                            print(f"⚠️ No active session found for plate {plate_text}")
-
-                    except Exception as e:
-                        session.rollback()
-                        print(f"❌ Failed to update parking session: {e}")
-
-                    # ✅ Trigger parking status update
-                    try:
-                        import requests
-                        requests.get("http://localhost:5000/parking/get-parking-status")
-                        print("📣 Triggered /parking/get-parking-status")
-                    except Exception as e:
-                        print(f"❌ Failed to notify parking status: {e}")
 
+                    if completed:
+                        print(f"✅ Parking session completed for plate {plate_text} (Duration: {duration_minutes} mins)")
+                    else:
+                        print(f"⚠️ No active session found for plate {plate_text}")
 
                     self.socketio.emit("new_vehicle_exit", {
                         "exit_id": str(exit_record.exit_id),
@@ -1406,6 +1358,8 @@ class EntryVideoProcessor:
         except Exception as e:
             print(f"❌ Exception in upload_vehicle_exit: {e}")
 
+
+
     def process_frame(self, frame, size=None):
         self.is_exit_camera = False
         filtered_boxes = []
@@ -1842,6 +1796,15 @@ class EntryVideoProcessor:
         if self.ocr is None:
             self.ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False)
 
+        # Warm the plate index before the first detection needs it
+        try:
+            with session_scope('detection') as session:
+                plate_index.ensure_loaded(session)
+                session_index.ensure_loaded(session)
+                slot_allocator.reconcile(session)
+        except Exception as e:
+            print(f"⚠️ Failed to load plate/session/slot indexes: {e}")
+
         is_rtsp = isinstance(self.video_path, str) and self.video_path.startswith("rtsp://")
         self.ffmpeg_process = None
 
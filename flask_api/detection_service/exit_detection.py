@@ -16,8 +16,7 @@ import re
 import os
 import base64
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+from db.db import get_engine, session_scope
 
 # Import models
 from models.vehicle_exit import VehicleExit
@@ -25,6 +24,7 @@ from models.customer import ParkingCustomer
 from models.parking_session import ParkingSession
 from models.parking_slot import ParkingSlot
 from models.guards import Guard
+from detection_service.plate_index import plate_index
 
 # Load environment variables
 load_dotenv()
@@ -66,8 +66,8 @@ class ExitDetection:
         self.detection_history = {}
         self.logged_lost_ids = set()
         
-        # Create SQLAlchemy engine for when we need a session outside Flask context
-        self.engine = create_engine(DATABASE_URL)
+        # Shared engine for when we need a session outside Flask context (one pool per process)
+        self.engine = get_engine()
         self.active_guard_id = None
 
     def set_active_guard(self, guard_id):
@@ -79,7 +79,7 @@ class ExitDetection:
             
         try:
             # Verify the guard exists
-            with Session(self.engine) as session:
+            with session_scope('detection') as session:
                 guard = session.query(Guard).filter_by(guard_id=guard_id).first()
                 if not guard:
                     print(f"❌ Guard with ID {guard_id} not found.")
@@ -153,7 +153,11 @@ class ExitDetection:
             print(f"✅ Exit screenshot uploaded: {public_url}")
 
             # Create a SQLAlchemy session and process the exit
-            with Session(self.engine) as session:
+            with session_scope('detection') as session:
+                # Snap the read onto an open session / known plate (tolerates small OCR misreads)
+                plate_index.ensure_loaded(session)
+                plate_text = plate_index.resolve(plate_text)
+
                 # Find the customer by plate number
                 customer = session.query(ParkingCustomer).filter_by(plate_number=plate_text).first()
                 if not customer:
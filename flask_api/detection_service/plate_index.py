@@ -0,0 +1,249 @@
+import os
+import re
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.customer import ParkingCustomer
+from models.parking_session import ParkingSession
+
+# How many OCR character errors we tolerate when resolving a read to a known plate
+PLATE_MATCH_MAX_DISTANCE = int(os.getenv("PLATE_MATCH_MAX_DISTANCE", 1))
+
+# Reads shorter than this are too ambiguous to fuzzy match (e.g. "NO PLATE" bicycles)
+MIN_FUZZY_LENGTH = 5
+
+PlateMatch = namedtuple("PlateMatch", ["plate_number", "customer_id", "distance"])
+
+
+def normalize_plate(plate_text):
+    """Strip spacing/punctuation so 'ABC 1234', 'ABC-1234' and 'abc1234' compare equal"""
+    return re.sub(r'[^A-Z0-9]', '', (plate_text or '').upper())
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two normalized plates"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,               # deletion
+                current[j - 1] + 1,            # insertion
+                previous[j - 1] + (ca != cb)   # substitution
+            ))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree over normalized plates for edit-distance lookups"""
+
+    def __init__(self):
+        self.root = None  # [key, {distance: child}]
+        self.removed = set()
+
+    def add(self, key):
+        self.removed.discard(key)
+        if self.root is None:
+            self.root = [key, {}]
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(key, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [key, {}]
+                return
+            node = child
+
+    def remove(self, key):
+        # BK-trees do not support cheap deletion; tombstone the key instead
+        self.removed.add(key)
+
+    def search(self, key, max_distance):
+        """Return [(distance, key)] for every live key within max_distance"""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_key, children = stack.pop()
+            distance = edit_distance(key, node_key)
+            if distance <= max_distance and node_key not in self.removed:
+                matches.append((distance, node_key))
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        return matches
+
+
+class PlateIndex:
+    """
+    In-memory index of known customer plates and plates with an open parking session.
+    Lets detection resolve a (possibly misread) OCR plate to an existing customer or
+    active session without going back to the database.
+    """
+
+    def __init__(self, max_distance=PLATE_MATCH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._customers = {}      # normalized plate -> (plate_number, customer_id)
+        self._open_sessions = {}  # normalized plate -> plate_number
+        self._customer_tree = BKTree()
+        self._session_tree = BKTree()
+
+    def load(self, session):
+        """(Re)build the index from parking_customers and active parking_sessions"""
+        customers = session.query(ParkingCustomer.plate_number, ParkingCustomer.customer_id).all()
+        open_plates = session.query(ParkingSession.plate_number)\
+            .filter(ParkingSession.status == 'active', ParkingSession.exit_id.is_(None))\
+            .distinct().all()
+
+        with self._lock:
+            self._customers = {}
+            self._open_sessions = {}
+            self._customer_tree = BKTree()
+            self._session_tree = BKTree()
+            for plate_number, customer_id in customers:
+                self.add_customer(plate_number, customer_id)
+            for (plate_number,) in open_plates:
+                self.open_session(plate_number)
+            self.loaded = True
+
+        print(f"✅ Plate index loaded: {len(self._customers)} customers, {len(self._open_sessions)} open sessions")
+
+    def ensure_loaded(self, session):
+        if not self.loaded:
+            self.load(session)
+
+    def add_customer(self, plate_number, customer_id):
+        key = normalize_plate(plate_number)
+        if not key:
+            return
+        with self._lock:
+            self._customers[key] = (plate_number, customer_id)
+            self._customer_tree.add(key)
+
+    def remove_customer(self, plate_number):
+        key = normalize_plate(plate_number)
+        with self._lock:
+            if self._customers.pop(key, None) is not None:
+                self._customer_tree.remove(key)
+
+    def open_session(self, plate_number):
+        key = normalize_plate(plate_number)
+        if not key:
+            return
+        with self._lock:
+            self._open_sessions[key] = plate_number
+            self._session_tree.add(key)
+
+    def close_session(self, plate_number):
+        key = normalize_plate(plate_number)
+        with self._lock:
+            if self._open_sessions.pop(key, None) is not None:
+                self._session_tree.remove(key)
+
+    def _best_key(self, key, lookup, tree, max_distance):
+        if key in lookup:
+            return key, 0
+        if len(key) < MIN_FUZZY_LENGTH or max_distance <= 0:
+            return None, None
+        matches = tree.search(key, max_distance)
+        if not matches:
+            return None, None
+        matches.sort()
+        best_distance = matches[0][0]
+        best = [k for d, k in matches if d == best_distance]
+        if len(best) > 1:
+            # Two known plates are equally close; refuse to guess
+            print(f"⚠️ Ambiguous plate read {key}: {best}")
+            return None, None
+        return best[0], best_distance
+
+    def match_customer(self, plate_text, max_distance=None):
+        """Resolve an OCR read to a known customer, or None"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        key = normalize_plate(plate_text)
+        with self._lock:
+            match_key, distance = self._best_key(key, self._customers, self._customer_tree, max_distance)
+            if match_key is None:
+                return None
+            plate_number, customer_id = self._customers[match_key]
+            return PlateMatch(plate_number, customer_id, distance)
+
+    def match_open_session(self, plate_text, max_distance=None):
+        """Resolve an OCR read to the plate of a currently open parking session, or None"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        key = normalize_plate(plate_text)
+        with self._lock:
+            match_key, distance = self._best_key(key, self._open_sessions, self._session_tree, max_distance)
+            if match_key is None:
+                return None
+            plate_number = self._open_sessions[match_key]
+            customer = self._customers.get(match_key)
+            return PlateMatch(plate_number, customer[1] if customer else None, distance)
+
+    def resolve(self, plate_text):
+        """Canonical plate for an exit read: open session first, then known customer"""
+        match = self.match_open_session(plate_text) or self.match_customer(plate_text)
+        if match and match.plate_number != plate_text:
+            print(f"🔎 Plate read {plate_text} resolved to {match.plate_number} (distance {match.distance})")
+        return match.plate_number if match else plate_text
+
+
+plate_index = PlateIndex()
+
+
+# -----------------------------------
+# Keep the index warm from ORM change events
+# -----------------------------------
+# Changes are collected on flush and only applied once the transaction commits,
+# so a rolled back guest customer never leaks into the index. Open-session plates
+# are maintained by detection_service.session_index.
+
+def _collect_plate_changes(session, flush_context):
+    ops = session.info.setdefault('plate_index_ops', [])
+    for obj in session.new:
+        if isinstance(obj, ParkingCustomer):
+            ops.append(('add_customer', obj.plate_number, obj.customer_id))
+    for obj in session.dirty:
+        if isinstance(obj, ParkingCustomer):
+            history = inspect(obj).attrs.plate_number.history
+            for old_plate in history.deleted or ():
+                ops.append(('remove_customer', old_plate, None))
+            ops.append(('add_customer', obj.plate_number, obj.customer_id))
+    for obj in session.deleted:
+        if isinstance(obj, ParkingCustomer):
+            ops.append(('remove_customer', obj.plate_number, None))
+
+
+def _apply_plate_changes(session):
+    ops = session.info.pop('plate_index_ops', None)
+    if not ops or not plate_index.loaded:
+        return
+    for op, plate_number, customer_id in ops:
+        if op == 'add_customer':
+            plate_index.add_customer(plate_number, customer_id)
+        elif op == 'remove_customer':
+            plate_index.remove_customer(plate_number)
+
+
+def _discard_plate_changes(session, *args):
+    session.info.pop('plate_index_ops', None)
+
+
+event.listen(Session, 'after_flush', _collect_plate_changes)
+event.listen(Session, 'after_commit', _apply_plate_changes)
+event.listen(Session, 'after_soft_rollback', _discard_plate_changes)
@@ -0,0 +1,192 @@
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.parking_session import ParkingSession
+from models.vehicle_entry import VehicleEntry
+from detection_service.plate_index import plate_index, normalize_plate
+from services.slot_allocator import slot_allocator
+from services import traffic_rollup
+from services.report_cache import mark_closed_stale
+
+ActiveSession = namedtuple("ActiveSession", [
+    "session_id", "entry_id", "slot_id", "lot_id", "customer_id", "plate_number", "start_time"
+])
+
+
+def active_sessions_query(session):
+    """Open parking sessions, oldest first"""
+    return session.query(ParkingSession)\
+        .filter(ParkingSession.status == 'active', ParkingSession.exit_id.is_(None))\
+        .order_by(ParkingSession.start_time.asc())
+
+
+def active_session_for_slot(session, slot_id):
+    """Latest active session in a slot (first() of it is what slot release closes)"""
+    return session.query(ParkingSession)\
+        .filter(ParkingSession.slot_id == slot_id, ParkingSession.status == 'active')\
+        .order_by(ParkingSession.start_time.desc())
+
+
+def latest_entry_query(session, plate_number, before):
+    """Entry ids for a plate up to `before`, newest first"""
+    return session.query(VehicleEntry.entry_id)\
+        .filter(VehicleEntry.plate_number == plate_number)\
+        .filter(VehicleEntry.entry_time <= before)\
+        .order_by(VehicleEntry.entry_time.desc())
+
+
+def _record_from_model(parking_session):
+    return ActiveSession(
+        session_id=parking_session.session_id,
+        entry_id=parking_session.entry_id,
+        slot_id=parking_session.slot_id,
+        lot_id=parking_session.lot_id,
+        customer_id=parking_session.customer_id,
+        plate_number=parking_session.plate_number,
+        start_time=parking_session.start_time,
+    )
+
+
+class ActiveSessionIndex:
+    """
+    Cache of currently active parking sessions keyed by (normalized) plate.
+    Exit handling resolves the session to close with a single dictionary lookup
+    instead of re-querying vehicle_entries, parking_customers and parking_sessions.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._by_plate = {}  # normalized plate -> ActiveSession
+
+    def load(self, session):
+        """(Re)build the cache from active parking_sessions"""
+        rows = active_sessions_query(session).all()
+
+        with self._lock:
+            self._by_plate = {}
+            # Ordered by start_time so the latest session wins for a plate, like the old query
+            for row in rows:
+                self.add(_record_from_model(row))
+            self.loaded = True
+
+        print(f"✅ Active session index loaded: {len(self._by_plate)} open sessions")
+
+    def ensure_loaded(self, session):
+        if not self.loaded:
+            self.load(session)
+
+    def add(self, record):
+        with self._lock:
+            self._by_plate[normalize_plate(record.plate_number)] = record
+        plate_index.open_session(record.plate_number)
+
+    def get(self, plate_number):
+        with self._lock:
+            return self._by_plate.get(normalize_plate(plate_number))
+
+    def remove(self, plate_number, session_id=None):
+        """Drop the open session for a plate (only if it is still session_id, when given)"""
+        key = normalize_plate(plate_number)
+        with self._lock:
+            record = self._by_plate.get(key)
+            if record is None or (session_id is not None and str(record.session_id) != str(session_id)):
+                return None
+            del self._by_plate[key]
+        plate_index.close_session(plate_number)
+        return record
+
+    def __len__(self):
+        return len(self._by_plate)
+
+
+session_index = ActiveSessionIndex()
+
+
+# -----------------------------------
+# Keep the cache in sync with ORM writes (detection and web paths)
+# -----------------------------------
+
+def _collect_session_changes(session, flush_context):
+    ops = session.info.setdefault('session_index_ops', [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ParkingSession):
+            if obj.status == 'active' and obj.exit_id is None:
+                ops.append(('add', _record_from_model(obj)))
+            else:
+                ops.append(('remove', (obj.plate_number, obj.session_id)))
+    for obj in session.deleted:
+        if isinstance(obj, ParkingSession):
+            ops.append(('remove', (obj.plate_number, obj.session_id)))
+
+
+def _apply_session_changes(session):
+    ops = session.info.pop('session_index_ops', None)
+    if not ops:
+        return
+    for op, value in ops:
+        if op == 'add':
+            if session_index.loaded:
+                session_index.add(value)
+            elif plate_index.loaded:
+                plate_index.open_session(value.plate_number)
+        else:
+            plate_number, session_id = value
+            if session_index.loaded:
+                session_index.remove(plate_number, session_id)
+            elif plate_index.loaded:
+                plate_index.close_session(plate_number)
+
+
+def _discard_session_changes(session, *args):
+    session.info.pop('session_index_ops', None)
+
+
+event.listen(Session, 'after_flush', _collect_session_changes)
+event.listen(Session, 'after_commit', _apply_session_changes)
+event.listen(Session, 'after_soft_rollback', _discard_session_changes)
+
+
+def complete_session(db_session, record, end_time, exit_id=None):
+    """
+    Close an indexed session and free its slot inside the caller's transaction.
+    Returns (completed, duration_minutes); completed is False if the session was
+    already closed elsewhere. The index entry is dropped once the caller commits.
+    """
+    from models.parking_slot import ParkingSlot
+
+    duration_minutes = None
+    if record.start_time:
+        duration_minutes = int((end_time - record.start_time).total_seconds() // 60)
+
+    values = {
+        'end_time': end_time,
+        'status': 'completed',
+        'duration_minutes': duration_minutes
+    }
+    if exit_id is not None:
+        values['exit_id'] = exit_id
+
+    updated = db_session.query(ParkingSession)\
+        .filter(ParkingSession.session_id == record.session_id, ParkingSession.status == 'active')\
+        .update(values, synchronize_session=False)
+
+    if updated:
+        mark_closed_stale(db_session, record.start_time)
+        db_session.query(ParkingSlot)\
+            .filter(ParkingSlot.slot_id == record.slot_id)\
+            .update({'status': 'available', 'current_vehicle_id': None}, synchronize_session=False)
+        slot_allocator.queue_release(db_session, record.slot_id)
+        info = slot_allocator.info(record.slot_id)
+        traffic_rollup.record(db_session, traffic_rollup.SESSION, end_time,
+                              vehicle_type=info.vehicle_type if info else None,
+                              lot_id=record.lot_id, duration=duration_minutes)
+
+    # Bulk updates bypass flush events, so queue the index removal ourselves
+    db_session.info.setdefault('session_index_ops', []).append(
+        ('remove', (record.plate_number, record.session_id)))
+
+    return bool(updated), duration_minutes
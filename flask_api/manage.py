@@ -1,7 +1,7 @@
 # =========================MANAGE.PY KO (KEVIN)
 from flask import Flask
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit, join_room
 from detection_service.detection import VideoProcessor,EntryVideoProcessor  
 from controllers.auth import auth_bp, init_jwt
 from controllers.unassigned import vehicle_bp
@@ -11,10 +11,18 @@ from controllers.tungtungtungsahur import analytics_bp
 from controllers.customer_mgmt import customer_bp 
 from controllers.admin import admin_bp
 from controllers.analytics import regression_bp
+from controllers.metrics import metrics_bp
+from controllers.jobs import jobs_bp
+from controllers.export import export_bp
 from flask_mail import Mail
 import os 
 from dotenv import load_dotenv
-from db.db import init_db, db  # Import the init_db function and db instance
+from db.db import init_db, db, session_scope  # Import the init_db function and db instance
+from services.occupancy import occupancy
+from services.jobs import job_queue
+from services.forecasting import forecaster
+from services.partitions import ensure_partitions
+from commands import register_commands
 #please before nyo start to migrate muna kayo ng models sa database search nyo na lang 2 command lang naman
 # 1 alembic revision --autogenerate -m "your commit message"
 # 2 alembic upgrade head
@@ -33,7 +41,7 @@ def create_app():
     app.secret_key = os.getenv('SECRET_KEY', 'FB27D156173716A31912F1BD6CEDB')
 
     # CORS configuration
-    CORS(app)
+    CORS(app, expose_headers=["X-Next-Cursor", "X-Total-Count-Estimate", "X-Cache", "ETag"])
 
     app.config['JSON_SORT_KEYS'] = False
     app.config['CORS_HEADERS'] = 'Content-Type'
@@ -55,8 +63,12 @@ def create_app():
     app.register_blueprint(customer_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(regression_bp, url_prefix='/reg')
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(export_bp)
 
     init_jwt(app)
+    register_commands(app)
 
     # Initialize the database and migrations
     init_db(app)              # This sets app.config['SQLALCHEMY_DATABASE_URI'] and initializes db
@@ -94,6 +106,49 @@ def create_app():
     
     app.active_guard_id = property(lambda app: app.entry_video_processor.active_guard_id)
 
+    # Push compact slot deltas to connected clients (replaces re-fetching get-parking-status)
+    def forward_slot_delta(delta):
+        socketio.emit("slot_delta", delta)
+
+    occupancy.add_listener(forward_slot_delta)
+    try:
+        occupancy.ensure_loaded()
+    except Exception as e:
+        print(f"⚠️ Failed to load occupancy map: {e}")
+
+    @socketio.on("occupancy_resync")
+    def handle_occupancy_resync(data=None):
+        # Client reports the last version it applied; reply with missed deltas or a snapshot
+        data = data or {}
+        occupancy.ensure_loaded()
+        emit("occupancy_sync", occupancy.since(data.get("version"), data.get("epoch")))
+
+    # Background report/forecast jobs: clients join a room per job id to hear when it finishes
+    def forward_job_update(job):
+        socketio.emit("job_update", job, to=job["job_id"])
+
+    job_queue.add_listener(forward_job_update)
+
+    # Keep traffic forecasts precomputed so the prediction endpoints only read them
+    forecaster.start()
+
+    # Next months' partitions must exist before their rows arrive (else they pile up in the default partition)
+    try:
+        with session_scope('background') as session:
+            ensure_partitions(session)
+    except Exception as e:
+        print(f"⚠️ Failed to create upcoming partitions: {e}")
+
+    @socketio.on("job_subscribe")
+    def handle_job_subscribe(data=None):
+        job_id = (data or {}).get("job_id")
+        job = job_queue.get(job_id) if job_id else None
+        if not job:
+            emit("job_update", {"job_id": job_id, "status": "not_found"})
+            return
+        join_room(job_id)
+        emit("job_update", job)
+
     @socketio.on_error_default
     def default_error_handler(e):
         print("🔥SocketIO Error:", e)
@@ -8,7 +8,9 @@ import models
 import models.system_logs
 from db.db import db 
 import os
+import re
 from dotenv import load_dotenv
+from services.partitions import PARTITIONED_TABLES
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -31,6 +33,31 @@ config.set_main_option('sqlalchemy.url', DATABASE_URL)
 # target_metadata = mymodel.Base.metadata
 target_metadata = db.metadata
 
+# Monthly partitions (<table>_pYYYYMM) and the <table>_default catch-all are
+# created by services/partitions.py, not by migrations. SQLAlchemy reflects them
+# as ordinary tables, so keep autogenerate from dropping them.
+PARTITION_CHILD = re.compile(rf"({'|'.join(PARTITIONED_TABLES)})_(p\d{{6}}|default)")
+
+
+# Indexes the models cannot express (gin/trigram operator classes, expressions);
+# they are only ever created and dropped by hand-written migrations
+UNMANAGED_INDEXES = {
+    'ix_parking_customers_first_name_trgm',
+    'ix_parking_customers_last_name_trgm',
+    'ix_parking_customers_plate_trgm',
+    'ix_parking_customers_plate_prefix',
+    'ix_system_logs_search',
+}
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return PARTITION_CHILD.fullmatch(name) is None
+    if type_ == 'index':
+        return name not in UNMANAGED_INDEXES
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +80,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -76,7 +104,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_name=include_name
         )
 
         with context.begin_transaction():
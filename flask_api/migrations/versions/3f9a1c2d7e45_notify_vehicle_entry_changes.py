@@ -0,0 +1,52 @@
+"""notify_vehicle_entry_changes
+
+Revision ID: 3f9a1c2d7e45
+Revises: c6db399dea90
+Create Date: 2025-06-02 10:14:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7e45'
+down_revision: Union[str, None] = 'c6db399dea90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Publish vehicle_entries inserts/status changes on the 'vehicle_entry_changes' channel
+    # so the unassigned feed can update incrementally instead of polling.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_vehicle_entry_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('vehicle_entry_changes', json_build_object(
+                    'op', TG_OP, 'entry_id', OLD.entry_id, 'status', NULL)::text);
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'UPDATE' AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+                RETURN NEW;
+            END IF;
+            PERFORM pg_notify('vehicle_entry_changes', json_build_object(
+                'op', TG_OP, 'entry_id', NEW.entry_id, 'status', NEW.status)::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER vehicle_entry_changes_notify
+        AFTER INSERT OR UPDATE OF status OR DELETE ON vehicle_entries
+        FOR EACH ROW EXECUTE FUNCTION notify_vehicle_entry_change();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS vehicle_entry_changes_notify ON vehicle_entries;")
+    op.execute("DROP FUNCTION IF EXISTS notify_vehicle_entry_change();")
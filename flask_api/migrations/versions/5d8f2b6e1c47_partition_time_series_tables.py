@@ -0,0 +1,148 @@
+"""partition_time_series_tables
+
+Revision ID: 5d8f2b6e1c47
+Revises: e7a3c9d15b28
+Create Date: 2025-06-20 11:05:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f2b6e1c47'
+down_revision: Union[str, None] = 'e7a3c9d15b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions created ahead of today (services/partitions.py keeps this going)
+MONTHS_AHEAD = 3
+
+# table -> (partition column, primary key column, indexes)
+TABLES = {
+    'vehicle_entries': ('entry_time', 'entry_id', [
+        "CREATE INDEX ix_vehicle_entries_entry_time ON vehicle_entries (entry_time)",
+        "CREATE INDEX ix_vehicle_entries_plate_time ON vehicle_entries (plate_number, entry_time)",
+        "CREATE INDEX ix_vehicle_entries_unassigned ON vehicle_entries (entry_time) WHERE status = 'unassigned'",
+    ]),
+    'vehicle_exits': ('exit_time', 'exit_id', [
+        "CREATE INDEX ix_vehicle_exits_exit_time ON vehicle_exits (exit_time)",
+        "CREATE INDEX ix_vehicle_exits_plate_time ON vehicle_exits (plate_number, exit_time)",
+    ]),
+    'parking_sessions': ('start_time', 'session_id', [
+        "CREATE INDEX ix_parking_sessions_active_plate ON parking_sessions (plate_number) "
+        "INCLUDE (session_id, slot_id) WHERE status = 'active' AND exit_id IS NULL",
+        "CREATE INDEX ix_parking_sessions_plate_status ON parking_sessions (plate_number, status)",
+        "CREATE INDEX ix_parking_sessions_slot_status ON parking_sessions (slot_id, status, start_time)",
+        "CREATE INDEX ix_parking_sessions_entry_id ON parking_sessions (entry_id)",
+        "CREATE INDEX ix_parking_sessions_start_time ON parking_sessions (start_time, session_id)",
+    ]),
+    'system_logs': ('timestamp', 'id', [
+        "CREATE INDEX ix_system_logs_type_timestamp ON system_logs (log_type, timestamp)",
+        "CREATE INDEX ix_system_logs_timestamp_id ON system_logs (timestamp, id)",
+    ]),
+}
+
+# Foreign keys into vehicle_entries/vehicle_exits. A partitioned table's unique keys
+# must include the partition column, so these cannot exist while partitioned.
+INBOUND_FOREIGN_KEYS = [
+    ('parking_sessions', 'parking_sessions_entry_id_fkey', 'entry_id', 'vehicle_entries', 'entry_id'),
+    ('parking_sessions', 'parking_sessions_exit_id_fkey', 'exit_id', 'vehicle_exits', 'exit_id'),
+    ('parking_slots', 'parking_slots_current_vehicle_id_fkey', 'current_vehicle_id', 'vehicle_entries', 'entry_id'),
+]
+
+ENTRY_TRIGGER = """
+    CREATE TRIGGER vehicle_entry_changes_notify
+    AFTER INSERT OR UPDATE OF status OR DELETE ON vehicle_entries
+    FOR EACH ROW EXECUTE FUNCTION notify_vehicle_entry_change();
+"""
+
+
+def _month(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _outbound_foreign_keys(bind, table):
+    """(name, definition) of FKs from table to tables that are not being partitioned"""
+    return bind.execute(sa.text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'
+          AND confrelid::regclass::text NOT IN ('vehicle_entries', 'vehicle_exits')
+    """), {'table': table}).fetchall()
+
+
+def _partition(bind, table, column, id_column, indexes):
+    legacy = f"{table}_legacy"
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    foreign_keys = _outbound_foreign_keys(bind, legacy)
+
+    # The partition column becomes part of the primary key, so it cannot be NULL
+    if table in ('vehicle_entries', 'vehicle_exits'):
+        op.execute(f"UPDATE {legacy} SET {column} = COALESCE(created_at, now()) WHERE {column} IS NULL")
+    op.execute(f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+               f"PARTITION BY RANGE ({column})")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+
+    first = bind.execute(sa.text(f"SELECT min({column}) FROM {legacy}")).scalar()
+    month = _month(first or date.today())
+    last = _month(date.today())
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        following = _next_month(month)
+        op.execute(f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                   f"FOR VALUES FROM ('{month}') TO ('{following}')")
+        month = following
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+    # CASCADE drops the inbound FKs; names below are free again once legacy is gone
+    op.execute(f"DROP TABLE {legacy} CASCADE")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({id_column}, {column})")
+    for statement in indexes:
+        op.execute(statement)
+
+
+def _unpartition(bind, table, column, id_column, indexes):
+    partitioned = f"{table}_partitioned"
+    op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    foreign_keys = _outbound_foreign_keys(bind, partitioned)
+
+    op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+    op.execute(f"DROP TABLE {partitioned} CASCADE")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({id_column})")
+    for statement in indexes:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table, (column, id_column, indexes) in TABLES.items():
+        _partition(bind, table, column, id_column, indexes)
+    op.execute(ENTRY_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table, (column, id_column, indexes) in TABLES.items():
+        _unpartition(bind, table, column, id_column, indexes)
+    op.execute(ENTRY_TRIGGER)
+    for table, name, column, target, target_column in INBOUND_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                   f"FOREIGN KEY ({column}) REFERENCES {target} ({target_column})")
@@ -0,0 +1,39 @@
+"""add_traffic_rollups_table
+
+Revision ID: 8c2e5b7a9d13
+Revises: 3f9a1c2d7e45
+Create Date: 2025-06-04 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2e5b7a9d13'
+down_revision: Union[str, None] = '3f9a1c2d7e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('traffic_rollups',
+    sa.Column('hour_bucket', sa.DateTime(), nullable=False),
+    sa.Column('lot_id', sa.String(length=50), nullable=False, server_default=''),
+    sa.Column('vehicle_type', sa.String(length=50), nullable=False, server_default=''),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('duration_sum', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hour_bucket', 'lot_id', 'vehicle_type', 'direction')
+    )
+    op.create_index('ix_traffic_rollups_direction_hour', 'traffic_rollups', ['direction', 'hour_bucket'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_traffic_rollups_direction_hour', table_name='traffic_rollups')
+    op.drop_table('traffic_rollups')
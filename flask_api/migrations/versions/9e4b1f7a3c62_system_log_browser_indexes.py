@@ -0,0 +1,39 @@
+"""system_log_browser_indexes
+
+Revision ID: 9e4b1f7a3c62
+Revises: 5d8f2b6e1c47
+Create Date: 2025-06-24 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b1f7a3c62'
+down_revision: Union[str, None] = '5d8f2b6e1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filtered keyset pages: equality filter first, then the (timestamp, id) page order
+    op.drop_index('ix_system_logs_type_timestamp', table_name='system_logs')
+    op.create_index('ix_system_logs_type_timestamp_id', 'system_logs', ['log_type', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_system_logs_action_timestamp_id', 'system_logs', ['action', 'timestamp', 'id'], unique=False)
+    # Full-text search over action and details (expression must match services/log_search.py)
+    op.execute("""
+        CREATE INDEX ix_system_logs_search ON system_logs
+        USING gin (to_tsvector('simple'::regconfig, action || ' ' || coalesce(details::text, '')))
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_system_logs_search")
+    op.drop_index('ix_system_logs_action_timestamp_id', table_name='system_logs')
+    op.drop_index('ix_system_logs_type_timestamp_id', table_name='system_logs')
+    op.create_index('ix_system_logs_type_timestamp', 'system_logs', ['log_type', 'timestamp'], unique=False)
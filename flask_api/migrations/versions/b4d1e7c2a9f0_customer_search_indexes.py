@@ -0,0 +1,40 @@
+"""customer_search_indexes
+
+Revision ID: b4d1e7c2a9f0
+Revises: 8c2e5b7a9d13
+Create Date: 2025-06-12 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d1e7c2a9f0'
+down_revision: Union[str, None] = '8c2e5b7a9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Substring (ILIKE '%term%') search on names and plates
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parking_customers_first_name_trgm ON parking_customers USING gin (first_name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parking_customers_last_name_trgm ON parking_customers USING gin (last_name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parking_customers_plate_trgm ON parking_customers USING gin (plate_number gin_trgm_ops)")
+    # Prefix search for plate terms too short for trigrams
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parking_customers_plate_prefix ON parking_customers (upper(plate_number) text_pattern_ops)")
+    # Keyset pagination order
+    op.create_index('ix_parking_customers_name_order', 'parking_customers', ['last_name', 'first_name', 'customer_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_parking_customers_name_order', table_name='parking_customers')
+    op.execute("DROP INDEX IF EXISTS ix_parking_customers_plate_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_parking_customers_plate_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_parking_customers_last_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_parking_customers_first_name_trgm")
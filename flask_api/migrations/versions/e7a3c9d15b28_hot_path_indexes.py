@@ -0,0 +1,67 @@
+"""hot_path_indexes
+
+Revision ID: e7a3c9d15b28
+Revises: b4d1e7c2a9f0
+Create Date: 2025-06-16 14:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d15b28'
+down_revision: Union[str, None] = 'b4d1e7c2a9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # vehicle_entries: time-range analytics, latest entry per plate, unassigned feed
+    op.create_index('ix_vehicle_entries_entry_time', 'vehicle_entries', ['entry_time'], unique=False)
+    op.create_index('ix_vehicle_entries_plate_time', 'vehicle_entries', ['plate_number', 'entry_time'], unique=False)
+    op.create_index('ix_vehicle_entries_unassigned', 'vehicle_entries', ['entry_time'], unique=False,
+                    postgresql_where=sa.text("status = 'unassigned'"))
+
+    # vehicle_exits: time-range analytics, latest exit per plate
+    op.create_index('ix_vehicle_exits_exit_time', 'vehicle_exits', ['exit_time'], unique=False)
+    op.create_index('ix_vehicle_exits_plate_time', 'vehicle_exits', ['plate_number', 'exit_time'], unique=False)
+
+    # parking_sessions: open session per plate (exit detection), per slot (release),
+    # entry joins and newest-first history pages
+    op.create_index('ix_parking_sessions_active_plate', 'parking_sessions', ['plate_number'], unique=False,
+                    postgresql_where=sa.text("status = 'active' AND exit_id IS NULL"),
+                    postgresql_include=['session_id', 'slot_id'])
+    op.create_index('ix_parking_sessions_plate_status', 'parking_sessions', ['plate_number', 'status'], unique=False)
+    op.create_index('ix_parking_sessions_slot_status', 'parking_sessions', ['slot_id', 'status', 'start_time'], unique=False)
+    op.create_index('ix_parking_sessions_entry_id', 'parking_sessions', ['entry_id'], unique=False)
+    op.create_index('ix_parking_sessions_start_time', 'parking_sessions', ['start_time', 'session_id'], unique=False)
+
+    # parking_slots: availability per lot and per section/vehicle type
+    op.create_index('ix_parking_slots_lot_status', 'parking_slots', ['lot_id', 'status'], unique=False)
+    op.create_index('ix_parking_slots_section_type_status', 'parking_slots', ['section', 'vehicle_type', 'status'], unique=False)
+
+    # system_logs: filtered and unfiltered newest-first log pages
+    op.create_index('ix_system_logs_type_timestamp', 'system_logs', ['log_type', 'timestamp'], unique=False)
+    op.create_index('ix_system_logs_timestamp_id', 'system_logs', ['timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_system_logs_timestamp_id', table_name='system_logs')
+    op.drop_index('ix_system_logs_type_timestamp', table_name='system_logs')
+    op.drop_index('ix_parking_slots_section_type_status', table_name='parking_slots')
+    op.drop_index('ix_parking_slots_lot_status', table_name='parking_slots')
+    op.drop_index('ix_parking_sessions_start_time', table_name='parking_sessions')
+    op.drop_index('ix_parking_sessions_entry_id', table_name='parking_sessions')
+    op.drop_index('ix_parking_sessions_slot_status', table_name='parking_sessions')
+    op.drop_index('ix_parking_sessions_plate_status', table_name='parking_sessions')
+    op.drop_index('ix_parking_sessions_active_plate', table_name='parking_sessions')
+    op.drop_index('ix_vehicle_exits_plate_time', table_name='vehicle_exits')
+    op.drop_index('ix_vehicle_exits_exit_time', table_name='vehicle_exits')
+    op.drop_index('ix_vehicle_entries_unassigned', table_name='vehicle_entries')
+    op.drop_index('ix_vehicle_entries_plate_time', table_name='vehicle_entries')
+    op.drop_index('ix_vehicle_entries_entry_time', table_name='vehicle_entries')
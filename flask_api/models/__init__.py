@@ -5,4 +5,5 @@ from models.parking_lot import ParkingLot
 from models.vehicle_entry import VehicleEntry
 from models.vehicle_exit import VehicleExit
 from models.parking_session import ParkingSession
-from models.parking_slot import ParkingSlot
\ No newline at end of file
+from models.parking_slot import ParkingSlot
+from models.traffic_rollup import TrafficRollup
\ No newline at end of file
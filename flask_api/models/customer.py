@@ -2,6 +2,11 @@ from models.base import db, generate_uuid, datetime, PG_UUID
 
 class ParkingCustomer(db.Model):
     __tablename__ = 'parking_customers'
+    # Keyset order for search pages (b4d1e7c2a9f0); the trigram and plate prefix
+    # indexes are skipped by migrations/env.py
+    __table_args__ = (
+        db.Index('ix_parking_customers_name_order', 'last_name', 'first_name', 'customer_id'),
+    )
    
     
     customer_id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=generate_uuid)
@@ -12,20 +12,26 @@ class ParkingLot(db.Model):
     # Relationships
     slots = db.relationship('ParkingSlot', backref='lot', lazy=True)
     
+    def _status_count(self, status):
+        # O(1) from the in-memory counters; falls back to a COUNT if they cannot be loaded
+        from services.lot_counters import lot_counters
+        try:
+            lot_counters.ensure_loaded(db.session)
+            return lot_counters.get(self.lot_id)[status]
+        except Exception as e:
+            print(f"⚠️ Lot counters unavailable, counting {status} slots: {e}")
+            from sqlalchemy import func
+            return db.session.query(func.count(ParkingSlot.slot_id))\
+                .filter(ParkingSlot.lot_id == self.lot_id, ParkingSlot.status == status).scalar()
+
     def occupied_count(self):
-        from sqlalchemy import func
-        return db.session.query(func.count(ParkingSlot.slot_id))\
-            .filter(ParkingSlot.lot_id == self.lot_id, ParkingSlot.status == 'occupied').scalar()
+        return self._status_count('occupied')
     
     def reserved_count(self):
-        from sqlalchemy import func
-        return db.session.query(func.count(ParkingSlot.slot_id))\
-            .filter(ParkingSlot.lot_id == self.lot_id, ParkingSlot.status == 'reserved').scalar()
+        return self._status_count('reserved')
     
     def available_count(self):
-        from sqlalchemy import func
-        return db.session.query(func.count(ParkingSlot.slot_id))\
-            .filter(ParkingSlot.lot_id == self.lot_id, ParkingSlot.status == 'available').scalar()
+        return self._status_count('available')
     
     def __repr__(self):
         return f'<ParkingLot {self.name}>'
\ No newline at end of file
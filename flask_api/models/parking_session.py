@@ -2,12 +2,22 @@ from models.base import db, generate_uuid, datetime, PG_UUID
 
 class ParkingSession(db.Model):
     __tablename__ = 'parking_sessions'
+    # Created by migrations (e7a3c9d15b28, 5d8f2b6e1c47); declared so autogenerate keeps them
+    __table_args__ = (
+        db.Index('ix_parking_sessions_active_plate', 'plate_number',
+                 postgresql_where=db.text("status = 'active' AND exit_id IS NULL"),
+                 postgresql_include=['session_id', 'slot_id']),
+        db.Index('ix_parking_sessions_plate_status', 'plate_number', 'status'),
+        db.Index('ix_parking_sessions_slot_status', 'slot_id', 'status', 'start_time'),
+        db.Index('ix_parking_sessions_entry_id', 'entry_id'),
+        db.Index('ix_parking_sessions_start_time', 'start_time', 'session_id'),
+    )
     
     session_id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     
-    # Link to vehicle entry and exit records
-    entry_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('vehicle_entries.entry_id'), nullable=False)
-    exit_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('vehicle_exits.exit_id'), nullable=True)
+    # Link to vehicle entry and exit records (no FK: both tables are partitioned)
+    entry_id = db.Column(PG_UUID(as_uuid=True), nullable=False)
+    exit_id = db.Column(PG_UUID(as_uuid=True), nullable=True)
     
     # Link to parking slot and lot
     slot_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('parking_slots.slot_id'), nullable=False)
@@ -18,7 +28,7 @@ class ParkingSession(db.Model):
     plate_number = db.Column(db.String(20), db.ForeignKey('parking_customers.plate_number'), nullable=False)
     
     # Session timing
-    start_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    start_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, primary_key=True)  # partition key
     end_time = db.Column(db.DateTime, nullable=True)
     
     # Additional fields you might want
@@ -26,8 +36,10 @@ class ParkingSession(db.Model):
     status = db.Column(db.String(20), default='active')  # 'active', 'completed', 'cancelled'
     
     # Relationships
-    entry = db.relationship('VehicleEntry', foreign_keys=[entry_id], backref='parking_session')
-    exit = db.relationship('VehicleExit', foreign_keys=[exit_id], backref='parking_session')
+    entry = db.relationship('VehicleEntry', primaryjoin='foreign(ParkingSession.entry_id) == VehicleEntry.entry_id',
+                            backref='parking_session')
+    exit = db.relationship('VehicleExit', primaryjoin='foreign(ParkingSession.exit_id) == VehicleExit.exit_id',
+                           backref='parking_session')
     slot = db.relationship('ParkingSlot', foreign_keys=[slot_id], backref='sessions')
     lot = db.relationship('ParkingLot', foreign_keys=[lot_id], backref='sessions')
     customer = db.relationship('ParkingCustomer', foreign_keys=[customer_id], backref='sessions')
@@ -2,6 +2,11 @@ from models.base import db, generate_uuid, datetime, PG_UUID
 
 class ParkingSlot(db.Model):
     __tablename__ = 'parking_slots'
+    # Created by migration e7a3c9d15b28; declared so autogenerate keeps them
+    __table_args__ = (
+        db.Index('ix_parking_slots_lot_status', 'lot_id', 'status'),
+        db.Index('ix_parking_slots_section_type_status', 'section', 'vehicle_type', 'status'),
+    )
     slot_id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     slot_number = db.Column(db.Integer, nullable=False)
     section = db.Column(db.String(50), nullable=False)  # 'top', 'left', 'center', 'right', etc.
@@ -9,8 +14,8 @@ class ParkingSlot(db.Model):
     status = db.Column(db.String(20), default='available')  # 'available', 'occupied', 'reserved'
     is_active = db.Column(db.Boolean, default=True)  # In case you need to disable slots
     
-    # Foreign key to the current vehicle occupying this slot (if any)
-    current_vehicle_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('vehicle_entries.entry_id'), nullable=True)
+    # The current vehicle occupying this slot (if any); no FK since vehicle_entries is partitioned
+    current_vehicle_id = db.Column(PG_UUID(as_uuid=True), nullable=True)
     
     # If this is a reserved slot, who is it reserved for
     reserved_for = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('parking_customers.customer_id'), nullable=True)
@@ -22,7 +27,9 @@ class ParkingSlot(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
     # Relationships
-    current_vehicle = db.relationship('VehicleEntry', foreign_keys=[current_vehicle_id], backref='assigned_slot', lazy=True)
+    current_vehicle = db.relationship('VehicleEntry',
+                                      primaryjoin='foreign(ParkingSlot.current_vehicle_id) == VehicleEntry.entry_id',
+                                      backref='assigned_slot', lazy=True)
     reserved_customer = db.relationship('ParkingCustomer', foreign_keys=[reserved_for], backref='reserved_slots', lazy=True)
     
     def __repr__(self):
@@ -5,8 +5,15 @@ from models.base import generate_uuid, PG_UUID, datetime
 
 class SystemLog(db.Model):
     __tablename__ = 'system_logs'
+    # Created by migrations (5d8f2b6e1c47, 9e4b1f7a3c62); ix_system_logs_search is an
+    # expression index and is skipped by migrations/env.py instead
+    __table_args__ = (
+        db.Index('ix_system_logs_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_system_logs_type_timestamp_id', 'log_type', 'timestamp', 'id'),
+        db.Index('ix_system_logs_action_timestamp_id', 'action', 'timestamp', 'id'),
+    )
     id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=generate_uuid)
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now, primary_key=True)  # partition key
     log_type = db.Column(db.String(50), nullable=False)  # e.g., 'user_action', 'system_event', 'error'
     action = db.Column(db.String(255), nullable=False)
     details = db.Column(db.JSON)
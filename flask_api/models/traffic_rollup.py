@@ -0,0 +1,19 @@
+from models.base import db, datetime
+
+class TrafficRollup(db.Model):
+    """Hourly traffic counts, maintained by services/traffic_rollup.py"""
+    __tablename__ = 'traffic_rollups'
+    __table_args__ = (
+        db.Index('ix_traffic_rollups_direction_hour', 'direction', 'hour_bucket'),
+    )
+    hour_bucket = db.Column(db.DateTime, primary_key=True)  # timestamp truncated to the hour
+    # '' when the row is not tied to a lot (entries/exits are counted before a slot is known)
+    lot_id = db.Column(db.String(50), primary_key=True, default='')
+    vehicle_type = db.Column(db.String(50), primary_key=True, default='')
+    direction = db.Column(db.String(10), primary_key=True)  # 'entry', 'exit', 'session' (completed sessions)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    duration_sum = db.Column(db.BigInteger, nullable=False, default=0)  # minutes, for 'session' rows
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TrafficRollup {self.hour_bucket} {self.direction} {self.vehicle_type}: {self.count}>'
@@ -2,11 +2,17 @@ from models.base import db, generate_uuid, datetime,PG_UUID
 
 class VehicleEntry(db.Model):
     __tablename__ = 'vehicle_entries'
+    # Created by migrations (e7a3c9d15b28, 5d8f2b6e1c47); declared so autogenerate keeps them
+    __table_args__ = (
+        db.Index('ix_vehicle_entries_entry_time', 'entry_time'),
+        db.Index('ix_vehicle_entries_plate_time', 'plate_number', 'entry_time'),
+        db.Index('ix_vehicle_entries_unassigned', 'entry_time', postgresql_where=db.text("status = 'unassigned'")),
+    )
 
     
     entry_id = db.Column(PG_UUID(as_uuid=True), primary_key=True, default=generate_uuid)
     plate_number = db.Column(db.String(20), db.ForeignKey('parking_customers.plate_number'), nullable=False)
-    entry_time = db.Column(db.DateTime, default=datetime.utcnow)
+    entry_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, primary_key=True)  # partition key
     image_url = db.Column(db.Text)
     guard_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('guards.guard_id'), nullable=True)
     customer_id = db.Column(PG_UUID(as_uuid=True), db.ForeignKey('parking_customers.customer_id'), nullable=True)
@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import queue
+import atexit
+import threading
+import traceback
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError, DataError
+
+from db.db import session_scope
+from models.system_logs import SystemLog
+
+# Records waiting to be written; beyond this new records are dropped (and counted)
+AUDIT_BUFFER_SIZE = int(os.getenv('AUDIT_BUFFER_SIZE', 10000))
+# Rows per multi-row INSERT
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))
+# Seconds the writer waits to fill a batch before writing what it has
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+# Records written later than this many seconds after being logged count as delayed
+AUDIT_DELAY_WARNING = float(os.getenv('AUDIT_DELAY_WARNING', 5.0))
+# Seconds allowed for draining the buffer at shutdown
+AUDIT_SHUTDOWN_TIMEOUT = float(os.getenv('AUDIT_SHUTDOWN_TIMEOUT', 5.0))
+# Times a batch is retried after a transient failure (DB down, timeout) before it is dropped
+AUDIT_MAX_RETRIES = int(os.getenv('AUDIT_MAX_RETRIES', 3))
+
+# Errors caused by the rows themselves; retrying the same rows cannot succeed
+REJECTED_ROW_ERRORS = (IntegrityError, DataError)
+
+
+class AuditLogWriter:
+    """
+    Buffered SystemLog writer. Requests only enqueue a record; a background
+    thread batches records into multi-row INSERTs on its own session, so an admin
+    action no longer pays for (or shares a transaction with) the log commit.
+    The buffer is bounded: when it is full new records are dropped and counted.
+    A batch that fails transiently is retried on its own up to max_retries times;
+    a batch the database rejects is rewritten row by row and the bad rows are
+    dropped. Whatever is buffered is flushed at interpreter exit.
+    """
+
+    def __init__(self, buffer_size=AUDIT_BUFFER_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, max_retries=AUDIT_MAX_RETRIES):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._retry = []  # batch that failed to write, tried again (alone) first; guarded by _lock
+        self._attempts = 0  # consecutive failures of _retry
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.delayed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_delay = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="audit-log-writer")
+            self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, log_type, action, details=None, user_id=None, ip_address=None):
+        """Queue one record; returns False if the buffer was full and it was dropped"""
+        self.start()
+        row = {
+            'id': uuid.uuid4(),
+            'timestamp': datetime.now(),
+            'log_type': log_type,
+            'action': action,
+            'details': details,
+            'user_id': user_id,
+            'ip_address': ip_address,
+        }
+        try:
+            self._queue.put_nowait((time.monotonic(), row))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            print(f"⚠️ Audit log buffer full, dropped '{action}'")
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _next_batch(self, wait):
+        """The batch awaiting a retry, else up to batch_size records waiting at most `wait` seconds"""
+        with self._lock:
+            batch, self._retry = self._retry, []
+        if batch:
+            return batch
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        with session_scope('background') as session:
+            # executemany with a list of rows; psycopg2 sends one multi-row INSERT per page
+            session.execute(SystemLog.__table__.insert(), [row for _, row in batch])
+            session.commit()
+
+    def _written(self, batch):
+        now = time.monotonic()
+        delays = [now - queued_at for queued_at, _ in batch]
+        with self._lock:
+            self._attempts = 0
+            self.written += len(batch)
+            self.batches += 1
+            self.delayed += sum(delay > AUDIT_DELAY_WARNING for delay in delays)
+            self.max_delay = max(self.max_delay, max(delays))
+
+    def _failed(self, batch, error):
+        """Keep a transiently failed batch for a retry, or drop it once max_retries is used up"""
+        print(f"❌ Audit log write of {len(batch)} records failed: {error}")
+        print(traceback.format_exc())
+        with self._lock:
+            self.failed_batches += 1
+            self._attempts += 1
+            if self._attempts <= self.max_retries:
+                self._retry = batch
+                return False
+            self._attempts = 0
+            self.dropped += len(batch)
+        print(f"❌ Audit log dropped {len(batch)} records after {self.max_retries} retries")
+        return False
+
+    def _write_rows(self, batch):
+        """Write a rejected batch one row at a time, dropping the rows the database refuses"""
+        for position, item in enumerate(batch):
+            try:
+                self._insert([item])
+            except REJECTED_ROW_ERRORS as e:
+                print(f"❌ Audit record '{item[1]['action']}' rejected, dropped: {e}")
+                with self._lock:
+                    self.dropped += 1
+                continue
+            except Exception as e:
+                return self._failed(batch[position:], e)
+            self._written([item])
+        return True
+
+    def _write(self, batch):
+        """Write one batch; False if it failed and the writer should back off"""
+        try:
+            self._insert(batch)
+        except REJECTED_ROW_ERRORS as e:
+            print(f"⚠️ Audit log batch of {len(batch)} records rejected ({type(e).__name__}), writing rows one by one")
+            return self._write_rows(batch)
+        except Exception as e:
+            return self._failed(batch, e)
+        self._written(batch)
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch and not self._write(batch):
+                self._stop.wait(self.flush_interval)  # back off before retrying the failed batch
+
+    def flush(self, timeout=AUDIT_SHUTDOWN_TIMEOUT):
+        """Write everything buffered so far from the calling thread; False if time ran out"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            batch = self._next_batch(0)
+            if not batch:
+                return True
+            if not self._write(batch):
+                return False
+        with self._lock:
+            return self._queue.empty() and not self._retry
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+        # Flushing while the writer is still mid-write would race it for the queue and _retry
+        if self._thread is not None and self._thread.is_alive():
+            flushed = False
+        else:
+            flushed = self.flush()
+        if not flushed:
+            with self._lock:
+                lost = self._queue.qsize() + len(self._retry)
+                self.dropped += lost
+            print(f"❌ Audit log shutdown left {lost} records unwritten")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'delayed': self.delayed,
+                'max_delay_seconds': round(self.max_delay, 3),
+                'buffered': self._queue.qsize() + len(self._retry),
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+            }
+
+
+audit_log = AuditLogWriter()
@@ -0,0 +1,173 @@
+import os
+import time
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.users import User
+from utils.redis_client import get_redis
+
+# Seconds a user's authz version (or, without Redis, their role/blocked row) is trusted locally
+AUTHZ_CACHE_TTL = float(os.getenv('AUTHZ_CACHE_TTL', 10))
+
+VERSION_KEY = 'authz:version:{}'
+
+Identity = namedtuple('Identity', ['role', 'is_blocked'])
+
+
+def _seed(client, key):
+    """Create a missing version key with a value (microseconds since the epoch) above any it held before"""
+    client.set(key, time.time_ns() // 1000, nx=True)
+
+
+class AuthzCache:
+    """
+    Authorization from JWT claims. Login stamps role, is_blocked and the user's
+    authz version into the token; a role change, block or delete bumps the
+    version in Redis. A request is authorized from its claims as long as the
+    token's version is still current, which costs a local TTL-cache hit or one
+    Redis GET. Stale tokens, tokens minted before claims existed, a missing
+    Redis and a missing version key (Redis reset or eviction) fall back to the
+    user row, cached for AUTHZ_CACHE_TTL seconds. A lost key is re-seeded from
+    the clock rather than from 0, so no token issued before the loss matches it.
+    """
+
+    def __init__(self, ttl=AUTHZ_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}  # user_id -> (expires_at, version)
+        self._users = {}     # user_id -> (expires_at, Identity or None)
+        self.claim_hits = 0
+        self.version_lookups = 0
+        self.db_lookups = 0
+        self.bumps = 0
+
+    def _cached(self, store, user_id):
+        entry = store.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    def version(self, user_id, seed=False):
+        """
+        Current authz version for a user. None without Redis, or when the key is
+        missing and seed is False; with seed a missing key is created first.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            found, version = self._cached(self._versions, user_id)
+        if found:
+            return version
+        client = get_redis()
+        if client is None:
+            return None
+        key = VERSION_KEY.format(user_id)
+        try:
+            value = client.get(key)
+            if value is None and seed:
+                _seed(client, key)
+                value = client.get(key)
+        except Exception as e:
+            print(f"⚠️ Authz version lookup failed: {e}")
+            return None
+        if value is None:
+            return None
+        version = int(value)
+        with self._lock:
+            self.version_lookups += 1
+            self._versions[user_id] = (time.monotonic() + self.ttl, version)
+        return version
+
+    def claims(self, user):
+        """Extra JWT claims for a freshly issued access token"""
+        return {
+            'role': user.role,
+            'is_blocked': bool(user.is_blocked),
+            'authz_version': self.version(user.id, seed=True),
+        }
+
+    def _load(self, user_id):
+        with self._lock:
+            found, identity = self._cached(self._users, user_id)
+        if found:
+            return identity
+        user = User.query.filter_by(id=user_id).first()
+        identity = Identity(user.role, bool(user.is_blocked)) if user else None
+        with self._lock:
+            self.db_lookups += 1
+            self._users[user_id] = (time.monotonic() + self.ttl, identity)
+        return identity
+
+    def identity(self, user_id, claims):
+        """Identity(role, is_blocked) for the token's user, or None if the user is gone"""
+        user_id = str(user_id)
+        token_version = claims.get('authz_version')
+        if token_version is not None and 'role' in claims:
+            if token_version == self.version(user_id):
+                with self._lock:
+                    self.claim_hits += 1
+                return Identity(claims['role'], bool(claims.get('is_blocked')))
+        return self._load(user_id)
+
+    def bump(self, user_id):
+        """Invalidate every token issued to the user so far"""
+        user_id = str(user_id)
+        with self._lock:
+            self._versions.pop(user_id, None)
+            self._users.pop(user_id, None)
+            self.bumps += 1
+        client = get_redis()
+        if client is not None:
+            key = VERSION_KEY.format(user_id)
+            try:
+                _seed(client, key)
+                client.incr(key)
+            except Exception as e:
+                print(f"❌ Authz version bump failed for {user_id}: {e}")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'claim_hits': self.claim_hits,
+                'version_lookups': self.version_lookups,
+                'db_lookups': self.db_lookups,
+                'bumps': self.bumps,
+                'cached_versions': len(self._versions),
+                'cached_users': len(self._users),
+            }
+
+
+authz = AuthzCache()
+
+
+# -----------------------------------
+# Bump versions when role / blocked status changes
+# -----------------------------------
+
+def _collect_authz_changes(session, flush_context):
+    changed = session.info.setdefault('authz_bumps', set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if attrs.role.history.has_changes() or attrs.is_blocked.history.has_changes():
+                changed.add(str(obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(str(obj.id))
+
+
+def _apply_authz_changes(session):
+    for user_id in session.info.pop('authz_bumps', ()):
+        authz.bump(user_id)
+
+
+def _discard_authz_changes(session, *args):
+    session.info.pop('authz_bumps', None)
+
+
+event.listen(Session, 'after_flush', _collect_authz_changes)
+event.listen(Session, 'after_commit', _apply_authz_changes)
+event.listen(Session, 'after_soft_rollback', _discard_authz_changes)
@@ -0,0 +1,251 @@
+import bisect
+import threading
+
+from sqlalchemy import event, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+from models.customer import ParkingCustomer
+from utils.pagination import encode_cursor, decode_cursor, estimate_count
+
+# Terms shorter than a trigram cannot use the pg_trgm indexes; plates that short
+# are matched by prefix instead (upper(plate_number) text_pattern_ops index)
+TRIGRAM_MIN_LENGTH = 3
+
+SORT_COLUMNS = (ParkingCustomer.last_name, ParkingCustomer.first_name, ParkingCustomer.customer_id)
+
+
+def _trigrams(text):
+    text = (text or '').lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _plate_clause(term):
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return func.upper(ParkingCustomer.plate_number).like(f"{term.upper()}%")
+    return ParkingCustomer.plate_number.ilike(f"%{term}%")
+
+
+def _sort_key(customer):
+    return (customer.last_name, customer.first_name, str(customer.customer_id))
+
+
+class CustomerSearchIndex:
+    """
+    In-memory stand-in for the pg_trgm indexes on databases without them (SQLite
+    in tests/dev): a trigram inverted index over names and plates plus a sorted
+    plate list for prefix lookups. Searches return only the ids of one page, so
+    the caller loads just those rows.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._rows = {}    # customer_id -> (last_name, first_name, plate_number, is_registered)
+        self._grams = {}   # trigram -> {customer_id}
+        self._plates = []  # sorted [(upper plate, customer_id)]
+
+    def load(self, session):
+        rows = session.query(
+            ParkingCustomer.customer_id,
+            ParkingCustomer.first_name,
+            ParkingCustomer.last_name,
+            ParkingCustomer.plate_number,
+            ParkingCustomer.is_registered
+        ).all()
+        with self._lock:
+            self._rows = {}
+            self._grams = {}
+            self._plates = []
+            for row in rows:
+                self.add(*row)
+            self.loaded = True
+        print(f"✅ Customer search index loaded: {len(self._rows)} customers")
+
+    def ensure_loaded(self, session):
+        if not self.loaded:
+            self.load(session)
+
+    def add(self, customer_id, first_name, last_name, plate_number, is_registered):
+        customer_id = str(customer_id)
+        with self._lock:
+            self.remove(customer_id)
+            self._rows[customer_id] = (last_name or '', first_name or '', plate_number or '', bool(is_registered))
+            for text in (first_name, last_name, plate_number):
+                for gram in _trigrams(text):
+                    self._grams.setdefault(gram, set()).add(customer_id)
+            bisect.insort(self._plates, ((plate_number or '').upper(), customer_id))
+
+    def remove(self, customer_id):
+        customer_id = str(customer_id)
+        with self._lock:
+            row = self._rows.pop(customer_id, None)
+            if row is None:
+                return
+            last_name, first_name, plate_number, _ = row
+            for text in (first_name, last_name, plate_number):
+                for gram in _trigrams(text):
+                    ids = self._grams.get(gram)
+                    if ids is not None:
+                        ids.discard(customer_id)
+                        if not ids:
+                            del self._grams[gram]
+            entry = (plate_number.upper(), customer_id)
+            position = bisect.bisect_left(self._plates, entry)
+            if position < len(self._plates) and self._plates[position] == entry:
+                del self._plates[position]
+
+    def _containing(self, term):
+        """Ids whose name or plate could contain term (all ids for short terms)"""
+        grams = _trigrams(term)
+        if not grams:
+            return set(self._rows)
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        return set.intersection(*postings) if postings[0] else set()
+
+    def _plate_prefix(self, term):
+        prefix = term.upper()
+        start = bisect.bisect_left(self._plates, (prefix,))
+        ids = set()
+        for plate, customer_id in self._plates[start:]:
+            if not plate.startswith(prefix):
+                break
+            ids.add(customer_id)
+        return ids
+
+    def _plate_matches(self, term):
+        if len(term) < TRIGRAM_MIN_LENGTH:
+            return self._plate_prefix(term)
+        needle = term.lower()
+        return {i for i in self._containing(term) if needle in self._rows[i][2].lower()}
+
+    def search(self, search=None, plate_number=None, is_registered=None, after=None, limit=None):
+        """(page of customer ids in (last, first, id) order, total matches)"""
+        with self._lock:
+            ids = None
+            if plate_number:
+                ids = self._plate_matches(plate_number)
+            if search:
+                needle = search.lower()
+                matches = {
+                    i for i in self._containing(search)
+                    if needle in self._rows[i][0].lower() or needle in self._rows[i][1].lower()
+                } | self._plate_matches(search)
+                ids = matches if ids is None else ids & matches
+            if ids is None:
+                ids = set(self._rows)
+            if is_registered is not None:
+                ids = {i for i in ids if self._rows[i][3] == is_registered}
+
+            keyed = sorted((self._rows[i][0], self._rows[i][1], i) for i in ids)
+        total = len(keyed)
+        if after is not None:
+            keyed = keyed[bisect.bisect_right(keyed, tuple(after)):]
+        if limit is not None:
+            keyed = keyed[:limit + 1]
+        return [key[2] for key in keyed], total
+
+
+customer_search_index = CustomerSearchIndex()
+
+
+def filtered_query(session, search=None, plate_number=None, is_registered=None):
+    """Customers matching the search filters, unordered (Postgres path)"""
+    query = session.query(ParkingCustomer)
+    if is_registered is not None:
+        query = query.filter(ParkingCustomer.is_registered == is_registered)
+    if plate_number:
+        query = query.filter(_plate_clause(plate_number))
+    if search:
+        # Plain ILIKE (no lower()) so the gin_trgm_ops indexes apply
+        query = query.filter(or_(
+            ParkingCustomer.first_name.ilike(f"%{search}%"),
+            ParkingCustomer.last_name.ilike(f"%{search}%"),
+            _plate_clause(search)
+        ))
+    return query
+
+
+def page_query(session, search=None, plate_number=None, is_registered=None, after=None, limit=None):
+    """One keyset page (limit + 1 rows) of filtered_query in (last, first, id) order"""
+    query = filtered_query(session, search, plate_number, is_registered)
+    if after is not None:
+        query = query.filter(tuple_(*SORT_COLUMNS) > tuple_(*after))
+    query = query.order_by(*SORT_COLUMNS)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def _search_memory(session, search, plate_number, is_registered, after, limit):
+    customer_search_index.ensure_loaded(session)
+    ids, total = customer_search_index.search(search, plate_number, is_registered, after, limit)
+    if not ids:
+        return [], total
+    by_id = {
+        str(customer.customer_id): customer
+        for customer in session.query(ParkingCustomer).filter(ParkingCustomer.customer_id.in_(ids))
+    }
+    return [by_id[i] for i in ids if i in by_id], total
+
+
+def search_customers(session, search=None, plate_number=None, is_registered=None, limit=None, cursor=None):
+    """
+    Customers matching the filters, ordered by last name, first name.
+    Name and plate terms are substring matches answered by trigram indexes; plate
+    terms shorter than TRIGRAM_MIN_LENGTH match as a prefix. Pagination is keyset
+    on (last_name, first_name, customer_id) and only applies when limit or cursor
+    is given. Returns (customers, next_cursor, total_estimate); raises ValueError
+    for a bad cursor.
+    """
+    search = (search or '').strip() or None
+    plate_number = (plate_number or '').strip() or None
+    paged = limit is not None or cursor is not None
+    after = decode_cursor(cursor, 3) if cursor else None
+
+    if session.get_bind().dialect.name == 'postgresql':
+        total = estimate_count(session, filtered_query(session, search, plate_number, is_registered)) if paged else None
+        customers = page_query(session, search, plate_number, is_registered, after, limit).all()
+    else:
+        customers, total = _search_memory(session, search, plate_number, is_registered, after, limit)
+
+    next_cursor = None
+    if limit is not None and len(customers) > limit:
+        customers = customers[:limit]
+        next_cursor = encode_cursor(_sort_key(customers[-1]))
+    if total is None:
+        total = len(customers)
+    return customers, next_cursor, total
+
+
+# -----------------------------------
+# Keep the fallback index current from ORM change events
+# -----------------------------------
+
+def _collect_customer_changes(session, flush_context):
+    ops = session.info.setdefault('customer_search_ops', [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ParkingCustomer):
+            ops.append(('add', obj.customer_id, obj.first_name, obj.last_name, obj.plate_number, obj.is_registered))
+    for obj in session.deleted:
+        if isinstance(obj, ParkingCustomer):
+            ops.append(('remove', obj.customer_id))
+
+
+def _apply_customer_changes(session):
+    ops = session.info.pop('customer_search_ops', None)
+    if not ops or not customer_search_index.loaded:
+        return
+    for op in ops:
+        if op[0] == 'add':
+            customer_search_index.add(*op[1:])
+        else:
+            customer_search_index.remove(op[1])
+
+
+def _discard_customer_changes(session, *args):
+    session.info.pop('customer_search_ops', None)
+
+
+event.listen(Session, 'after_flush', _collect_customer_changes)
+event.listen(Session, 'after_commit', _apply_customer_changes)
+event.listen(Session, 'after_soft_rollback', _discard_customer_changes)
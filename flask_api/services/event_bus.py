@@ -0,0 +1,185 @@
+import os
+import json
+import uuid
+import time
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, date
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils.redis_client import get_redis
+
+# Event types published by detection and the parking endpoints
+ENTRY_CREATED = 'entry_created'
+EXIT_CREATED = 'exit_created'
+SLOT_CHANGED = 'slot_changed'
+# Delivered locally (never over Redis) after the Redis listener reconnects: events
+# published while it was down are lost, so subscribers should rebuild their state
+RESYNC = 'resync'
+
+# 'memory' keeps events inside this process; 'redis' fans them out to every process
+EVENT_BUS_BACKEND = os.getenv('EVENT_BUS_BACKEND', 'memory')
+EVENT_BUS_CHANNEL = os.getenv('EVENT_BUS_CHANNEL', 'kotsek:events')
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Unserializable event value: {value!r}")
+
+
+def serialize_payload(payload):
+    """JSON-safe copy of an event payload (UUIDs and datetimes become strings)"""
+    return json.loads(json.dumps(payload, default=_json_default))
+
+
+class EventBus:
+    """
+    In-process publish/subscribe. publish() never blocks the caller (detection threads,
+    request handlers): events are queued and handed to subscribers on a dispatcher
+    thread. With the Redis backend events go through a pub/sub channel instead, so
+    every process (including this one) receives them exactly once. If the Redis
+    connection drops the listener resubscribes with backoff and then delivers a
+    RESYNC event locally, since whatever was published in between is gone.
+    """
+
+    def __init__(self, backend=EVENT_BUS_BACKEND, channel=EVENT_BUS_CHANNEL):
+        self.backend = backend
+        self.channel = channel
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._started = False
+        self._redis = None
+        self.listening = False
+        self.reconnects = 0
+        self.published = 0
+        self.delivered = 0
+        self.failed = 0
+
+    def subscribe(self, event_type, handler):
+        with self._lock:
+            self._handlers[event_type].append(handler)
+        self.start()
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        with self._lock:
+            if handler in self._handlers[event_type]:
+                self._handlers[event_type].remove(handler)
+
+    def publish(self, event_type, payload):
+        self.start()
+        payload = serialize_payload(payload)
+        self.published += 1
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.channel, json.dumps({'type': event_type, 'payload': payload}))
+                return
+            except Exception as e:
+                print(f"⚠️ Redis publish failed, delivering locally: {e}")
+        self._queue.put((event_type, payload))
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        if self.backend == 'redis':
+            self._redis = get_redis()
+            if self._redis is not None:
+                threading.Thread(target=self._redis_listener, daemon=True, name="event-bus-redis").start()
+            else:
+                print("⚠️ Event bus falling back to in-memory delivery (Redis unavailable)")
+
+        threading.Thread(target=self._dispatch_loop, daemon=True, name="event-bus").start()
+        print(f"✅ Event bus started ({'redis' if self._redis is not None else 'memory'})")
+
+    def _redis_listener(self):
+        """Feed channel messages to the dispatcher, resubscribing with backoff when Redis drops"""
+        backoff = 1
+        subscribed_before = False
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.listening = True
+                backoff = 1
+                print(f"✅ Event bus listening on {self.channel}")
+                if subscribed_before:
+                    self.reconnects += 1
+                    self._queue.put((RESYNC, {}))
+                subscribed_before = True
+                for message in pubsub.listen():
+                    try:
+                        data = json.loads(message['data'])
+                        self._queue.put((data['type'], data['payload']))
+                    except Exception as e:
+                        print(f"❌ Bad event on {self.channel}: {e}")
+            except Exception as e:
+                print(f"⚠️ Event bus listener down, resubscribing in {backoff}s: {e}")
+            finally:
+                self.listening = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _dispatch_loop(self):
+        while True:
+            event_type, payload = self._queue.get()
+            with self._lock:
+                handlers = list(self._handlers.get(event_type, ()))
+            for handler in handlers:
+                try:
+                    handler(payload)
+                    self.delivered += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"❌ Event handler {getattr(handler, '__name__', handler)} failed for {event_type}: {e}")
+
+    def metrics(self):
+        return {
+            'backend': 'redis' if self._redis is not None else 'memory',
+            'listening': self.listening if self._redis is not None else None,
+            'reconnects': self.reconnects,
+            'published': self.published,
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'queued': self._queue.qsize()
+        }
+
+
+event_bus = EventBus()
+
+
+def publish_on_commit(session, event_type, payload):
+    """Publish once the session's transaction commits; dropped if it rolls back"""
+    session.info.setdefault('event_bus_events', []).append((event_type, payload))
+
+
+def _publish_committed(session):
+    events = session.info.pop('event_bus_events', None)
+    for event_type, payload in events or ():
+        event_bus.publish(event_type, payload)
+
+
+def _discard_events(session, *args):
+    session.info.pop('event_bus_events', None)
+
+
+event.listen(Session, 'after_commit', _publish_committed)
+event.listen(Session, 'after_soft_rollback', _discard_events)
@@ -0,0 +1,190 @@
+import io
+import os
+import csv
+import json
+import uuid
+import importlib.util
+from datetime import datetime, date
+from decimal import Decimal
+
+from sqlalchemy import select, types
+
+from db.db import get_engine
+from models.vehicle_entry import VehicleEntry
+from models.vehicle_exit import VehicleExit
+from models.parking_session import ParkingSession
+from models.system_logs import SystemLog
+
+# Rows fetched from the server-side cursor (and written) per chunk
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 5000))
+
+# dataset -> (table, time column used for the date range)
+DATASETS = {
+    'entries': (VehicleEntry.__table__, 'entry_time'),
+    'exits': (VehicleExit.__table__, 'exit_time'),
+    'sessions': (ParkingSession.__table__, 'start_time'),
+    'logs': (SystemLog.__table__, 'timestamp'),
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+}
+
+
+def parse_bound(value, end=False):
+    """ISO date/datetime query value; a bare end date covers that whole day"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed
+
+
+def _cell(value):
+    """Plain value for CSV/Arrow: UUIDs and JSON become strings"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_value(value):
+    value = _cell(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def export_query(dataset, start=None, end=None, filters=None):
+    """SELECT of a dataset's rows in the range, ordered by its time column"""
+    table, time_column = DATASETS[dataset]
+    column = table.c[time_column]
+    query = select(table)
+    if start is not None:
+        query = query.where(column >= start)
+    if end is not None:
+        query = query.where(column <= end)
+    for name, value in (filters or {}).items():
+        if value is not None:
+            query = query.where(table.c[name] == value)
+    return query.order_by(column)
+
+
+def _rows(dataset, start=None, end=None, filters=None):
+    """Yield lists of row tuples from a server-side cursor, EXPORT_CHUNK_ROWS at a time"""
+    query = export_query(dataset, start, end, filters)
+    with get_engine().connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=EXPORT_CHUNK_ROWS
+        ).execute(query)
+        for partition in result.partitions(EXPORT_CHUNK_ROWS):
+            yield partition
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain()"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, (types.Float, types.Numeric)):
+        return pa.float64()
+    return pa.string()  # strings, UUIDs, JSON
+
+
+def _csv_stream(table, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in table.columns])
+    yield buffer.getvalue()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def _arrow_stream(table, chunks, fmt):
+    import pyarrow as pa
+
+    schema = pa.schema([(column.name, _arrow_type(pa, column.type)) for column in table.columns])
+    names = schema.names
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+        write = writer.write_table
+        to_output = lambda batch: pa.Table.from_batches([batch])
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        to_output = lambda batch: batch
+
+    try:
+        for rows in chunks:
+            # Columnar batch for this chunk only; one row group / IPC batch each
+            columns = [[_cell(row[i]) for row in rows] for i in range(len(names))]
+            write(to_output(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(dataset, fmt='csv', start=None, end=None, filters=None):
+    """
+    (generator, mimetype, filename) streaming one dataset for a date range.
+    Rows come from a server-side cursor in EXPORT_CHUNK_ROWS chunks and each chunk
+    is written out before the next is fetched, so memory stays bounded.
+    Raises ValueError for an unknown dataset/format or when pyarrow is missing.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Use one of: {', '.join(DATASETS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    if fmt != 'csv' and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError(f"{fmt} export requires pyarrow")
+
+    table, _ = DATASETS[dataset]
+    chunks = _rows(dataset, start, end, filters)
+    stream = _csv_stream(table, chunks) if fmt == 'csv' else _arrow_stream(table, chunks, fmt)
+
+    mimetype, extension = FORMATS[fmt]
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    return stream, mimetype, f"{dataset}-{stamp}.{extension}"
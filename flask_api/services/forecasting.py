@@ -0,0 +1,304 @@
+import os
+import time
+import pickle
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, extract
+
+from db.db import session_scope
+from models.traffic_rollup import TrafficRollup
+from services.traffic_rollup import ENTRY, hour_bucket
+
+# Forecast 17 hours (6 AM to 10 PM)
+FORECAST_HOURS = 17
+FORECAST_FIRST_HOUR = 6
+# Hours of history kept for fitting (the series never grows past this)
+FORECAST_HISTORY_HOURS = int(os.getenv('FORECAST_HISTORY_HOURS', 24 * 90))
+# Seconds between series refreshes (new hours are fed to the fitted model)
+FORECAST_UPDATE_INTERVAL = float(os.getenv('FORECAST_UPDATE_INTERVAL', 600))
+# Full auto_arima refit after this many seconds, or this many new hourly observations
+FORECAST_REFIT_INTERVAL = float(os.getenv('FORECAST_REFIT_INTERVAL', 24 * 3600))
+FORECAST_REFIT_MIN_HOURS = int(os.getenv('FORECAST_REFIT_MIN_HOURS', 168))
+# Fitted model and series are persisted here so restarts skip the fit
+FORECAST_STATE_PATH = os.getenv('FORECAST_STATE_PATH', 'forecast_state.pkl')
+
+# Fewer observations than this are not worth fitting
+MIN_OBSERVATIONS = 48
+
+HOUR = timedelta(hours=1)
+
+
+class HourlySeries:
+    """
+    Entries per complete hour as a fixed-size numpy array, read from the traffic
+    rollup. Each refresh appends only the hours since the last one and drops the
+    oldest beyond max_hours, so memory stays constant however long history gets.
+    """
+
+    def __init__(self, max_hours=FORECAST_HISTORY_HOURS):
+        self.max_hours = max_hours
+        self.start = None  # hour of values[0]
+        self.values = np.zeros(0, dtype=np.int32)
+
+    @property
+    def end(self):
+        """The hour after the last observation"""
+        return self.start + len(self.values) * HOUR if self.start is not None else None
+
+    def refresh(self, session, until):
+        """Append complete hours up to `until` (exclusive); returns the new observations"""
+        first = self.end if self.start is not None else until - self.max_hours * HOUR
+        hours = int((until - first) / HOUR)
+        if hours <= 0:
+            return np.zeros(0, dtype=np.int32)
+
+        rows = session.query(
+            TrafficRollup.hour_bucket,
+            func.sum(TrafficRollup.count)
+        ).filter(
+            TrafficRollup.direction == ENTRY,
+            TrafficRollup.hour_bucket >= first,
+            TrafficRollup.hour_bucket < until
+        ).group_by(TrafficRollup.hour_bucket).all()
+
+        chunk = np.zeros(hours, dtype=np.int32)
+        for bucket, count in rows:
+            chunk[int((bucket - first) / HOUR)] = int(count or 0)
+
+        if self.start is None:
+            # Start the series at the first recorded entry, like the old resample did
+            nonzero = np.flatnonzero(chunk)
+            if not nonzero.size:
+                return np.zeros(0, dtype=np.int32)
+            chunk = chunk[nonzero[0]:]
+            first += int(nonzero[0]) * HOUR
+            self.start = first
+
+        self.values = np.concatenate([self.values, chunk])
+        overflow = len(self.values) - self.max_hours
+        if overflow > 0:
+            self.values = self.values[overflow:]
+            self.start += overflow * HOUR
+        return chunk
+
+
+class TrafficForecaster:
+    """
+    Precomputed traffic forecasts. A background thread keeps an HourlySeries
+    current, feeds new hours to the fitted ARIMA model (model.update) and refits
+    with auto_arima on a schedule or once enough new hours have arrived. The
+    fitted state is pickled to FORECAST_STATE_PATH. Requests only read the
+    latest forecast and hourly profile.
+    """
+
+    def __init__(self, state_path=FORECAST_STATE_PATH):
+        self.state_path = state_path
+        self.series = HourlySeries()
+        self.model = None
+        self.fitted_at = None
+        self.new_since_fit = 0
+        self.updated_at = None
+        self.ready = False  # at least one refresh finished
+        self._forecast = None
+        self._profile = None
+        self._lock = threading.RLock()
+        self._fit_lock = threading.Lock()
+        self._started = False
+        self.fits = 0
+        self.updates = 0
+
+    # -- persistence --
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'rb') as f:
+                state = pickle.load(f)
+            with self._lock:
+                self.model = state['model']
+                self.fitted_at = state['fitted_at']
+                self.new_since_fit = state['new_since_fit']
+                self.series.start = state['series_start']
+                self.series.values = state['series_values']
+            print(f"✅ Forecast model loaded from {self.state_path} ({len(self.series.values)} hours)")
+        except Exception as e:
+            print(f"⚠️ Could not load forecast state, refitting: {e}")
+
+    def _save_state(self):
+        with self._lock:
+            state = {
+                'model': self.model,
+                'fitted_at': self.fitted_at,
+                'new_since_fit': self.new_since_fit,
+                'series_start': self.series.start,
+                'series_values': self.series.values,
+            }
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"⚠️ Could not save forecast state: {e}")
+
+    # -- model --
+
+    def _fit(self):
+        from pmdarima import auto_arima
+
+        values = self.series.values.astype(float)
+        model = auto_arima(
+            values,
+            start_p=0, max_p=5,
+            start_q=0, max_q=5,
+            d=None,            # let it decide differencing
+            seasonal=False,
+            stepwise=True,
+            error_action="ignore",
+            suppress_warnings=True,
+            trace=False
+        )
+        with self._lock:
+            self.model = model
+            self.fitted_at = time.time()
+            self.new_since_fit = 0
+            self.fits += 1
+        print(f"✅ Forecast model refit on {len(values)} hours: order {model.order}")
+
+    def _refit_due(self):
+        return (self.model is None
+                or self.new_since_fit >= FORECAST_REFIT_MIN_HOURS
+                or time.time() - (self.fitted_at or 0) >= FORECAST_REFIT_INTERVAL)
+
+    def _predict(self, now):
+        """Tomorrow's 6 AM - 10 PM, averaged into 3-hour blocks"""
+        tomorrow = (now + timedelta(days=1)).date()
+        start = datetime.combine(tomorrow, datetime.min.time()) + timedelta(hours=FORECAST_FIRST_HOUR)
+        offset = max(0, int((start - self.series.end) / HOUR))
+        predicted = np.asarray(self.model.predict(n_periods=offset + FORECAST_HOURS))[offset:]
+        predicted = np.clip(predicted, 0, None)  # ensure no negative predictions
+
+        groups = {}
+        for i, value in enumerate(predicted):
+            hour = FORECAST_FIRST_HOUR + i
+            group_start_hour = (hour - FORECAST_FIRST_HOUR) // 3 * 3 + FORECAST_FIRST_HOUR
+            label = f"{group_start_hour:02d}:00–{group_start_hour + 3:02d}:00"
+            groups.setdefault(label, []).append(float(value))
+
+        return [
+            {
+                "hour_group": label,
+                "predicted_entries": round(sum(vals) / len(vals), 2)
+            }
+            for label, vals in groups.items()
+        ]
+
+    def _hourly_profile(self, session):
+        """Average entries per hour of day (6 AM to 10 PM) over the whole rollup history"""
+        span = session.query(
+            func.min(TrafficRollup.hour_bucket), func.max(TrafficRollup.hour_bucket)
+        ).filter(TrafficRollup.direction == ENTRY).first()
+        if not span or span[0] is None:
+            return []
+        total_days = (span[1].date() - span[0].date()).days + 1
+
+        hourly_data = {
+            int(hour): int(count or 0) for hour, count in session.query(
+                extract('hour', TrafficRollup.hour_bucket),
+                func.sum(TrafficRollup.count)
+            ).filter(
+                TrafficRollup.direction == ENTRY
+            ).group_by(extract('hour', TrafficRollup.hour_bucket)).all()
+        }
+        return [
+            {"hour": hour, "predicted_entries": round(hourly_data.get(hour, 0) / total_days, 2)}
+            for hour in range(6, 23)  # 6 AM to 10 PM
+        ]
+
+    def refresh(self, session, force_refit=False):
+        """Pull new hours, update or refit the model and recompute the published forecasts"""
+        now = datetime.now()
+        with self._fit_lock:
+            new_values = self.series.refresh(session, hour_bucket(now))
+            changed = False
+
+            if len(self.series.values) >= MIN_OBSERVATIONS:
+                with self._lock:
+                    self.new_since_fit += len(new_values)
+                try:
+                    if force_refit or self._refit_due():
+                        self._fit()
+                        changed = True
+                    elif len(new_values):
+                        self.model.update(new_values.astype(float))
+                        with self._lock:
+                            self.updates += 1
+                        changed = True
+                except Exception as e:
+                    # Keep serving the last forecast (and the hourly profile) if fitting fails
+                    print(f"❌ Forecast model fit failed: {e}")
+                    if force_refit:
+                        raise
+
+            forecast = self._predict(now) if self.model is not None else None
+            profile = self._hourly_profile(session)
+            with self._lock:
+                self._forecast = forecast
+                self._profile = profile
+                self.updated_at = time.time()
+                self.ready = True
+
+        if changed:
+            self._save_state()
+        return forecast
+
+    # -- background loop --
+
+    def _loop(self):
+        self._load_state()
+        while True:
+            try:
+                with session_scope('background') as session:
+                    self.refresh(session)
+            except Exception as e:
+                print(f"❌ Forecast refresh failed: {e}")
+                print(traceback.format_exc())
+            time.sleep(FORECAST_UPDATE_INTERVAL)
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._loop, daemon=True, name="traffic-forecaster").start()
+
+    # -- reads --
+
+    def forecast(self):
+        with self._lock:
+            return self._forecast
+
+    def hourly_profile(self):
+        with self._lock:
+            return self._profile
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'series_hours': len(self.series.values),
+                'series_start': self.series.start.isoformat() if self.series.start else None,
+                'model_order': getattr(self.model, 'order', None),
+                'fitted_at': self.fitted_at,
+                'updated_at': self.updated_at,
+                'new_since_fit': self.new_since_fit,
+                'fits': self.fits,
+                'updates': self.updates,
+            }
+
+
+forecaster = TrafficForecaster()
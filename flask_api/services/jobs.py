@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from db.db import session_scope
+from services.report_cache import normalize_params
+
+# Worker threads for report/forecast jobs
+REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', 2))
+# Seconds a finished job (and its result) stays downloadable
+REPORT_JOB_TTL = int(os.getenv('REPORT_JOB_TTL', 3600))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class JobQueue:
+    """
+    Runs slow reports and forecasts on a local worker pool instead of inside a
+    request. A submission returns a job id right away; identical submissions
+    (same kind and normalized params) made while one is queued or running share
+    that job. Results are kept as serialized JSON for REPORT_JOB_TTL seconds and
+    listeners (the SocketIO bridge) are told about every status change.
+    """
+
+    def __init__(self, workers=REPORT_JOB_WORKERS, ttl=REPORT_JOB_TTL):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+        self._lock = threading.Lock()
+        self._kinds = {}     # kind -> (run(session, **params), validate(params) or None)
+        self._jobs = {}      # job_id -> job dict (result body kept separately)
+        self._results = {}   # job_id -> JSON string
+        self._active = {}    # dedupe key -> job_id while queued/running
+        self._listeners = []
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def register(self, kind, run, validate=None):
+        """run(session, **params) returns a JSON-serializable result; validate(params) raises ValueError"""
+        self._kinds[kind] = (run, validate)
+
+    def add_listener(self, callback):
+        """callback(job) is called whenever a job changes status"""
+        self._listeners.append(callback)
+
+    def _notify(self, job):
+        for callback in self._listeners:
+            try:
+                callback(dict(job))
+            except Exception as e:
+                print(f"❌ Job listener failed: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self._jobs.items()):
+            if job['finished_at'] and job['finished_at'] < cutoff:
+                del self._jobs[job_id]
+                self._results.pop(job_id, None)
+
+    def submit(self, kind, params, submitted_by=None):
+        """(job, created); raises KeyError for an unknown kind and ValueError for bad params"""
+        run, validate = self._kinds[kind]
+        params = normalize_params(params or {})
+        if validate:
+            validate(params)
+
+        key = hashlib.md5(json.dumps([kind, params], sort_keys=True).encode('utf-8')).hexdigest()
+        with self._lock:
+            self._prune()
+            job_id = self._active.get(key)
+            if job_id is not None:
+                self.deduplicated += 1
+                return dict(self._jobs[job_id]), False
+
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'kind': kind,
+                'params': params,
+                'status': QUEUED,
+                'submitted_by': submitted_by,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'error': None,
+            }
+            self._jobs[job['job_id']] = job
+            self._active[key] = job['job_id']
+            self.submitted += 1
+
+        self._notify(job)
+        self._executor.submit(self._run, job['job_id'], key, run)
+        return dict(job), True
+
+    def _run(self, job_id, key, run):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = RUNNING
+            job['started_at'] = time.time()
+        self._notify(job)
+
+        try:
+            with session_scope('background') as session:
+                result = run(session, **job['params'])
+            body = json.dumps(result, default=str)
+            with self._lock:
+                self._results[job_id] = body
+                job['status'] = COMPLETED
+        except Exception as e:
+            print(f"❌ Job {job['kind']} {job_id} failed: {e}")
+            print(traceback.format_exc())
+            with self._lock:
+                job['status'] = FAILED
+                job['error'] = str(e)
+        finally:
+            with self._lock:
+                job['finished_at'] = time.time()
+                self._active.pop(key, None)
+        self._notify(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def result(self, job_id):
+        with self._lock:
+            return self._results.get(job_id)
+
+    def metrics(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job['status']] = statuses.get(job['status'], 0) + 1
+            return {
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+                'jobs': statuses,
+            }
+
+
+job_queue = JobQueue()
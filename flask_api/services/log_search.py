@@ -0,0 +1,42 @@
+from sqlalchemy import func, or_, cast, Text, literal_column
+
+from models.system_logs import SystemLog
+
+# Must match ix_system_logs_search exactly or Postgres will not use the GIN index
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+def search_document():
+    """action plus the JSON details as one tsvector, as indexed by ix_system_logs_search"""
+    # details::text (not VARCHAR) and inline literals, so the expression is the index's
+    return func.to_tsvector(
+        SEARCH_CONFIG,
+        SystemLog.action + literal_column("' '", Text)
+        + func.coalesce(cast(SystemLog.details, Text), literal_column("''", Text))
+    )
+
+
+def search_clause(session, term):
+    """Full-text match (websearch syntax) on Postgres, substring match elsewhere"""
+    if session.get_bind().dialect.name == 'postgresql':
+        return search_document().op('@@')(func.websearch_to_tsquery(SEARCH_CONFIG, term))
+    return or_(
+        SystemLog.action.ilike(f"%{term}%"),
+        cast(SystemLog.details, Text).ilike(f"%{term}%")
+    )
+
+
+def filter_logs(session, log_type=None, action=None, start=None, end=None, search=None):
+    """SystemLog query with the log browser's filters applied (unordered)"""
+    query = session.query(SystemLog)
+    if log_type:
+        query = query.filter(SystemLog.log_type == log_type)
+    if action:
+        query = query.filter(SystemLog.action == action)
+    if start:
+        query = query.filter(SystemLog.timestamp >= start)
+    if end:
+        query = query.filter(SystemLog.timestamp <= end)
+    if search:
+        query = query.filter(search_clause(session, search))
+    return query
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+from collections import defaultdict
+
+from sqlalchemy import func, case
+
+from db.db import session_scope
+from models.parking_slot import ParkingSlot
+from services.event_bus import event_bus, SLOT_CHANGED, RESYNC
+
+# Seconds between reconciliations against parking_slots (0 disables the background check)
+LOT_COUNTER_RECONCILE = float(os.getenv('LOT_COUNTER_RECONCILE', 300))
+
+STATUSES = ('available', 'occupied', 'reserved')
+
+
+def _empty():
+    return {'total': 0, 'active': 0, 'available': 0, 'occupied': 0, 'reserved': 0}
+
+
+class LotCounters:
+    """
+    Per-lot slot counts kept in memory so occupancy reads are dictionary lookups.
+    Counts move with every committed slot_changed event (previous_status -> status)
+    and are periodically reconciled with a single grouped COUNT; any drift found is
+    logged, kept for /metrics/lot-counters and then corrected.
+    """
+
+    def __init__(self, reconcile_interval=LOT_COUNTER_RECONCILE):
+        self.reconcile_interval = reconcile_interval
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._counts = defaultdict(_empty)  # lot_id -> counts
+        self._started = False
+        self.events_applied = 0
+        self.last_reconciled = None
+        self.last_drift = {}
+
+    def _query_counts(self, session):
+        rows = session.query(
+            ParkingSlot.lot_id,
+            func.count(ParkingSlot.slot_id).label('total'),
+            func.sum(case((ParkingSlot.is_active == True, 1), else_=0)).label('active'),
+            func.sum(case((ParkingSlot.status == 'available', 1), else_=0)).label('available'),
+            func.sum(case((ParkingSlot.status == 'occupied', 1), else_=0)).label('occupied'),
+            func.sum(case((ParkingSlot.status == 'reserved', 1), else_=0)).label('reserved'),
+        ).group_by(ParkingSlot.lot_id).all()
+
+        counts = defaultdict(_empty)
+        for row in rows:
+            counts[row.lot_id] = {
+                'total': int(row.total or 0),
+                'active': int(row.active or 0),
+                'available': int(row.available or 0),
+                'occupied': int(row.occupied or 0),
+                'reserved': int(row.reserved or 0),
+            }
+        return counts
+
+    def load(self, session):
+        counts = self._query_counts(session)
+        with self._lock:
+            self._counts = counts
+            self.loaded = True
+            self.last_reconciled = time.time()
+        print(f"✅ Lot counters loaded for {len(counts)} lots")
+
+    def ensure_loaded(self, session=None):
+        self.start()
+        if self.loaded:
+            return
+        if session is not None:
+            self.load(session)
+        else:
+            with session_scope('background') as scoped:
+                self.load(scoped)
+
+    def apply(self, payload):
+        """Move one slot between status buckets"""
+        with self._lock:
+            if not self.loaded:
+                return
+            counts = self._counts[payload.get('lot_id')]
+            previous, status = payload.get('previous_status'), payload.get('status')
+            if payload.get('created'):
+                counts['total'] += 1
+                counts['active'] += 1
+            elif previous is None or previous == status:
+                # Status did not change (e.g. only current_vehicle_id moved)
+                return
+            elif previous in STATUSES:
+                counts[previous] -= 1
+            if status in STATUSES:
+                counts[status] += 1
+            self.events_applied += 1
+
+    def resync(self, payload=None):
+        """Slot events were lost; reload on the next read"""
+        with self._lock:
+            self.loaded = False
+
+    def check(self, session):
+        """Compare the in-memory counts with parking_slots; returns {lot_id: {field: {memory, db}}}"""
+        actual = self._query_counts(session)
+        drift = {}
+        with self._lock:
+            for lot_id in set(actual) | set(self._counts):
+                memory, db_counts = self._counts.get(lot_id, _empty()), actual.get(lot_id, _empty())
+                diff = {field: {'memory': memory[field], 'db': db_counts[field]}
+                        for field in db_counts if memory[field] != db_counts[field]}
+                if diff:
+                    drift[lot_id] = diff
+        return drift, actual
+
+    def reconcile(self, session):
+        drift, actual = self.check(session)
+        with self._lock:
+            self._counts = actual
+            self.loaded = True
+            self.last_reconciled = time.time()
+            self.last_drift = drift
+        if drift:
+            print(f"⚠️ Lot counter drift corrected: {drift}")
+        return drift
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                with session_scope('background') as session:
+                    self.reconcile(session)
+            except Exception as e:
+                print(f"❌ Lot counter reconcile failed: {e}")
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        event_bus.subscribe(SLOT_CHANGED, self.apply)
+        event_bus.subscribe(RESYNC, self.resync)
+        if self.reconcile_interval > 0:
+            threading.Thread(target=self._reconcile_loop, daemon=True, name="lot-counters").start()
+
+    def get(self, lot_id):
+        with self._lock:
+            return dict(self._counts.get(lot_id, _empty()))
+
+    def all(self):
+        with self._lock:
+            return {lot_id: dict(counts) for lot_id, counts in self._counts.items()}
+
+    def totals(self):
+        """Counts summed over every lot"""
+        totals = _empty()
+        with self._lock:
+            for counts in self._counts.values():
+                for field in totals:
+                    totals[field] += counts[field]
+        return totals
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'lots': len(self._counts),
+                'events_applied': self.events_applied,
+                'last_reconciled': self.last_reconciled,
+                'last_drift': self.last_drift,
+            }
+
+
+lot_counters = LotCounters()
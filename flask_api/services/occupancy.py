@@ -0,0 +1,137 @@
+import os
+import uuid
+import threading
+from collections import deque
+
+from db.db import session_scope
+from models.parking_slot import ParkingSlot
+from services.event_bus import event_bus, SLOT_CHANGED, RESYNC
+
+# How many deltas are kept for clients resyncing from an older version
+OCCUPANCY_DELTA_BUFFER = int(os.getenv('OCCUPANCY_DELTA_BUFFER', 1000))
+
+
+class OccupancyService:
+    """
+    Authoritative in-memory map of slot states. Every slot_changed event (assign,
+    release, reserve, auto-assign) becomes a compact delta with a monotonically
+    increasing version that is pushed to dashboards. A client that missed deltas
+    asks for everything after the last version it saw; if that is older than the
+    buffer (or from a previous process, see epoch) it gets a full snapshot instead.
+    """
+
+    def __init__(self, buffer_size=OCCUPANCY_DELTA_BUFFER):
+        self.epoch = uuid.uuid4().hex[:8]  # changes on restart, so clients know versions reset
+        self.version = 0
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._slots = {}  # slot_id -> {'status', 'vehicle', 'lot_id', 'section', 'slot_number', 'vehicle_type'}
+        self._deltas = deque(maxlen=buffer_size)
+        self._listeners = []
+        self._subscribed = False
+
+    def load(self, session):
+        rows = session.query(
+            ParkingSlot.slot_id, ParkingSlot.status, ParkingSlot.current_vehicle_id,
+            ParkingSlot.lot_id, ParkingSlot.section, ParkingSlot.slot_number, ParkingSlot.vehicle_type
+        ).all()
+
+        with self._lock:
+            self._slots = {
+                str(row.slot_id): {
+                    'status': row.status,
+                    'vehicle': str(row.current_vehicle_id) if row.current_vehicle_id else None,
+                    'lot_id': row.lot_id,
+                    'section': row.section,
+                    'slot_number': row.slot_number,
+                    'vehicle_type': row.vehicle_type,
+                }
+                for row in rows
+            }
+            # Deltas from before the reload no longer line up with the map
+            self.version += 1
+            self._deltas.clear()
+            self.loaded = True
+
+        print(f"✅ Occupancy map loaded: {len(self._slots)} slots (version {self.version})")
+
+    def ensure_loaded(self):
+        if not self._subscribed:
+            self._subscribed = True
+            event_bus.subscribe(SLOT_CHANGED, self.apply)
+            event_bus.subscribe(RESYNC, self.resync)
+        if not self.loaded:
+            with session_scope('background') as session:
+                self.load(session)
+
+    def resync(self, payload=None):
+        """Slot events were lost; reload (and restart the delta log) on the next read"""
+        with self._lock:
+            self.loaded = False
+
+    def add_listener(self, callback):
+        """callback(delta) is called for every applied transition"""
+        self._listeners.append(callback)
+
+    def apply(self, payload):
+        """Apply one slot transition from the event bus"""
+        slot_id = str(payload['slot_id'])
+        status = payload['status']
+        vehicle = payload.get('current_vehicle_id')
+
+        with self._lock:
+            if not self.loaded:
+                return None
+            slot = self._slots.get(slot_id)
+            if slot is None:
+                slot = self._slots[slot_id] = {
+                    'status': None,
+                    'vehicle': None,
+                    'lot_id': payload.get('lot_id'),
+                    'section': payload.get('section'),
+                    'slot_number': payload.get('slot_number'),
+                    'vehicle_type': payload.get('vehicle_type'),
+                }
+            if slot['status'] == status and slot['vehicle'] == vehicle:
+                return None
+            slot['status'] = status
+            slot['vehicle'] = vehicle
+            self.version += 1
+            delta = {'v': self.version, 'e': self.epoch, 'id': slot_id, 'status': status, 'vehicle': vehicle}
+            self._deltas.append(delta)
+
+        for callback in self._listeners:
+            try:
+                callback(delta)
+            except Exception as e:
+                print(f"❌ Occupancy listener failed: {e}")
+        return delta
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'epoch': self.epoch,
+                'version': self.version,
+                'slots': {slot_id: dict(slot) for slot_id, slot in self._slots.items()}
+            }
+
+    def since(self, version, epoch=None):
+        """
+        Deltas after `version`, or a full snapshot when the client is too far behind
+        or its version comes from another process lifetime.
+        """
+        with self._lock:
+            if epoch == self.epoch and version is not None:
+                if version == self.version:
+                    return {'epoch': self.epoch, 'version': self.version, 'deltas': []}
+                oldest = self._deltas[0]['v'] if self._deltas else None
+                if oldest is not None and oldest <= version + 1 and version < self.version:
+                    return {
+                        'epoch': self.epoch,
+                        'version': self.version,
+                        'deltas': [delta for delta in self._deltas if delta['v'] > version]
+                    }
+        return self.snapshot()
+
+
+occupancy = OccupancyService()
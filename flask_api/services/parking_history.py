@@ -0,0 +1,38 @@
+from models.parking_slot import ParkingSlot
+from models.parking_session import ParkingSession
+from models.customer import ParkingCustomer
+
+
+def history_query(session, slot_id=None, lot_id=None, plate_number=None, customer_id=None, start=None, end=None):
+    """Sessions with their slot and customer columns in one joined query, unordered"""
+    query = session.query(
+        ParkingSession.session_id,
+        ParkingSession.plate_number,
+        ParkingSession.lot_id,
+        ParkingSession.start_time,
+        ParkingSession.end_time,
+        ParkingSession.duration_minutes,
+        ParkingSession.status,
+        ParkingSlot.section,
+        ParkingSlot.slot_number,
+        ParkingCustomer.first_name,
+        ParkingCustomer.last_name
+    ).outerjoin(
+        ParkingSlot, ParkingSlot.slot_id == ParkingSession.slot_id
+    ).outerjoin(
+        ParkingCustomer, ParkingCustomer.customer_id == ParkingSession.customer_id
+    )
+
+    if slot_id:
+        query = query.filter(ParkingSession.slot_id == slot_id)
+    if lot_id:
+        query = query.filter(ParkingSession.lot_id == lot_id)
+    if plate_number:
+        query = query.filter(ParkingSession.plate_number == plate_number)
+    if customer_id:
+        query = query.filter(ParkingSession.customer_id == customer_id)
+    if start is not None:
+        query = query.filter(ParkingSession.start_time >= start)
+    if end is not None:
+        query = query.filter(ParkingSession.start_time <= end)
+    return query
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from sqlalchemy import func, case, and_
+
+from models.parking_slot import ParkingSlot
+from models.parking_lot import ParkingLot
+from models.vehicle_entry import VehicleEntry
+from models.customer import ParkingCustomer
+from services.event_bus import event_bus, SLOT_CHANGED, RESYNC
+
+# Upper bound on snapshot age, for changes that never go through the event bus
+PARKING_STATUS_TTL = float(os.getenv('PARKING_STATUS_TTL', 60))
+
+VEHICLE_TYPES = ('car', 'motorcycle', 'bicycle')
+
+
+def _slot_rows(session):
+    """Every slot with its occupant's plate and reserved customer, in one query"""
+    return session.query(
+        ParkingSlot.slot_id,
+        ParkingSlot.slot_number,
+        ParkingSlot.lot_id,
+        ParkingSlot.section,
+        ParkingSlot.vehicle_type,
+        ParkingSlot.status,
+        ParkingSlot.current_vehicle_id,
+        ParkingSlot.reserved_for,
+        VehicleEntry.plate_number,
+        ParkingCustomer.first_name,
+        ParkingCustomer.last_name,
+        ParkingCustomer.plate_number.label('reserved_plate_number'),
+    ).outerjoin(
+        VehicleEntry, and_(
+            ParkingSlot.status == 'occupied',
+            VehicleEntry.entry_id == ParkingSlot.current_vehicle_id
+        )
+    ).outerjoin(
+        ParkingCustomer, and_(
+            ParkingSlot.status == 'reserved',
+            ParkingCustomer.customer_id == ParkingSlot.reserved_for,
+            ParkingCustomer.is_registered == True
+        )
+    ).all()
+
+
+def _lot_counts(session):
+    """Per-lot capacity and status counts as a single grouped aggregate"""
+    return session.query(
+        ParkingLot.vehicle_type,
+        ParkingLot.total_capacity,
+        func.coalesce(func.sum(case((ParkingSlot.status == 'occupied', 1), else_=0)), 0).label('occupied'),
+        func.coalesce(func.sum(case((ParkingSlot.status == 'reserved', 1), else_=0)), 0).label('reserved'),
+        func.coalesce(func.sum(case((ParkingSlot.status == 'available', 1), else_=0)), 0).label('available'),
+    ).outerjoin(
+        ParkingSlot, ParkingSlot.lot_id == ParkingLot.lot_id
+    ).group_by(
+        ParkingLot.lot_id, ParkingLot.vehicle_type, ParkingLot.total_capacity
+    ).all()
+
+
+def build_parking_status(session):
+    """The /parking/get-parking-status payload, built from two queries"""
+    slots = {
+        "car": {
+            "left": [],
+            "right": [],
+            "center": [],
+            "top": []
+        },
+        "motorcycle": [],
+        "bicycle": []
+    }
+
+    for row in _slot_rows(session):
+        slot_data = {
+            "id": str(row.slot_id),
+            "slot_number": row.slot_number,
+            "lot_id": row.lot_id,
+            "section": row.section,
+            "status": row.status,
+            "current_vehicle_id": str(row.current_vehicle_id) if row.current_vehicle_id else None,
+            "reserved_for": str(row.reserved_for) if row.reserved_for else None,
+            "plate_number": row.plate_number,
+            "reserved_customer_name": None,
+            "reserved_plate_number": None,
+        }
+
+        if row.reserved_plate_number is not None:
+            display_name = f"{row.first_name or ''} {row.last_name or ''}".strip()
+            slot_data["reserved_customer_name"] = display_name if display_name else "Unnamed Customer"
+            slot_data["reserved_plate_number"] = row.reserved_plate_number
+
+        # Categorize slots: cars by section, motorcycles/bicycles as flat lists
+        if row.vehicle_type == 'car':
+            if row.section in slots["car"]:
+                slots["car"][row.section].append(slot_data)
+        elif row.vehicle_type in ('motorcycle', 'bicycle'):
+            slots[row.vehicle_type].append(slot_data)
+
+    stats = {
+        vehicle_type: {"total": 0, "occupied": 0, "reserved": 0, "available": 0}
+        for vehicle_type in VEHICLE_TYPES
+    }
+    for lot in _lot_counts(session):
+        if lot.vehicle_type not in stats:
+            continue
+        totals = stats[lot.vehicle_type]
+        totals["total"] += lot.total_capacity or 0
+        totals["occupied"] += int(lot.occupied)
+        totals["reserved"] += int(lot.reserved)
+        totals["available"] += int(lot.available)
+
+    # Add capacity status for each vehicle type
+    for vehicle_type in stats:
+        if stats[vehicle_type]["total"] > 0:
+            occupied_ratio = stats[vehicle_type]["occupied"] / stats[vehicle_type]["total"]
+            stats[vehicle_type]["capacity_status"] = "High" if occupied_ratio > 0.8 else \
+                                                    "Medium" if occupied_ratio > 0.5 else "Low"
+        else:
+            stats[vehicle_type]["capacity_status"] = "N/A"
+
+    return {"slots": slots, "stats": stats}
+
+
+class ParkingStatusCache:
+    """
+    Versioned snapshot of the serialized parking status. Slot change events mark it
+    stale; the next request rebuilds it once and every dashboard shares the result.
+    The ETag is a hash of the body, so clients with the current version get a 304.
+    """
+
+    def __init__(self, ttl=PARKING_STATUS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._generation = 0  # bumped on every invalidation
+        self._built_generation = -1
+        self._built_at = 0
+        self.version = 0
+        self.body = None
+        self.etag = None
+        self.hits = 0
+        self.builds = 0
+        self._subscribed = False
+
+    def invalidate(self, payload=None):
+        with self._lock:
+            self._generation += 1
+
+    def _fresh(self):
+        return (self.body is not None
+                and self._built_generation == self._generation
+                and time.time() - self._built_at < self.ttl)
+
+    def get(self, session):
+        """(body, etag) for the current parking status, rebuilding only if invalidated"""
+        if not self._subscribed:
+            self._subscribed = True
+            event_bus.subscribe(SLOT_CHANGED, self.invalidate)
+            event_bus.subscribe(RESYNC, self.invalidate)
+
+        with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return self.body, self.etag
+
+        with self._build_lock:
+            with self._lock:
+                if self._fresh():
+                    self.hits += 1
+                    return self.body, self.etag
+                generation = self._generation
+
+            body = json.dumps({"success": True, "data": build_parking_status(session)})
+            etag = hashlib.md5(body.encode('utf-8')).hexdigest()
+
+            with self._lock:
+                if etag != self.etag:
+                    self.version += 1
+                self.body, self.etag = body, etag
+                # An invalidation that raced with the build leaves the snapshot stale
+                self._built_generation = generation
+                self._built_at = time.time()
+                self.builds += 1
+            return body, etag
+
+    def metrics(self):
+        with self._lock:
+            return {'version': self.version, 'hits': self.hits, 'builds': self.builds}
+
+
+parking_status_cache = ParkingStatusCache()
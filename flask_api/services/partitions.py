@@ -0,0 +1,156 @@
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+# Months of empty partitions kept ready ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+# Partitions whose month ended more than this many months ago get archived
+PARTITION_ARCHIVE_AFTER_MONTHS = int(os.getenv('PARTITION_ARCHIVE_AFTER_MONTHS', 12))
+# Archived partitions are written here as <dir>/<table>/<partition>.parquet
+PARTITION_ARCHIVE_DIR = os.getenv('PARTITION_ARCHIVE_DIR', 'archive')
+
+# table -> (partition column, services.export dataset)
+PARTITIONED_TABLES = {
+    'vehicle_entries': ('entry_time', 'entries'),
+    'vehicle_exits': ('exit_time', 'exits'),
+    'parking_sessions': ('start_time', 'sessions'),
+    'system_logs': ('timestamp', 'logs'),
+}
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(session, table):
+    if session.get_bind().dialect.name != 'postgresql':
+        return False
+    return session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+    ).scalar() == 'p'
+
+
+def list_partitions(session, table):
+    """Months of the monthly partitions currently attached to table"""
+    names = session.execute(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+    """), {'table': table}).scalars()
+    months = []
+    for name in names:
+        match = re.fullmatch(rf"{table}_p(\d{{4}})(\d{{2}})", name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _create_partition(session, table, column, month):
+    """
+    Create and attach one month's partition, moving any rows that already landed
+    in the default partition for that month (ATTACH would fail otherwise).
+    """
+    name = partition_name(table, month)
+    following = add_months(month, 1)
+    session.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = session.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {table}_default WHERE {column} >= :start AND {column} < :end RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), {'start': month, 'end': following}).rowcount
+    session.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{following}')"
+    ))
+    return moved
+
+
+def ensure_partitions(session, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create any missing partitions from the current month to months_ahead; returns their names"""
+    current = month_start(date.today())
+    created = []
+    for table, (column, _) in PARTITIONED_TABLES.items():
+        if not is_partitioned(session, table):
+            continue
+        existing = set(list_partitions(session, table))
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            moved = _create_partition(session, table, column, month)
+            session.commit()
+            created.append(partition_name(table, month))
+            print(f"✅ Created partition {partition_name(table, month)} ({moved} rows moved from default)")
+    return created
+
+
+def _write_parquet(dataset, month, path):
+    """Export one month of a dataset to path; returns the row count written"""
+    import pyarrow.parquet as pq
+    from services.export import export_stream
+
+    end = datetime.combine(add_months(month, 1), datetime.min.time()) - timedelta(microseconds=1)
+    stream, _, _ = export_stream(dataset, 'parquet', start=datetime.combine(month, datetime.min.time()), end=end)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for chunk in stream:
+            f.write(chunk)
+    rows = pq.read_metadata(tmp_path).num_rows
+    os.replace(tmp_path, path)
+    return rows
+
+
+def archive_partitions(session, older_than_months=PARTITION_ARCHIVE_AFTER_MONTHS,
+                       directory=PARTITION_ARCHIVE_DIR, keep_tables=False, dry_run=False):
+    """
+    Write every partition whose month ended more than older_than_months ago to
+    Parquet, check the file has every row, then detach (and unless keep_tables,
+    drop) the partition. Returns [(partition, rows, path)].
+    """
+    cutoff = add_months(month_start(date.today()), -older_than_months)
+    archived = []
+    for table, (_, dataset) in PARTITIONED_TABLES.items():
+        if not is_partitioned(session, table):
+            continue
+        for month in list_partitions(session, table):
+            if add_months(month, 1) > cutoff:
+                continue
+            name = partition_name(table, month)
+            if table == 'vehicle_entries' and session.execute(text(
+                f"SELECT 1 FROM parking_slots WHERE current_vehicle_id IN (SELECT entry_id FROM {name}) LIMIT 1"
+            )).first():
+                print(f"⚠️ Skipping {name}: a slot still points at one of its entries")
+                continue
+
+            rows = session.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            path = os.path.join(directory, table, f"{name}.parquet")
+            if dry_run:
+                archived.append((name, rows, path))
+                continue
+
+            if rows:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                written = _write_parquet(dataset, month, path)
+                if written != rows:
+                    raise RuntimeError(f"{name}: wrote {written} of {rows} rows to {path}, not detaching")
+            else:
+                path = None
+
+            session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if not keep_tables:
+                session.execute(text(f"DROP TABLE {name}"))
+            session.commit()
+            archived.append((name, rows, path))
+            print(f"✅ Archived {name}: {rows} rows{f' to {path}' if path else ''}")
+    return archived
@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from models.system_logs import SystemLog
+from models.parking_session import ParkingSession
+from models.traffic_rollup import TrafficRollup
+from utils.pagination import keyset_query, encode_cursor, explain
+from services.log_search import filter_logs
+from services.customer_search import page_query
+from services.parking_history import history_query
+from services.unassigned_feed import unassigned_query
+from services.slot_allocator import free_slot_query
+from services.export import export_query
+from services.turnover import daily_turnover_query
+from services.traffic_rollup import totals_query
+from detection_service.session_index import active_sessions_query, active_session_for_slot, latest_entry_query
+
+SAMPLE_PLATE = 'ABC1234'
+SAMPLE_ID = uuid.UUID(int=0)
+
+
+def _week():
+    end = datetime.now()
+    return end - timedelta(days=7), end
+
+
+def _deep_cursor():
+    """A cursor past the first page, so the keyset row comparison is in the plan too"""
+    return encode_cursor([datetime.now(), SAMPLE_ID])
+
+
+def _logs(**filters):
+    return lambda session: keyset_query(
+        filter_logs(session, **filters), SystemLog.timestamp, SystemLog.id, _deep_cursor(), 50
+    )
+
+
+# (name, session -> the app's own Query/select() for a hot path, index names the plan may use)
+PLAN_CHECKS = [
+    ('unassigned feed',
+     unassigned_query,
+     {'ix_vehicle_entries_unassigned'}),
+    ('exit detection: latest entry for plate',
+     lambda session: latest_entry_query(session, SAMPLE_PLATE, datetime.now()).limit(1),
+     {'ix_vehicle_entries_plate_time'}),
+    ('session index: open sessions',
+     active_sessions_query,
+     {'ix_parking_sessions_active_plate', 'ix_parking_sessions_start_time'}),
+    ('slot release: active session for slot',
+     lambda session: active_session_for_slot(session, SAMPLE_ID).limit(1),
+     {'ix_parking_sessions_slot_status'}),
+    ('parking history page',
+     lambda session: keyset_query(history_query(session), ParkingSession.start_time,
+                                  ParkingSession.session_id, _deep_cursor(), 100),
+     {'ix_parking_sessions_start_time'}),
+    ('parking history by plate',
+     lambda session: keyset_query(history_query(session, plate_number=SAMPLE_PLATE), ParkingSession.start_time,
+                                  ParkingSession.session_id, None, 100),
+     {'ix_parking_sessions_plate_status', 'ix_parking_sessions_start_time'}),
+    ('free slots by section and type',
+     lambda session: free_slot_query(session, 'top', 'car').limit(1),
+     {'ix_parking_slots_section_type_status'}),
+    ('customer search page',
+     lambda session: page_query(session, search='smith', limit=50),
+     {'ix_parking_customers_first_name_trgm', 'ix_parking_customers_last_name_trgm',
+      'ix_parking_customers_plate_trgm', 'ix_parking_customers_name_order'}),
+    ('customer search by short plate',
+     lambda session: page_query(session, plate_number='AB', limit=50),
+     {'ix_parking_customers_plate_prefix', 'ix_parking_customers_name_order'}),
+    ('entries export range',
+     lambda session: export_query('entries', *_week()),
+     {'ix_vehicle_entries_entry_time'}),
+    ('exits export range',
+     lambda session: export_query('exits', *_week()),
+     {'ix_vehicle_exits_exit_time'}),
+    ('daily turnover',
+     lambda session: daily_turnover_query(session, *_week()),
+     {'ix_vehicle_entries_entry_time', 'ix_parking_sessions_entry_id'}),
+    ('traffic rollup totals',
+     lambda session: totals_query(session, 'entry', *_week(), TrafficRollup.hour_bucket),
+     {'ix_traffic_rollups_direction_hour', 'traffic_rollups_pkey'}),
+    ('logs page',
+     _logs(),
+     {'ix_system_logs_timestamp_id'}),
+    ('logs by type',
+     _logs(log_type='user_action'),
+     {'ix_system_logs_type_timestamp_id'}),
+    ('logs by action',
+     _logs(action='block_user'),
+     {'ix_system_logs_action_timestamp_id'}),
+    ('logs full-text search',
+     _logs(search='block'),
+     {'ix_system_logs_search'}),
+]
+
+
+def _plan_indexes(node, found):
+    if 'Index Name' in node:
+        found.add(node['Index Name'])
+    for child in node.get('Plans', ()):
+        _plan_indexes(child, found)
+    return found
+
+
+def _parent_index(session, name):
+    """The partitioned-table index a partition's index was created from, or name itself"""
+    parent = session.execute(text("""
+        SELECT parent.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        WHERE child.relname = :name AND child.relkind = 'i'
+    """), {'name': name}).scalar()
+    return parent or name
+
+
+def check_plans(session, checks=PLAN_CHECKS):
+    """
+    EXPLAIN the query each hot path actually builds (compiled by the Postgres
+    dialect, bind parameters and all) with sequential scans disabled, and report
+    whether the planner picks one of the expected indexes. Small dev tables would
+    otherwise always seq scan; this checks the index is usable, not that it is
+    chosen at any given table size. Returns [(name, ok, indexes used)].
+    """
+    results = []
+    for name, build, expected in checks:
+        # SET LOCAL only lasts for this transaction; roll it back after each plan
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        try:
+            plan = explain(session, build(session))
+        finally:
+            session.rollback()
+        used = {_parent_index(session, index) for index in _plan_indexes(plan[0]['Plan'], set())}
+        results.append((name, bool(used & expected), sorted(used)))
+    return results
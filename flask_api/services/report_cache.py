@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from functools import wraps
+from collections import OrderedDict
+
+from flask import request, make_response, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.parking_session import ParkingSession
+
+from utils.redis_client import get_redis
+from services.event_bus import event_bus, ENTRY_CREATED, EXIT_CREATED, RESYNC
+
+# 'memory' caches per process; 'redis' shares results through the Redis used for OTPs
+REPORT_CACHE_BACKEND = os.getenv('REPORT_CACHE_BACKEND', 'memory')
+# Seconds a report covering "now" may be served before it is recomputed
+REPORT_CACHE_LIVE_TTL = int(os.getenv('REPORT_CACHE_LIVE_TTL', 60))
+# Upper bound on reports kept by the memory backend (least recently used are dropped)
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', 256))
+# Seconds a closed-range report is kept (Redis keys orphaned by a closed generation bump expire too)
+REPORT_CACHE_CLOSED_TTL = int(os.getenv('REPORT_CACHE_CLOSED_TTL', 7 * 24 * 3600))
+
+KEY_PREFIX = 'kotsek:report:'
+GENERATION_KEY = KEY_PREFIX + 'generation'
+CLOSED_GENERATION_KEY = KEY_PREFIX + 'closed-generation'
+
+
+def normalize_params(params):
+    """Drop empty values and order list-like values, so equivalent requests share a key"""
+    normalized = {}
+    for name, value in params.items():
+        if value is None or value == '':
+            continue
+        if name == 'sections':
+            value = ','.join(sorted({part.strip() for part in str(value).split(',') if part.strip()}))
+        normalized[name] = str(value)
+    return normalized
+
+
+class ReportCache:
+    """
+    Serialized analytics responses keyed by endpoint and normalized parameters.
+    Reports that include "now" expire after a short TTL and are also dropped on new
+    entries/exits: their keys carry a generation number that every such event bumps.
+    Reports over closed ranges are kept for REPORT_CACHE_CLOSED_TTL, but a session
+    that started before today can still finish and change their durations, so
+    their keys carry a second generation bumped whenever such a session changes.
+    """
+
+    def __init__(self, backend=REPORT_CACHE_BACKEND, live_ttl=REPORT_CACHE_LIVE_TTL,
+                 max_entries=REPORT_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.live_ttl = live_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at or None, body)
+        self._generation = 0
+        self._closed_generation = 0
+        self._subscribed = False
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def _redis(self):
+        return get_redis() if self.backend == 'redis' else None
+
+    def start(self):
+        if self._subscribed:
+            return
+        self._subscribed = True
+        event_bus.subscribe(ENTRY_CREATED, self.invalidate_live)
+        event_bus.subscribe(EXIT_CREATED, self.invalidate_live)
+        event_bus.subscribe(RESYNC, self.invalidate_live)
+
+    def _read_generation(self, redis_key, attr):
+        client = self._redis()
+        if client is not None:
+            try:
+                return int(client.get(redis_key) or 0)
+            except Exception as e:
+                print(f"⚠️ Report cache generation read failed: {e}")
+        with self._lock:
+            return getattr(self, attr)
+
+    def _bump_generation(self, redis_key, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+            self.invalidations += 1
+        client = self._redis()
+        if client is not None:
+            try:
+                client.incr(redis_key)
+            except Exception as e:
+                print(f"⚠️ Report cache invalidation failed: {e}")
+
+    def generation(self):
+        return self._read_generation(GENERATION_KEY, '_generation')
+
+    def closed_generation(self):
+        return self._read_generation(CLOSED_GENERATION_KEY, '_closed_generation')
+
+    def invalidate_live(self, payload=None):
+        """New traffic: every cached report that includes "now" is stale"""
+        self._bump_generation(GENERATION_KEY, '_generation')
+
+    def invalidate_closed(self):
+        """A session that started before today changed: closed-range reports may be stale"""
+        self._bump_generation(CLOSED_GENERATION_KEY, '_closed_generation')
+
+    def key(self, endpoint, params, live):
+        raw = json.dumps({
+            'endpoint': endpoint,
+            'params': normalize_params(params),
+            'generation': self.generation() if live else ['closed', self.closed_generation()],
+        }, sort_keys=True)
+        return KEY_PREFIX + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        body = None
+        client = self._redis()
+        if client is not None:
+            try:
+                body = client.get(key)
+            except Exception as e:
+                print(f"⚠️ Report cache read failed: {e}")
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    expires_at, cached = entry
+                    if expires_at is None or expires_at > time.time():
+                        self._entries.move_to_end(key)
+                        body = cached
+                    else:
+                        del self._entries[key]
+
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key, body, live):
+        client = self._redis()
+        if client is not None:
+            try:
+                client.set(key, body, ex=self.live_ttl if live else REPORT_CACHE_CLOSED_TTL)
+            except Exception as e:
+                print(f"⚠️ Report cache write failed: {e}")
+                return
+        else:
+            with self._lock:
+                self._entries[key] = (time.time() + (self.live_ttl if live else REPORT_CACHE_CLOSED_TTL), body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        with self._lock:
+            self.stores += 1
+
+    def clear(self):
+        """Drop every cached report (e.g. after historical data was rebuilt)"""
+        with self._lock:
+            self._entries.clear()
+        client = self._redis()
+        if client is not None:
+            try:
+                keys = [key for key in client.scan_iter(KEY_PREFIX + '*')
+                        if key not in (GENERATION_KEY, CLOSED_GENERATION_KEY)]
+                if keys:
+                    client.delete(*keys)
+            except Exception as e:
+                print(f"⚠️ Report cache clear failed: {e}")
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'stores': self.stores,
+                'invalidations': self.invalidations,
+                'memory_entries': len(self._entries),
+            }
+
+
+report_cache = ReportCache()
+
+
+def utc_today():
+    """Start of the current UTC day; session times are stored with datetime.utcnow"""
+    return datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+
+def ends_before_today(params, name='end_date'):
+    """True when the request's end date (YYYY-MM-DD) is a day that is already over"""
+    try:
+        end = datetime.strptime(params.get(name, ''), '%Y-%m-%d').date()
+    except ValueError:
+        return False
+    return end < utc_today().date()
+
+
+def cached_report(endpoint, is_closed=None):
+    """
+    Serve a view's JSON from the report cache. `is_closed(params)` says whether the
+    requested range lies entirely in the past; without it every range counts as live.
+    Only 200 JSON responses are stored. Put it below the auth decorators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            report_cache.start()
+            params = dict(request.args.items())
+            params.update(kwargs)
+            live = not (is_closed and is_closed(params))
+            key = report_cache.key(endpoint, params, live)
+
+            body = report_cache.get(key)
+            if body is not None:
+                return Response(body, mimetype='application/json', headers={'X-Cache': 'HIT'})
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                report_cache.set(key, response.get_data(as_text=True), live)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+# -----------------------------------
+# Invalidate closed-range reports when an older session changes
+# -----------------------------------
+# Duration and per-slot sections count sessions that *started* in the range, so a
+# session that started before today and finishes now changes past reports.
+
+def mark_closed_stale(session, start_time):
+    """For bulk updates (no flush events): a session starting at start_time changed"""
+    if start_time is not None and start_time < utc_today():
+        session.info['report_cache_closed_stale'] = True
+
+
+def _collect_closed_changes(session, flush_context):
+    today = utc_today()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, ParkingSession) or obj.start_time is None:
+            continue
+        if obj.start_time < today and (obj in session.new or obj in session.deleted
+                                       or inspect(obj).attrs.status.history.has_changes()
+                                       or inspect(obj).attrs.duration_minutes.history.has_changes()
+                                       or inspect(obj).attrs.end_time.history.has_changes()):
+            session.info['report_cache_closed_stale'] = True
+            return
+
+
+def _apply_closed_changes(session):
+    if session.info.pop('report_cache_closed_stale', False):
+        report_cache.invalidate_closed()
+
+
+def _discard_closed_changes(session, *args):
+    session.info.pop('report_cache_closed_stale', None)
+
+
+event.listen(Session, 'after_flush', _collect_closed_changes)
+event.listen(Session, 'after_commit', _apply_closed_changes)
+event.listen(Session, 'after_soft_rollback', _discard_closed_changes)
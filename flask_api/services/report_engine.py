@@ -0,0 +1,362 @@
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import func
+
+from models.parking_session import ParkingSession
+from models.parking_slot import ParkingSlot
+from models.parking_lot import ParkingLot
+from models.customer import ParkingCustomer
+from models.traffic_rollup import TrafficRollup
+from services.traffic_rollup import ENTRY, EXIT, hour_bucket
+
+# Report sections in the order they appear, as named by ?sections=
+SECTIONS = ('summary', 'daily', 'hourly', 'utilization', 'customers', 'duration')
+TRAFFIC_SECTIONS = {'summary', 'daily', 'hourly'}
+SESSION_SECTIONS = {'summary', 'utilization', 'customers', 'duration'}
+
+DURATION_RANGES = [
+    ('< 30 min', 0, 30),
+    ('30-60 min', 30, 60),
+    ('1-2 hours', 60, 120),
+    ('2-4 hours', 120, 240),
+    ('4-8 hours', 240, 480),
+    ('> 8 hours', 480, None)
+]
+
+
+def format_duration(minutes):
+    """
+    Format minutes into human-readable duration
+    """
+    if minutes < 60:
+        return f"{minutes} min"
+    elif minutes < 60 * 24:
+        hours = minutes // 60
+        mins = minutes % 60
+        return f"{hours}h {mins}m"
+    else:
+        days = minutes // (60 * 24)
+        hours = (minutes % (60 * 24)) // 60
+        return f"{days}d {hours}h"
+
+
+def _value(value):
+    """numpy scalar / NaN -> plain Python value for jsonify"""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _minutes(value):
+    value = _value(value)
+    return int(round(value)) if value is not None else 0
+
+
+# -----------------------------------
+# Data: one read per source for the whole range
+# -----------------------------------
+
+def _traffic_frame(session, start_date, end_date):
+    """Hourly entry/exit counts per vehicle type for the range, from the traffic rollup"""
+    rows = session.query(
+        TrafficRollup.hour_bucket,
+        TrafficRollup.vehicle_type,
+        TrafficRollup.direction,
+        func.sum(TrafficRollup.count).label('count')
+    ).filter(
+        TrafficRollup.direction.in_((ENTRY, EXIT)),
+        TrafficRollup.hour_bucket >= hour_bucket(start_date),
+        TrafficRollup.hour_bucket <= end_date
+    ).group_by(
+        TrafficRollup.hour_bucket,
+        TrafficRollup.vehicle_type,
+        TrafficRollup.direction
+    ).all()
+
+    frame = pd.DataFrame(rows, columns=['hour_bucket', 'vehicle_type', 'direction', 'count'])
+    frame['hour_bucket'] = pd.to_datetime(frame['hour_bucket'])
+    frame['count'] = pd.to_numeric(frame['count']).fillna(0).astype(int)
+    return frame
+
+
+def _session_frame(session, start_date, end_date):
+    """Every session started in the range with its slot, lot and customer columns"""
+    rows = session.query(
+        ParkingSession.session_id,
+        ParkingSession.duration_minutes,
+        ParkingSlot.slot_id,
+        ParkingSlot.slot_number,
+        ParkingSlot.section,
+        ParkingLot.name.label('lot_name'),
+        ParkingCustomer.customer_id,
+        ParkingCustomer.first_name,
+        ParkingCustomer.last_name,
+        ParkingCustomer.vehicle_type,
+    ).join(
+        ParkingSlot, ParkingSlot.slot_id == ParkingSession.slot_id
+    ).join(
+        ParkingLot, ParkingLot.lot_id == ParkingSlot.lot_id
+    ).join(
+        ParkingCustomer, ParkingCustomer.customer_id == ParkingSession.customer_id
+    ).filter(
+        ParkingSession.start_time >= start_date,
+        ParkingSession.start_time <= end_date
+    ).all()
+
+    frame = pd.DataFrame(rows, columns=[
+        'session_id', 'duration_minutes', 'slot_id', 'slot_number', 'section',
+        'lot_name', 'customer_id', 'first_name', 'last_name', 'vehicle_type'
+    ])
+    frame['duration_minutes'] = pd.to_numeric(frame['duration_minutes'])
+    return frame
+
+
+def _direction_counts(traffic, direction, key, index):
+    """Counts for one direction grouped by key(rows), reindexed so missing groups are 0"""
+    rows = traffic[traffic['direction'] == direction]
+    return rows.groupby(key(rows))['count'].sum().reindex(index, fill_value=0)
+
+
+# -----------------------------------
+# Sections
+# -----------------------------------
+
+def _summary(traffic, sessions):
+    entries = traffic[traffic['direction'] == ENTRY]
+    total_entries = int(entries['count'].sum())
+    total_exits = int(traffic.loc[traffic['direction'] == EXIT, 'count'].sum())
+    by_type = entries.groupby('vehicle_type')['count'].sum()
+
+    avg_duration = _value(sessions['duration_minutes'].mean())
+    avg_duration_formatted = "N/A"
+    if avg_duration:
+        hours = int(avg_duration // 60)
+        minutes = int(avg_duration % 60)
+        avg_duration_formatted = f"{hours}h {minutes}m"
+
+    return {
+        "section_title": "Traffic Overview",
+        "total_entries": total_entries,
+        "total_exits": total_exits,
+        "total_traffic": total_entries + total_exits,
+        "vehicle_type_distribution": {vt: int(count) for vt, count in by_type.items()},
+        "average_parking_duration": {
+            "minutes": round(avg_duration) if avg_duration else 0,
+            "formatted": avg_duration_formatted
+        }
+    }
+
+
+def _daily(traffic, start_date, end_date):
+    days = pd.date_range(start_date.date(), end_date.date(), freq='D')
+    by_day = lambda rows: rows['hour_bucket'].dt.normalize()
+    entries = _direction_counts(traffic, ENTRY, by_day, days)
+    exits = _direction_counts(traffic, EXIT, by_day, days)
+
+    daily_traffic = [{
+        'date': day.strftime('%Y-%m-%d'),
+        'day_name': day.strftime('%A'),
+        'entries': int(entry_count),
+        'exits': int(exit_count),
+        'total': int(entry_count + exit_count)
+    } for day, entry_count, exit_count in zip(days, entries.values, exits.values)]
+
+    return {
+        "section_title": "Daily Traffic Breakdown",
+        "daily_data": daily_traffic,
+        "busiest_day": max(daily_traffic, key=lambda x: x['total']) if daily_traffic else None
+    }
+
+
+def _hourly(traffic):
+    hours = range(24)
+    by_hour = lambda rows: rows['hour_bucket'].dt.hour
+    entries = _direction_counts(traffic, ENTRY, by_hour, hours)
+    exits = _direction_counts(traffic, EXIT, by_hour, hours)
+
+    hourly_traffic = [{
+        'hour': hour,
+        'hour_display': f"{hour:02d}:00 - {hour:02d}:59",
+        'entries': int(entry_count),
+        'exits': int(exit_count),
+        'total': int(entry_count + exit_count)
+    } for hour, entry_count, exit_count in zip(hours, entries.values, exits.values)]
+
+    return {
+        "section_title": "Hourly Traffic Patterns",
+        "hourly_data": hourly_traffic,
+        "peak_entry_hour": max(hourly_traffic, key=lambda x: x['entries']),
+        "peak_exit_hour": max(hourly_traffic, key=lambda x: x['exits'])
+    }
+
+
+def _utilization(sessions):
+    slot_keys = ['slot_id', 'slot_number', 'section', 'lot_name']
+    slot_minutes = sessions.dropna(subset=['duration_minutes'])\
+        .groupby(slot_keys, dropna=False)['duration_minutes'].sum()\
+        .nlargest(10)
+
+    top_slots = []
+    for (slot_id, slot_number, section, lot_name), minutes in slot_minutes.items():
+        minutes = _minutes(minutes)
+        if minutes < 60:
+            formatted_duration = f"{minutes} minutes"
+        else:
+            formatted_duration = f"{minutes // 60}h {minutes % 60}m"
+
+        top_slots.append({
+            'slot_id': str(slot_id),
+            'slot_number': _value(slot_number),
+            'section': section,
+            'lot_name': lot_name,
+            'total_hours': round(minutes / 60, 2),
+            'total_minutes': minutes,
+            'formatted_duration': formatted_duration
+        })
+
+    section_usage = sessions.groupby(['section', 'lot_name'], dropna=False).agg(
+        total_minutes=('duration_minutes', 'sum'),
+        session_count=('session_id', 'count')
+    ).sort_values('total_minutes', ascending=False)
+
+    section_stats = []
+    for (section, lot_name), row in section_usage.iterrows():
+        minutes = _minutes(row['total_minutes'])
+        section_stats.append({
+            'section': section,
+            'lot_name': lot_name,
+            'total_hours': round(minutes / 60, 2),
+            'session_count': int(row['session_count']),
+            'formatted_duration': format_duration(minutes)
+        })
+
+    return {
+        "section_title": "Parking Slot Utilization",
+        "top_utilized_slots": top_slots,
+        "section_statistics": section_stats
+    }
+
+
+def _customers(sessions):
+    customer_keys = ['customer_id', 'first_name', 'last_name', 'vehicle_type']
+    top_customers = sessions.groupby(customer_keys, dropna=False).agg(
+        visit_count=('session_id', 'count'),
+        total_minutes=('duration_minutes', 'sum')
+    ).sort_values('visit_count', ascending=False, kind='mergesort').head(10)
+
+    top_customer_data = []
+    for (customer_id, first_name, last_name, vehicle_type), row in top_customers.iterrows():
+        minutes = _minutes(row['total_minutes'])
+        top_customer_data.append({
+            'customer_id': str(customer_id),
+            'name': f"{first_name} {last_name}",
+            'vehicle_type': _value(vehicle_type),
+            'visits': int(row['visit_count']),
+            'total_parking_time': {
+                'minutes': minutes,
+                'hours': round(minutes / 60, 2),
+                'formatted': format_duration(minutes)
+            }
+        })
+
+    # Favorite spots of the top 5, from the same frame instead of a query per customer
+    favorites = top_customers.head(5).reset_index()
+    spot_usage = sessions[sessions['customer_id'].isin(favorites['customer_id'])]\
+        .groupby(['customer_id', 'slot_id', 'slot_number', 'section', 'lot_name'], dropna=False)\
+        .size().rename('usage_count').reset_index()\
+        .sort_values('usage_count', ascending=False, kind='mergesort')\
+        .groupby('customer_id').head(3)
+    spots_by_customer = {customer_id: rows for customer_id, rows in spot_usage.groupby('customer_id')}
+
+    customer_favorite_spots = []
+    for customer in favorites.itertuples(index=False):
+        rows = spots_by_customer.get(customer.customer_id)
+        if rows is None or rows.empty:
+            continue
+        customer_favorite_spots.append({
+            'customer_id': str(customer.customer_id),
+            'name': f"{customer.first_name} {customer.last_name}",
+            'favorite_spots': [{
+                'slot_number': _value(spot.slot_number),
+                'section': spot.section,
+                'lot_name': spot.lot_name,
+                'usage_count': int(spot.usage_count)
+            } for spot in rows.itertuples(index=False)]
+        })
+
+    return {
+        "section_title": "Customer Analytics",
+        "top_customers": top_customer_data,
+        "customer_favorite_spots": customer_favorite_spots
+    }
+
+
+def _duration(sessions):
+    labels = [label for label, _, _ in DURATION_RANGES]
+    bins = [low for _, low, _ in DURATION_RANGES] + [float('inf')]
+    buckets = pd.cut(sessions['duration_minutes'], bins=bins, labels=labels, right=False)
+    counts = buckets.value_counts().reindex(labels, fill_value=0)
+
+    return {
+        "section_title": "Parking Duration Analysis",
+        "duration_distribution": {label: int(count) for label, count in counts.items()}
+    }
+
+
+def build_summary_sections(session, start_date, end_date, sections=None):
+    """
+    Report sections for [start_date, end_date], in SECTIONS order. Traffic comes
+    from the hourly rollup and sessions from a single joined query, each read at
+    most once; only the requested sections (all when `sections` is empty) are
+    built, and only the sources they need are read.
+    """
+    wanted = [name for name in SECTIONS if not sections or name in sections]
+    traffic = _traffic_frame(session, start_date, end_date) if TRAFFIC_SECTIONS & set(wanted) else None
+    sessions = _session_frame(session, start_date, end_date) if SESSION_SECTIONS & set(wanted) else None
+
+    builders = {
+        'summary': lambda: _summary(traffic, sessions),
+        'daily': lambda: _daily(traffic, start_date, end_date),
+        'hourly': lambda: _hourly(traffic),
+        'utilization': lambda: _utilization(sessions),
+        'customers': lambda: _customers(sessions),
+        'duration': lambda: _duration(sessions),
+    }
+    return [builders[name]() for name in wanted]
+
+
+def parse_report_range(start_date_str, end_date_str):
+    """Whole days from YYYY-MM-DD strings; ValueError with a client-facing message otherwise"""
+    if not start_date_str or not end_date_str:
+        raise ValueError('Both start_date and end_date are required')
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999)
+    except ValueError:
+        raise ValueError('Invalid date format. Please use YYYY-MM-DD')
+    return start_date, end_date
+
+
+def build_weekly_report(session, start_date_str, end_date_str, sections=None, generated_by='System'):
+    """The full /analytics/weekly-summary document (also run as a background job)"""
+    start_date, end_date = parse_report_range(start_date_str, end_date_str)
+    if isinstance(sections, str):
+        sections = set(sections.split(",")) if sections else None
+
+    return {
+        "report_title": "Parking System Summary Report",
+        "date_range": {
+            "start_date": start_date_str,
+            "end_date": end_date_str,
+            "display_range": f"{start_date.strftime('%B %d, %Y')} - {end_date.strftime('%B %d, %Y')}"
+        },
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
+        "generated_by": generated_by,
+        "sections": build_summary_sections(session, start_date, end_date, sections)
+    }
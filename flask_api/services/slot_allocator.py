@@ -0,0 +1,262 @@
+import heapq
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.parking_slot import ParkingSlot
+from services.event_bus import publish_on_commit, SLOT_CHANGED
+
+SlotInfo = namedtuple("SlotInfo", ["slot_id", "slot_number", "section", "vehicle_type", "lot_id"])
+
+
+def slot_changed_payload(info, status, previous_status, current_vehicle_id=None, created=False):
+    """Small delta describing one slot transition, as published on the event bus"""
+    return {
+        'slot_id': info.slot_id,
+        'slot_number': info.slot_number,
+        'section': info.section,
+        'vehicle_type': info.vehicle_type,
+        'lot_id': info.lot_id,
+        'status': status,
+        'previous_status': previous_status,
+        'current_vehicle_id': current_vehicle_id,
+        'created': created,  # a newly inserted slot (previous_status is then None too)
+    }
+
+
+def free_slot_query(session, section, vehicle_type):
+    """Free active slots of a section and vehicle type, lowest number first"""
+    return session.query(ParkingSlot)\
+        .filter_by(section=section, vehicle_type=vehicle_type, status='available', is_active=True)\
+        .order_by(ParkingSlot.slot_number.asc())
+
+
+def _info_from_model(slot):
+    return SlotInfo(
+        slot_id=slot.slot_id,
+        slot_number=slot.slot_number,
+        section=slot.section,
+        vehicle_type=slot.vehicle_type,
+        lot_id=slot.lot_id,
+    )
+
+
+class SlotAllocator:
+    """
+    Keeps the free slots of every (section, vehicle_type) pair in memory so entry
+    handling can pick the lowest numbered free slot without scanning parking_slots.
+
+    The in-memory lists only decide which slot to *try*; the claim itself is a
+    conditional UPDATE (status still 'available'), so two guards or two cameras can
+    never end up in the same slot. A claim that loses the race just moves on to the
+    next candidate.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._slots = {}  # slot_id -> SlotInfo (every active slot)
+        self._free = set()  # slot_ids believed to be available
+        self._heaps = {}  # (section, vehicle_type) -> [(slot_number, str(slot_id), slot_id)]
+
+    def load(self, session):
+        """(Re)build the free lists from parking_slots"""
+        rows = session.query(ParkingSlot).filter(ParkingSlot.is_active == True).all()
+
+        with self._lock:
+            self._slots = {}
+            self._free = set()
+            self._heaps = {}
+            for slot in rows:
+                self._slots[slot.slot_id] = _info_from_model(slot)
+                if slot.status == 'available':
+                    self._push(slot.slot_id)
+            self.loaded = True
+
+        print(f"✅ Slot allocator loaded: {len(self._free)} free of {len(self._slots)} slots")
+
+    def ensure_loaded(self, session):
+        if not self.loaded:
+            self.load(session)
+
+    # Alias used by the startup hook; reconciling is simply a reload from the DB
+    reconcile = load
+
+    def _push(self, slot_id):
+        info = self._slots.get(slot_id)
+        if info is None or slot_id in self._free:
+            return
+        self._free.add(slot_id)
+        heap = self._heaps.setdefault((info.section, info.vehicle_type), [])
+        heapq.heappush(heap, (info.slot_number, str(slot_id), slot_id))
+
+    def _pop(self, section, vehicle_type):
+        """Take the lowest numbered free slot of a section out of the free list"""
+        heap = self._heaps.get((section, vehicle_type))
+        while heap:
+            _, _, slot_id = heapq.heappop(heap)
+            # Entries are removed lazily, skip anything no longer free
+            if slot_id in self._free:
+                self._free.discard(slot_id)
+                return self._slots[slot_id]
+        return None
+
+    def mark_free(self, slot_id, info=None):
+        with self._lock:
+            if info is not None:
+                self._slots[slot_id] = info
+            self._push(slot_id)
+
+    def mark_taken(self, slot_id, info=None):
+        with self._lock:
+            if info is not None:
+                self._slots[slot_id] = info
+            self._free.discard(slot_id)
+
+    def forget(self, slot_id):
+        with self._lock:
+            self._free.discard(slot_id)
+            self._slots.pop(slot_id, None)
+
+    def info(self, slot_id):
+        with self._lock:
+            return self._slots.get(slot_id)
+
+    def free_count(self, section=None, vehicle_type=None):
+        with self._lock:
+            return sum(
+                1 for slot_id in self._free
+                if (section is None or self._slots[slot_id].section == section)
+                and (vehicle_type is None or self._slots[slot_id].vehicle_type == vehicle_type)
+            )
+
+    def _try_claim(self, session, slot_id, entry_id):
+        """Atomically flip one slot from available to occupied; False if someone beat us to it"""
+        updated = session.query(ParkingSlot)\
+            .filter(ParkingSlot.slot_id == slot_id,
+                    ParkingSlot.status == 'available',
+                    ParkingSlot.is_active == True)\
+            .update({
+                'status': 'occupied',
+                'current_vehicle_id': entry_id,
+                'updated_at': datetime.now()
+            }, synchronize_session=False)
+        if updated:
+            # Give the slot back to the free list if this transaction rolls back
+            session.info.setdefault('slot_allocator_claims', []).append(slot_id)
+            info = self.info(slot_id)
+            if info is not None:
+                publish_on_commit(session, SLOT_CHANGED,
+                                  slot_changed_payload(info, 'occupied', 'available', entry_id))
+        return bool(updated)
+
+    def _claim_from_db(self, session, section, vehicle_type, entry_id):
+        """Fallback when the free list is empty or stale: lock a free row, skipping locked ones"""
+        slot = free_slot_query(session, section, vehicle_type)\
+            .with_for_update(skip_locked=True)\
+            .first()
+        if slot is None:
+            return None
+        info = _info_from_model(slot)
+        with self._lock:
+            self._slots[info.slot_id] = info
+        if self._try_claim(session, info.slot_id, entry_id):
+            return info
+        return None
+
+    def claim(self, session, sections, vehicle_type, entry_id):
+        """
+        Claim the first free slot from the given sections (in order of preference) for
+        entry_id inside the caller's transaction. Returns the SlotInfo or None.
+        """
+        for section in sections:
+            while True:
+                with self._lock:
+                    info = self._pop(section, vehicle_type)
+                if info is None:
+                    break
+                if self._try_claim(session, info.slot_id, entry_id):
+                    return info
+                print(f"⚠️ Slot {info.section}-{info.slot_number} was taken concurrently, trying next")
+
+            info = self._claim_from_db(session, section, vehicle_type, entry_id)
+            if info is not None:
+                print(f"⚠️ Slot {info.section}-{info.slot_number} claimed from DB (free list was stale)")
+                return info
+        return None
+
+    def claim_slot(self, session, slot_id, entry_id):
+        """Claim a specific slot (manual assignment); False if it is no longer available"""
+        with self._lock:
+            self._free.discard(slot_id)
+        return self._try_claim(session, slot_id, entry_id)
+
+    def queue_release(self, session, slot_id):
+        """Return a slot to the free list once the caller's transaction commits (for bulk updates)"""
+        session.info.setdefault('slot_allocator_ops', []).append(('free', slot_id, None))
+        info = self.info(slot_id)
+        if info is not None:
+            publish_on_commit(session, SLOT_CHANGED, slot_changed_payload(info, 'available', 'occupied'))
+
+    def __len__(self):
+        return len(self._free)
+
+
+slot_allocator = SlotAllocator()
+
+
+# -----------------------------------
+# Keep the free lists in sync with ORM writes (release, reserve, admin edits)
+# -----------------------------------
+
+def _collect_slot_changes(session, flush_context):
+    ops = session.info.setdefault('slot_allocator_ops', [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ParkingSlot):
+            attrs = inspect(obj).attrs
+            created = obj in session.new
+            if created or attrs.status.history.has_changes() or attrs.current_vehicle_id.history.has_changes():
+                # previous_status is None when only current_vehicle_id changed
+                previous = attrs.status.history.deleted
+                publish_on_commit(session, SLOT_CHANGED, slot_changed_payload(
+                    _info_from_model(obj), obj.status, previous[0] if previous else None,
+                    obj.current_vehicle_id, created=created))
+            if obj.is_active is False:
+                ops.append(('forget', obj.slot_id, None))
+            elif obj.status == 'available':
+                ops.append(('free', obj.slot_id, _info_from_model(obj)))
+            else:
+                ops.append(('taken', obj.slot_id, _info_from_model(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, ParkingSlot):
+            ops.append(('forget', obj.slot_id, None))
+
+
+def _apply_slot_changes(session):
+    session.info.pop('slot_allocator_claims', None)
+    ops = session.info.pop('slot_allocator_ops', None)
+    if not ops or not slot_allocator.loaded:
+        return
+    for op, slot_id, info in ops:
+        if op == 'free':
+            slot_allocator.mark_free(slot_id, info)
+        elif op == 'taken':
+            slot_allocator.mark_taken(slot_id, info)
+        elif op == 'forget':
+            slot_allocator.forget(slot_id)
+
+
+def _discard_slot_changes(session, *args):
+    session.info.pop('slot_allocator_ops', None)
+    claims = session.info.pop('slot_allocator_claims', None)
+    if claims and slot_allocator.loaded:
+        for slot_id in claims:
+            slot_allocator.mark_free(slot_id)
+
+
+event.listen(Session, 'after_flush', _collect_slot_changes)
+event.listen(Session, 'after_commit', _apply_slot_changes)
+event.listen(Session, 'after_soft_rollback', _discard_slot_changes)
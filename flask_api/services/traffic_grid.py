@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+from models.traffic_rollup import TrafficRollup
+from services.traffic_rollup import ENTRY, EXIT, hour_bucket
+
+HOURS = list(range(24))
+# Hours shown per day by /reg/traffic/prediction (00:00, 12:00, 23:00)
+PREDICTION_HOURS = [0, 12, 23]
+
+
+def hourly_grid(session, start_date, end_date):
+    """
+    (days, entries, exits) where entries/exits are dense day x hour count matrices
+    for every day in the range, filled from one rollup query with np.add.at.
+    """
+    days = pd.date_range(start=start_date.date(), end=end_date.date(), freq='D')
+    grids = {
+        ENTRY: np.zeros((len(days), 24), dtype=np.int64),
+        EXIT: np.zeros((len(days), 24), dtype=np.int64),
+    }
+
+    rows = session.query(
+        TrafficRollup.hour_bucket,
+        TrafficRollup.direction,
+        func.sum(TrafficRollup.count)
+    ).filter(
+        TrafficRollup.direction.in_((ENTRY, EXIT)),
+        TrafficRollup.hour_bucket >= hour_bucket(start_date),
+        TrafficRollup.hour_bucket <= end_date
+    ).group_by(
+        TrafficRollup.hour_bucket,
+        TrafficRollup.direction
+    ).all()
+
+    if rows and len(days):
+        frame = pd.DataFrame(rows, columns=['hour_bucket', 'direction', 'count'])
+        stamps = pd.to_datetime(frame['hour_bucket'])
+        day_index = ((stamps.dt.normalize() - days[0]) // pd.Timedelta(days=1)).to_numpy()
+        hour_index = stamps.dt.hour.to_numpy()
+        counts = pd.to_numeric(frame['count']).fillna(0).astype(np.int64).to_numpy()
+        in_range = (day_index >= 0) & (day_index < len(days))
+
+        for direction, grid in grids.items():
+            mask = in_range & (frame['direction'] == direction).to_numpy()
+            np.add.at(grid, (day_index[mask], hour_index[mask]), counts[mask])
+
+    return days, grids[ENTRY], grids[EXIT]
+
+
+def heatmap_payload(days, counts, columnar=False):
+    """
+    {day: {hour: count}} for the non-empty cells, or with columnar=True
+    {'days', 'hours', 'counts'} where counts is a days x 24 array.
+    """
+    labels = days.strftime('%Y-%m-%d').tolist()
+    if columnar:
+        return {'days': labels, 'hours': HOURS, 'counts': counts.tolist()}
+
+    heatmap_data = {}
+    day_index, hour_index = np.nonzero(counts)
+    for day, hour, count in zip(day_index.tolist(), hour_index.tolist(), counts[day_index, hour_index].tolist()):
+        heatmap_data.setdefault(labels[day], {})[str(hour)] = count
+    return heatmap_data
+
+
+def prediction_payload(days, entries, exits, hours=PREDICTION_HOURS, columnar=False):
+    """
+    Entries, exits and net change at the given hours of every day: a flat list of
+    {date, hour, entries, exits, net_change}, or with columnar=True day x hour arrays.
+    """
+    labels = days.strftime('%Y-%m-%d').tolist()
+    entry_counts = entries[:, hours].astype(float)
+    exit_counts = exits[:, hours].astype(float)
+    net_change = entry_counts - exit_counts
+
+    if columnar:
+        return {
+            'dates': labels,
+            'hours': list(hours),
+            'entries': entry_counts.round(2).tolist(),
+            'exits': exit_counts.round(2).tolist(),
+            'net_change': net_change.round(2).tolist(),
+        }
+
+    return [
+        {
+            'date': date,
+            'hour': hour,
+            'entries': round(entry_count, 2),
+            'exits': round(exit_count, 2),
+            'net_change': round(change, 2)
+        }
+        for date, hour, entry_count, exit_count, change in zip(
+            np.repeat(labels, len(hours)).tolist(),
+            np.tile(hours, len(labels)).tolist(),
+            entry_counts.ravel().tolist(),
+            exit_counts.ravel().tolist(),
+            net_change.ravel().tolist()
+        )
+    ]
@@ -0,0 +1,182 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, inspect, func, text
+from sqlalchemy.orm import Session
+
+from models.traffic_rollup import TrafficRollup
+from models.vehicle_entry import VehicleEntry
+from models.vehicle_exit import VehicleExit
+from models.parking_session import ParkingSession
+
+ENTRY = 'entry'
+EXIT = 'exit'
+SESSION = 'session'
+
+
+def hour_bucket(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert(connection, increments):
+    """
+    Add {(hour_bucket, lot_id, vehicle_type, direction): [count, duration]} to the
+    rollup rows in one statement, creating rows as needed.
+    """
+    if not increments:
+        return
+    now = datetime.utcnow()
+    rows = [{
+        'hour_bucket': bucket,
+        'lot_id': lot_id or '',
+        'vehicle_type': vehicle_type or '',
+        'direction': direction,
+        'count': count,
+        'duration_sum': duration,
+        'updated_at': now,
+    } for (bucket, lot_id, vehicle_type, direction), (count, duration) in increments.items()]
+
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    table = TrafficRollup.__table__
+    if insert is not None:
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['hour_bucket', 'lot_id', 'vehicle_type', 'direction'],
+            set_={
+                'count': table.c.count + stmt.excluded.count,
+                'duration_sum': table.c.duration_sum + stmt.excluded.duration_sum,
+                'updated_at': stmt.excluded.updated_at,
+            }
+        )
+        connection.execute(stmt)
+        return
+
+    # Generic fallback: update, insert when nothing matched
+    for row in rows:
+        key = (table.c.hour_bucket == row['hour_bucket']) & (table.c.lot_id == row['lot_id']) & \
+              (table.c.vehicle_type == row['vehicle_type']) & (table.c.direction == row['direction'])
+        result = connection.execute(table.update().where(key).values(
+            count=table.c.count + row['count'],
+            duration_sum=table.c.duration_sum + row['duration_sum'],
+            updated_at=row['updated_at']))
+        if not result.rowcount:
+            connection.execute(table.insert().values(**row))
+
+
+def record(session, direction, when, vehicle_type=None, lot_id=None, duration=0):
+    """Count one event in the caller's transaction (used by bulk updates that skip ORM events)"""
+    if when is None:
+        return
+    _upsert(session.connection(), {(hour_bucket(when), lot_id, vehicle_type, direction): [1, duration or 0]})
+
+
+def _session_vehicle_type(slot_id):
+    from services.slot_allocator import slot_allocator
+    info = slot_allocator.info(slot_id)
+    return info.vehicle_type if info else None
+
+
+# -----------------------------------
+# Keep the rollup current from ORM writes, inside the same transaction
+# -----------------------------------
+
+def _collect_traffic(session, flush_context):
+    increments = defaultdict(lambda: [0, 0])
+
+    for obj in session.new:
+        if isinstance(obj, VehicleEntry) and obj.entry_time:
+            increments[(hour_bucket(obj.entry_time), None, obj.vehicle_type, ENTRY)][0] += 1
+        elif isinstance(obj, VehicleExit) and obj.exit_time:
+            increments[(hour_bucket(obj.exit_time), None, obj.vehicle_type, EXIT)][0] += 1
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ParkingSession) and obj.status == 'completed' and obj.end_time:
+            history = inspect(obj).attrs.status.history
+            if obj in session.new or (history.has_changes() and 'completed' not in (history.deleted or ())):
+                key = (hour_bucket(obj.end_time), obj.lot_id, _session_vehicle_type(obj.slot_id), SESSION)
+                increments[key][0] += 1
+                increments[key][1] += obj.duration_minutes or 0
+
+    if increments:
+        _upsert(session.connection(), increments)
+
+
+event.listen(Session, 'after_flush', _collect_traffic)
+
+
+# -----------------------------------
+# Backfill (flask backfill-rollups)
+# -----------------------------------
+
+BACKFILL_SQL = {
+    ENTRY: """
+        SELECT date_trunc('hour', entry_time) AS hour_bucket, '' AS lot_id,
+               COALESCE(vehicle_type, '') AS vehicle_type, 'entry' AS direction,
+               COUNT(*) AS count, 0 AS duration_sum
+        FROM vehicle_entries
+        WHERE entry_time >= :start AND entry_time < :end
+        GROUP BY 1, 2, 3
+    """,
+    EXIT: """
+        SELECT date_trunc('hour', exit_time), '', COALESCE(vehicle_type, ''), 'exit',
+               COUNT(*), 0
+        FROM vehicle_exits
+        WHERE exit_time >= :start AND exit_time < :end
+        GROUP BY 1, 2, 3
+    """,
+    SESSION: """
+        SELECT date_trunc('hour', s.end_time), s.lot_id, COALESCE(sl.vehicle_type, ''), 'session',
+               COUNT(*), COALESCE(SUM(s.duration_minutes), 0)
+        FROM parking_sessions s
+        LEFT JOIN parking_slots sl ON sl.slot_id = s.slot_id
+        WHERE s.status = 'completed' AND s.end_time >= :start AND s.end_time < :end
+        GROUP BY 1, 2, 3
+    """,
+}
+
+
+def backfill(session, start, end):
+    """Rebuild the rollup for whole hours in [start, end) from the raw tables"""
+    start, end = hour_bucket(start), hour_bucket(end)
+    params = {'start': start, 'end': end}
+    session.query(TrafficRollup)\
+        .filter(TrafficRollup.hour_bucket >= start, TrafficRollup.hour_bucket < end)\
+        .delete(synchronize_session=False)
+    for direction, select_sql in BACKFILL_SQL.items():
+        session.execute(text(
+            "INSERT INTO traffic_rollups (hour_bucket, lot_id, vehicle_type, direction, count, duration_sum, updated_at) "
+            f"SELECT *, now() FROM ({select_sql}) AS rollup"
+        ), params)
+    session.commit()
+    return session.query(func.count()).select_from(TrafficRollup)\
+        .filter(TrafficRollup.hour_bucket >= start, TrafficRollup.hour_bucket < end).scalar()
+
+
+# -----------------------------------
+# Read helpers for the analytics endpoints
+# -----------------------------------
+
+def _range_filter(query, direction, start, end):
+    return query.filter(
+        TrafficRollup.direction == direction,
+        TrafficRollup.hour_bucket >= hour_bucket(start),
+        TrafficRollup.hour_bucket < end
+    )
+
+
+def totals_query(session, direction, start, end, group_expr):
+    """Summed counts for one direction, grouped by a TrafficRollup column/expression"""
+    query = session.query(group_expr.label('grp'), func.sum(TrafficRollup.count).label('count'))
+    return _range_filter(query, direction, start, end).group_by('grp').order_by('grp')
+
+
+def totals_by(session, direction, start, end, group_expr):
+    """[(group, count)] for one direction, grouped by a TrafficRollup column/expression"""
+    return [(grp, int(count)) for grp, count in totals_query(session, direction, start, end, group_expr).all()]
@@ -0,0 +1,113 @@
+import pandas as pd
+from sqlalchemy import func, extract
+
+from models.vehicle_entry import VehicleEntry
+from models.vehicle_exit import VehicleExit
+from models.parking_session import ParkingSession
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _session_hours():
+    """Hours between a session's entry and exit, computed in the database"""
+    return extract('epoch', VehicleExit.exit_time - VehicleEntry.entry_time) / SECONDS_PER_HOUR
+
+
+def _completed_sessions(query, start_date, end_date, lot_id=None):
+    query = query.select_from(VehicleEntry).join(
+        ParkingSession,
+        VehicleEntry.entry_id == ParkingSession.entry_id
+    ).join(
+        VehicleExit,
+        VehicleExit.exit_id == ParkingSession.exit_id
+    ).filter(
+        VehicleEntry.entry_time >= start_date,
+        VehicleEntry.entry_time <= end_date,
+        VehicleExit.exit_time.isnot(None)
+    )
+    if lot_id:
+        query = query.filter(ParkingSession.lot_id == lot_id)
+    return query
+
+
+def _turnover(avg_hours):
+    avg_hours = float(avg_hours or 0)
+    return avg_hours, (24 / avg_hours if avg_hours > 0 else 0)  # Spots per day
+
+
+def daily_turnover_query(session, start_date, end_date, lot_id=None):
+    """(day, avg_hours) of completed sessions per entry day"""
+    day = func.date(VehicleEntry.entry_time)
+    return _completed_sessions(
+        session.query(day.label('day'), func.avg(_session_hours()).label('avg_hours')),
+        start_date, end_date, lot_id
+    ).group_by(day)
+
+
+def daily_turnover(session, start_date, end_date, lot_id=None):
+    """Average stay and turnover rate for every day in the range, from one grouped query"""
+    rows = daily_turnover_query(session, start_date, end_date, lot_id).all()
+    by_day = {str(row.day)[:10]: row.avg_hours for row in rows}
+
+    results = []
+    for current in pd.date_range(start=start_date.date(), end=end_date.date()):
+        date_str = current.strftime('%Y-%m-%d')
+        avg_duration, turnover = _turnover(by_day.get(date_str))
+        results.append({
+            'date': date_str,
+            'avg_turnover_time': round(avg_duration, 2),
+            'turnover_rate': round(turnover, 2)
+        })
+    return results
+
+
+def turnover_rate(session, start_date, end_date, lot_id=None):
+    """How quickly spots become available again, over the whole range"""
+    avg_hours, count = _completed_sessions(
+        session.query(func.avg(_session_hours()), func.count()),
+        start_date, end_date, lot_id
+    ).one()
+    avg_turnover_time, rate = _turnover(avg_hours)
+    return {
+        "avg_turnover_time_hours": round(avg_turnover_time, 2),
+        "turnover_rate_per_day": round(rate, 2),
+        "confidence": round(min(1.0, count / 50), 2)  # Confidence based on sample size
+    }
+
+
+def visit_frequency(session, start_date, end_date, lot_id=None):
+    """
+    Average days between a plate's consecutive visits (LAG over entries per plate)
+    and visits per 30 days, in one round trip.
+    """
+    previous_visit = func.lag(VehicleEntry.entry_time).over(
+        partition_by=VehicleEntry.plate_number,
+        order_by=VehicleEntry.entry_time
+    )
+    visits = session.query(
+        (VehicleEntry.entry_time - previous_visit).label('gap')
+    ).join(
+        ParkingSession,
+        VehicleEntry.entry_id == ParkingSession.entry_id
+    ).filter(
+        VehicleEntry.entry_time >= start_date,
+        VehicleEntry.entry_time <= end_date
+    )
+    if lot_id:
+        visits = visits.filter(ParkingSession.lot_id == lot_id)
+    visits = visits.subquery()
+
+    total_visits, intervals, avg_gap_seconds = session.query(
+        func.count(),
+        func.count(visits.c.gap),
+        func.avg(extract('epoch', visits.c.gap))
+    ).one()
+
+    avg_interval = float(avg_gap_seconds or 0) / SECONDS_PER_DAY
+    visits_per_month = total_visits / ((end_date - start_date).days + 1) * 30  # Normalize to 30 days
+    return {
+        "avg_days_between_visits": round(avg_interval, 1),
+        "visits_per_month": round(visits_per_month, 1),
+        "confidence": round(min(1.0, intervals / 50), 2)
+    }
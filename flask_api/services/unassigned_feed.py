@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import queue
+import select
+import threading
+
+from sqlalchemy import exists, and_
+
+from db.db import session_scope, get_engine
+from models.vehicle_entry import VehicleEntry
+from models.customer import ParkingCustomer
+from services.event_bus import event_bus, ENTRY_CREATED, EXIT_CREATED, SLOT_CHANGED, RESYNC
+
+# Safety net for changes that bypass the event bus (manual DB edits, other processes without Redis)
+UNASSIGNED_FEED_REFRESH = float(os.getenv('UNASSIGNED_FEED_REFRESH', 30))
+# Polling interval when LISTEN/NOTIFY is not available (SQLite, listener down)
+UNASSIGNED_FEED_POLL = float(os.getenv('UNASSIGNED_FEED_POLL', 2))
+# Channel fed by the vehicle_entries trigger (migration 3f9a1c2d7e45)
+VEHICLE_ENTRY_CHANNEL = 'vehicle_entry_changes'
+# Messages a slow client may lag behind before it is resynced with a fresh snapshot
+SUBSCRIBER_QUEUE_SIZE = 50
+
+
+def _sse(message):
+    return f"data: {json.dumps(message)}\n\n"
+
+
+def _format_vehicle(vehicle, is_registered):
+    return {
+        'id': str(vehicle.entry_id),
+        'image': vehicle.image_url or '/default-vehicle.png',
+        'time': vehicle.entry_time.strftime('%H:%M'),
+        'type': vehicle.vehicle_type,
+        'plate': vehicle.plate_number,
+        'color': vehicle.hex_color,
+        'date': vehicle.entry_time.strftime('%Y-%m-%d'),
+        'created_at': vehicle.created_at.isoformat(),
+        'registered': "Yes" if is_registered else "No"
+    }
+
+
+
+def _registered_clause():
+    return exists().where(and_(
+        ParkingCustomer.plate_number == VehicleEntry.plate_number,
+        ParkingCustomer.is_registered == True
+    ))
+
+
+def unassigned_query(session):
+    """(VehicleEntry, is_registered) for every unassigned entry, oldest first"""
+    return session.query(VehicleEntry, _registered_clause().label('is_registered'))\
+        .filter(VehicleEntry.status == 'unassigned')\
+        .order_by(VehicleEntry.entry_time.asc())
+
+class UnassignedFeed:
+    """
+    One producer for the unassigned-vehicles SSE stream. On Postgres a LISTEN thread
+    receives vehicle_entries changes from a trigger and updates the set one row at a
+    time; elsewhere (SQLite tests, listener down) the list is recomputed with a single
+    query when an event arrives or every poll interval. The already serialized message
+    is fanned out to every connected client: a snapshot when a client connects, then
+    only the added/removed vehicles.
+    """
+
+    def __init__(self, refresh_interval=UNASSIGNED_FEED_REFRESH, poll_interval=UNASSIGNED_FEED_POLL):
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.listening = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._subscribers = set()
+        self._vehicles = None  # entry_id -> formatted row, None until first load
+        self._snapshot = None  # serialized snapshot message
+        self._stale = True
+        self._dirty = threading.Event()
+        self._started = False
+        self.refreshes = 0
+        self.notifications = 0
+
+    def _load(self):
+        with session_scope('background') as session:
+            rows = unassigned_query(session).all()
+            return {str(vehicle.entry_id): _format_vehicle(vehicle, is_registered)
+                    for vehicle, is_registered in rows}
+
+    def _refresh(self):
+        with self._refresh_lock:
+            self._publish(self._load())
+
+    def _publish(self, vehicles):
+        self.refreshes += 1
+        with self._lock:
+            previous = self._vehicles
+            self._vehicles = vehicles
+            self._stale = False
+            self._snapshot = _sse({'success': True, 'type': 'snapshot', 'data': list(vehicles.values())})
+            if previous is None:
+                return
+
+            added = [row for entry_id, row in vehicles.items() if previous.get(entry_id) != row]
+            removed = [entry_id for entry_id in previous if entry_id not in vehicles]
+            if not added and not removed:
+                return
+
+            self._broadcast(added, removed)
+
+    def _broadcast(self, added, removed):
+        message = _sse({'success': True, 'type': 'delta', 'added': added, 'removed': removed})
+        for subscriber in list(self._subscribers):
+            self._offer(subscriber, message)
+
+    def _apply_change(self, entry_id, status):
+        """Incremental update for one vehicle_entries row reported by NOTIFY"""
+        row = None
+        if status == 'unassigned':
+            with session_scope('background') as session:
+                found = session.query(VehicleEntry, _registered_clause().label('is_registered'))\
+                    .filter(VehicleEntry.entry_id == entry_id, VehicleEntry.status == 'unassigned')\
+                    .first()
+                if found:
+                    row = _format_vehicle(*found)
+
+        with self._lock:
+            if self._vehicles is None:
+                return
+            if row is not None:
+                if self._vehicles.get(entry_id) == row:
+                    return
+                self._vehicles[entry_id] = row
+                added, removed = [row], []
+            elif self._vehicles.pop(entry_id, None) is not None:
+                added, removed = [], [entry_id]
+            else:
+                return
+            self._snapshot = _sse({'success': True, 'type': 'snapshot', 'data': list(self._vehicles.values())})
+            self._broadcast(added, removed)
+
+    def _listen_loop(self):
+        """Hold a LISTEN connection and apply each notification as it arrives"""
+        backoff = 1
+        while True:
+            raw = None
+            try:
+                raw = get_engine().raw_connection()
+                connection = raw.dbapi_connection
+                connection.set_session(autocommit=True)
+                cursor = connection.cursor()
+                cursor.execute(f"LISTEN {VEHICLE_ENTRY_CHANNEL};")
+                self.listening = True
+                backoff = 1
+                print(f"✅ Unassigned feed listening on {VEHICLE_ENTRY_CHANNEL}")
+                # Anything that changed while we were not listening
+                self._dirty.set()
+
+                while True:
+                    if select.select([connection], [], [], 5) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        self.notifications += 1
+                        try:
+                            change = json.loads(notify.payload)
+                            self._apply_change(str(change['entry_id']), change.get('status'))
+                        except Exception as e:
+                            print(f"Error applying vehicle entry change: {str(e)}")
+            except Exception as e:
+                self.listening = False
+                print(f"⚠️ Unassigned feed listener down, polling every {self.poll_interval}s: {str(e)}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.invalidate()
+                    except Exception:
+                        pass
+
+    def _offer(self, subscriber, message):
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            # Client fell behind; drop its backlog and resync it from the current snapshot
+            while not subscriber.empty():
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    break
+            subscriber.put_nowait(self._snapshot)
+
+    def _run(self):
+        while True:
+            # With LISTEN/NOTIFY the refresh is only a safety net; otherwise we poll
+            self._dirty.wait(timeout=self.refresh_interval if self.listening else self.poll_interval)
+            self._dirty.clear()
+            with self._lock:
+                has_subscribers = bool(self._subscribers)
+            if not has_subscribers:
+                # Nobody is listening; reload lazily on the next subscribe
+                self._stale = True
+                continue
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"Error refreshing unassigned vehicles: {str(e)}")
+
+    def _on_event(self, payload):
+        # NOTIFY already carries vehicle_entries changes; bus events only matter when polling
+        if not self.listening:
+            self._dirty.set()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for event_type in (ENTRY_CREATED, EXIT_CREATED, SLOT_CHANGED, RESYNC):
+            event_bus.subscribe(event_type, self._on_event)
+        threading.Thread(target=self._run, daemon=True, name="unassigned-feed").start()
+        if get_engine().dialect.name == 'postgresql':
+            threading.Thread(target=self._listen_loop, daemon=True, name="unassigned-feed-listen").start()
+
+    def subscribe(self):
+        """Register a client; its queue starts with the current snapshot"""
+        self.start()
+        if self._stale:
+            self._refresh()
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            subscriber.put_nowait(self._snapshot)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'vehicles': len(self._vehicles or {}),
+                'refreshes': self.refreshes,
+                'listening': self.listening,
+                'notifications': self.notifications
+            }
+
+
+unassigned_feed = UnassignedFeed()
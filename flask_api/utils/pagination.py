@@ -0,0 +1,106 @@
+import json
+import uuid
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """?limit= clamped to [1, maximum]"""
+    try:
+        return max(1, min(int(value), maximum)) if value else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Opaque cursor for a keyset position: the sort-key values of the last row on a page"""
+    raw = json.dumps([_cursor_value(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, size):
+    """The JSON-safe values given to encode_cursor; ValueError if it was tampered with"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def explain(session, query):
+    """
+    EXPLAIN (FORMAT JSON) of a Query or select() on Postgres, compiled with the
+    session's dialect so the planner sees exactly the SQL the app sends.
+    """
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=session.get_bind().dialect)
+    params = {key: str(value) if isinstance(value, uuid.UUID) else value
+              for key, value in compiled.params.items()}
+    # Raw DBAPI cursor: the compiled SQL already uses the driver's paramstyle
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def estimate_count(session, query):
+    """
+    Planner row estimate for a query on Postgres (EXPLAIN, no scan), exact COUNT on
+    other databases. None if the estimate could not be obtained.
+    """
+    query = query.order_by(None)
+    if session.get_bind().dialect.name != 'postgresql':
+        return query.count()
+    try:
+        return int(explain(session, query)[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        print(f"⚠️ Count estimate failed: {e}")
+        return None
+
+
+def keyset_query(query, time_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    The query for a newest-first page after `cursor`: a row comparison on (time, id),
+    which an index on those columns answers directly however deep the page is.
+    Fetches limit + 1 rows so the caller can tell whether another page follows.
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor, 2)
+        try:
+            timestamp, row_id = datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        query = query.filter(tuple_(time_column, id_column) < tuple_(timestamp, row_id))
+    return query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def keyset_page(query, time_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Newest-first page after `cursor` (see keyset_query).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = keyset_query(query, time_column, id_column, cursor, limit).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, time_column.key), getattr(last, id_column.key)])
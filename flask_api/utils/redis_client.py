@@ -0,0 +1,60 @@
+import os
+import time
+import threading
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_client = None
+_initialized = False
+_lock = threading.Lock()
+
+
+# Initialize Redis with connection retry and error handling
+def init_redis():
+    """Initialize Redis connection with retry logic"""
+    max_retries = 3
+    retry_delay = 1  # seconds
+    
+    for attempt in range(max_retries):
+        try:
+            redis_client = redis.Redis(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', 6379)),
+                db=0,
+                decode_responses=True,
+                socket_timeout=5,  # 5 seconds timeout
+                socket_connect_timeout=5,  # 5 seconds connection timeout
+                retry_on_timeout=True
+            )
+            # Test the connection
+            redis_client.ping()
+            print("✅ Successfully connected to Redis")
+            return redis_client
+        except redis.ConnectionError as e:
+            if attempt < max_retries - 1:
+                print(f"⚠️ Redis connection attempt {attempt + 1} failed: {str(e)}")
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+            else:
+                print("❌ Failed to connect to Redis after multiple attempts")
+                raise
+        except Exception as e:
+            print(f"❌ Unexpected error connecting to Redis: {str(e)}")
+            raise
+
+
+def get_redis():
+    """Process-wide Redis client shared by OTP, caching and the event bus; None if Redis is down"""
+    global _client, _initialized
+    if not _initialized:
+        with _lock:
+            if not _initialized:
+                try:
+                    _client = init_redis()
+                except Exception as e:
+                    print(f"❌ Redis initialization failed: {str(e)}")
+                    _client = None
+                _initialized = True
+    return _client